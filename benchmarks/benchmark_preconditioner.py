@@ -0,0 +1,63 @@
+""" Benchmark the ramp-filter preconditioner on the parallel-beam normal equations.
+
+Solves (A^T A + s I) x = A^T b with :class:`cuqipy_cil.solver.GramCG` for the
+256x256 Shepp-Logan test problem of ``demos/demo02_CT_Cauchy_diff.py``, with and
+without :class:`cuqipy_cil.preconditioner.RampFilterPreconditioner`, and reports
+the number of iterations and the wall time needed to reach the tolerance.
+
+.. code-block:: bash
+
+    python benchmarks/benchmark_preconditioner.py --output results.json
+
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+import cuqipy_cil
+
+def run(TP, shift, tol, maxit, preconditioner):
+    """ Solve the shifted normal equations and return iterations, time and relative error. """
+    M = cuqipy_cil.preconditioner.RampFilterPreconditioner(TP.model, shift=shift) if preconditioner else None
+    t0 = time.perf_counter()
+    x, it = cuqipy_cil.solver.GramCG(TP.model, TP.data, maxit=maxit, tol=tol, shift=shift, preconditioner=M).solve()
+    elapsed = time.perf_counter() - t0
+    x_exact = np.asarray(TP.exactSolution)
+    return {
+        "iterations": int(it),
+        "time": elapsed,
+        "relative_error": float(np.linalg.norm(x - x_exact)/np.linalg.norm(x_exact)),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--im-size", type=int, default=256)
+    parser.add_argument("--num-angles", type=int, default=180)
+    parser.add_argument("--shifts", type=float, nargs="+", default=[1e-1, 1e0, 1e1])
+    parser.add_argument("--tol", type=float, default=1e-4)
+    parser.add_argument("--maxit", type=int, default=1000)
+    parser.add_argument("--output", help="Write results as JSON to this file.")
+    args = parser.parse_args()
+
+    TP = cuqipy_cil.testproblem.ParallelBeam2D(
+        im_size=(args.im_size, args.im_size),
+        det_count=args.im_size,
+        angles=np.linspace(0, np.pi, args.num_angles),
+        phantom="shepp-logan",
+    )
+
+    results = []
+    print(f"{'shift':>8} {'CG its':>8} {'PCG its':>8} {'CG time':>9} {'PCG time':>9}")
+    for shift in args.shifts:
+        plain = run(TP, shift, args.tol, args.maxit, preconditioner=False)
+        precond = run(TP, shift, args.tol, args.maxit, preconditioner=True)
+        results.append({"shift": shift, "cg": plain, "pcg": precond})
+        print(f"{shift:8.1e} {plain['iterations']:8d} {precond['iterations']:8d} {plain['time']:9.2f} {precond['time']:9.2f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"im_size": args.im_size, "num_angles": args.num_angles, "tol": args.tol, "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
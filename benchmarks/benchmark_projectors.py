@@ -0,0 +1,227 @@
+""" Benchmark forward/adjoint throughput of the CIL models.
+
+Sweeps image size, detector count, number of angles, dtype and backend (including
+the pure-NumPy projector, to compare against astra on the CPU) for
+ParallelBeam2DModel, FanBeam2DModel and ShiftedFanBeam2DModel, and reports
+projections per second, per-call latency percentiles, peak memory and the share
+of time spent outside the CIL projector (NumPy <-> DataContainer conversion).
+The batch methods (forward_batch/adjoint_batch) are timed per image on a stack of
+--batch-size images, to compare them with single forward/adjoint calls.
+
+Results are stored as JSON so they can be compared between releases:
+
+.. code-block:: bash
+
+    python benchmarks/benchmark_projectors.py --output results.json
+    python benchmarks/benchmark_projectors.py --quick --compare results.json
+
+"""
+import argparse
+import itertools
+import json
+import platform
+import resource
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import cuqipy_cil
+
+MODELS = {
+    "ParallelBeam2D": (cuqipy_cil.model.ParallelBeam2DModel, np.pi),
+    "FanBeam2D": (cuqipy_cil.model.FanBeam2DModel, 2*np.pi),
+    "ShiftedFanBeam2D": (cuqipy_cil.model.ShiftedFanBeam2DModel, 2*np.pi),
+}
+
+FULL_SWEEP = {
+    "im_size": [64, 128, 256],
+    "det_count": [None, 2], # None means same as im_size, 2 means twice im_size
+    "num_angles": [60, 180],
+    "dtype": ["float32", "float64"],
+}
+
+QUICK_SWEEP = {
+    "im_size": [64],
+    "det_count": [None],
+    "num_angles": [60],
+    "dtype": ["float32", "float64"],
+}
+
+def available_backends():
+    """ List (backend, device) pairs available on this machine. astra cpu and numpy are always tried. """
+    detected = cuqipy_cil.config.detect()
+    backends = [("astra", "cpu"), ("numpy", "cpu")]
+    if detected["device"] == "gpu":
+        if cuqipy_cil.config._is_installed("astra"):
+            backends.append(("astra", "gpu"))
+        if cuqipy_cil.config._is_installed("tigre"):
+            backends.append(("tigre", "gpu"))
+    return backends
+
+def _timed_calls(func, repeats):
+    """ Call func repeats times and return per-call times in seconds. """
+    times = np.empty(repeats)
+    for i in range(repeats):
+        t0 = time.perf_counter()
+        func()
+        times[i] = time.perf_counter() - t0
+    return times
+
+def _summarize(times, projector_times):
+    """ Summarize per-call times of the model and of the raw projector. """
+    return {
+        "projections_per_second": float(1/np.mean(times)),
+        "latency_mean": float(np.mean(times)),
+        "latency_p50": float(np.percentile(times, 50)),
+        "latency_p90": float(np.percentile(times, 90)),
+        "latency_p99": float(np.percentile(times, 99)),
+        "conversion_share": float(max(0.0, 1 - np.median(projector_times)/np.median(times))),
+    }
+
+def benchmark_model(model, dtype, repeats=20, warmup=2, batch_size=8):
+    """ Benchmark forward and adjoint of model, and the batch methods per image.
+
+    The conversion share is estimated by comparing the full model call against
+    calling the CIL projection operator directly on preallocated containers.
+    """
+    rng = np.random.default_rng(0)
+    x = rng.random(model.domain_dim).astype(dtype)
+    y = model.forward(x).astype(dtype)
+    X = rng.random((model.domain_dim, batch_size)).astype(dtype)
+    Y = model.forward_batch(X).astype(dtype)
+
+    op = model.ProjectionOperator
+    image_data = model.image_geometry.allocate()
+    acquisition_data = model.acquisition_geometry.allocate()
+
+    results = {}
+    # Name: (model call, raw projector call, number of projections per model call)
+    cases = {
+        "forward": (lambda: model.forward(x), lambda: op.direct(image_data, out=acquisition_data), 1),
+        "adjoint": (lambda: model.adjoint(y), lambda: op.adjoint(acquisition_data, out=image_data), 1),
+        "forward_batch": (lambda: model.forward_batch(X), lambda: op.direct(image_data, out=acquisition_data), batch_size),
+        "adjoint_batch": (lambda: model.adjoint_batch(Y), lambda: op.adjoint(acquisition_data, out=image_data), batch_size),
+    }
+    for name, (model_call, projector_call, count) in cases.items():
+        _timed_calls(model_call, warmup)
+        _timed_calls(projector_call, warmup)
+
+        tracemalloc.start()
+        times = _timed_calls(model_call, repeats)/count
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        projector_times = _timed_calls(projector_call, repeats)
+
+        results[name] = _summarize(times, projector_times)
+        results[name]["peak_traced_memory_bytes"] = int(peak)
+    return results
+
+def run(sweep, backends, models, repeats, batch_size=8):
+    """ Run the benchmark sweep and return a list of result records. """
+    records = []
+    for backend, device in backends:
+        cuqipy_cil.config.PROJECTION_BACKEND = backend
+        cuqipy_cil.config.PROJECTION_BACKEND_DEVICE = device
+        for model_name, im_size, det_factor, num_angles, dtype in itertools.product(
+            models, sweep["im_size"], sweep["det_count"], sweep["num_angles"], sweep["dtype"]
+        ):
+            model_class, max_angle = MODELS[model_name]
+            det_count = im_size if det_factor is None else det_factor*im_size
+            params = {
+                "model": model_name,
+                "backend": backend,
+                "device": device,
+                "im_size": im_size,
+                "det_count": det_count,
+                "num_angles": num_angles,
+                "dtype": dtype,
+            }
+            try:
+                model = model_class(
+                    im_size=(im_size, im_size),
+                    det_count=det_count,
+                    angles=np.linspace(0, max_angle, num_angles, endpoint=False),
+                )
+                params.update(benchmark_model(model, dtype, repeats=repeats, batch_size=batch_size))
+            except Exception as e: # Record failures (e.g. unsupported backend) and continue the sweep
+                params["error"] = repr(e)
+            records.append(params)
+            _print_record(params)
+    return records
+
+def _print_record(record):
+    name = "{model:>16} {backend}/{device} N={im_size:<4} det={det_count:<4} angles={num_angles:<4} {dtype:<8}".format(**record)
+    if "error" in record:
+        print(f"{name} ERROR: {record['error']}")
+        return
+    fwd, adj = record["forward"], record["adjoint"]
+    fwd_batch, adj_batch = record["forward_batch"], record["adjoint_batch"]
+    print(
+        f"{name} fwd {fwd['projections_per_second']:8.1f}/s p50={1e3*fwd['latency_p50']:7.2f}ms conv={100*fwd['conversion_share']:4.1f}%"
+        f" | adj {adj['projections_per_second']:8.1f}/s p50={1e3*adj['latency_p50']:7.2f}ms conv={100*adj['conversion_share']:4.1f}%"
+        f" | batch fwd {fwd_batch['projections_per_second']:8.1f}/s adj {adj_batch['projections_per_second']:8.1f}/s"
+    )
+
+def metadata():
+    """ Information about the machine and software the benchmark ran on. """
+    return {
+        "cuqipy_cil_version": cuqipy_cil.__version__,
+        "numpy_version": np.__version__,
+        "python_version": platform.python_version(),
+        "host": platform.node(),
+        "machine": platform.machine(),
+        "date": datetime.now(timezone.utc).isoformat(),
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+def _key(record):
+    return tuple(record[k] for k in ("model", "backend", "device", "im_size", "det_count", "num_angles", "dtype"))
+
+def compare(records, baseline_records, tolerance=0.1):
+    """ Print throughput relative to baseline and return the records that regressed by more than tolerance. """
+    baseline = {_key(r): r for r in baseline_records if "error" not in r}
+    regressions = []
+    for record in records:
+        base = baseline.get(_key(record))
+        if base is None or "error" in record:
+            continue
+        for op in ("forward", "adjoint", "forward_batch", "adjoint_batch"):
+            if op not in record or op not in base: # Baselines from before the batch benchmark
+                continue
+            ratio = record[op]["projections_per_second"]/base[op]["projections_per_second"]
+            if ratio < 1 - tolerance:
+                regressions.append((_key(record), op, ratio))
+            print(f"{str(_key(record)):>80} {op}: {ratio:5.2f}x baseline")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="Path of JSON file to store results in.")
+    parser.add_argument("--compare", help="Path of JSON file with baseline results to compare against.")
+    parser.add_argument("--quick", action="store_true", help="Run a small sweep.")
+    parser.add_argument("--repeats", type=int, default=20, help="Number of timed calls per case.")
+    parser.add_argument("--batch-size", type=int, default=8, help="Number of images per forward_batch/adjoint_batch call.")
+    parser.add_argument("--models", nargs="+", default=list(MODELS), choices=list(MODELS))
+    args = parser.parse_args(argv)
+
+    sweep = QUICK_SWEEP if args.quick else FULL_SWEEP
+    records = run(sweep, available_backends(), args.models, args.repeats, args.batch_size)
+    result = {"metadata": metadata(), "results": records}
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(records, baseline["results"])
+        if regressions:
+            print(f"{len(regressions)} regression(s) found.")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,6 +1,20 @@
 from . import config
+from . import profiling
+from . import cache
+from . import shared
+from . import geometry
+from . import projector
 from . import model
+from . import autotune
+from . import solver
+from . import preconditioner
+from . import pool
+from . import io
+from . import sampler
+from . import distribution
+from . import likelihood
 from . import testproblem
+from .profiling import profile
 
 from . import _version
 __version__ = _version.get_versions()['version']
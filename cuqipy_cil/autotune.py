@@ -0,0 +1,195 @@
+""" Selection of the fastest projection backend and device per geometry size.
+
+Which backend is fastest depends on the problem: tigre is preferred whenever a GPU is
+found, but for small 2D problems the transfers to the GPU often cost more than the
+projection itself and astra on the CPU wins. With autotuning enabled, the first
+:class:`cuqipy_cil.model.CILModel` of a given geometry size times a few forward and
+adjoint projections on every available backend and device and uses the fastest. The
+decision is stored in a JSON file (:data:`cuqipy_cil.config.AUTOTUNE_CACHE_PATH`) keyed
+by geometry size and host, so later runs skip the trial.
+
+Autotuning is opt-in:
+
+.. code-block:: python
+
+    import cuqipy_cil
+
+    cuqipy_cil.config.AUTOTUNE = True # or set the environment variable CUQIPY_CIL_AUTOTUNE=1
+
+    model = cuqipy_cil.model.ParallelBeam2DModel() # Times all backends on first use
+    cuqipy_cil.autotune.info() # Decisions and timings
+
+"""
+import os
+import json
+import time
+import logging
+import platform
+import threading
+import numpy as np
+import cuqipy_cil
+from cil.framework import DataOrder
+
+# Decisions of this process keyed by geometry size and host. The lock only guards the
+# decisions and the cache file, so model construction in other threads is not blocked by a trial.
+_decisions = {}
+_lock = threading.Lock()
+
+_logger = logging.getLogger(__name__)
+
+def candidates():
+    """ List the (backend, device) pairs available on this machine. """
+    device = cuqipy_cil.config.detect()["device"]
+    pairs = []
+    if cuqipy_cil.config._is_installed("astra"):
+        pairs.append(("astra", "cpu"))
+        if device == "gpu":
+            pairs.append(("astra", "gpu"))
+    if device == "gpu" and cuqipy_cil.config._is_installed("tigre"):
+        pairs.append(("tigre", "gpu"))
+    pairs.append(("numpy", "cpu"))
+    return pairs
+
+def select(acquisition_geometry, image_geometry):
+    """ Backend and device to use for the given geometries.
+
+    Returns the stored decision for the geometry size on this host, or runs :func:`tune`
+    and stores its decision. Threads selecting for the same new geometry size at once may
+    each run a trial; the first stored decision is used by all.
+
+    Returns
+    -------
+    tuple (backend, device)
+    """
+    key = decision_key(acquisition_geometry, image_geometry)
+    with _lock:
+        decision = _decisions.get(key)
+        if decision is None:
+            decision = _load().get(key)
+            if decision is not None:
+                _decisions[key] = decision
+    if decision is not None:
+        return decision["backend"], decision["device"]
+
+    decision = tune(acquisition_geometry, image_geometry)
+    with _lock:
+        if key not in _decisions:
+            _decisions[key] = decision
+            _store(key, decision)
+        decision = _decisions[key]
+    return decision["backend"], decision["device"]
+
+def tune(acquisition_geometry, image_geometry, repeats=3):
+    """ Time forward and adjoint projections on every available backend and device.
+
+    Backends that fail for the geometry (e.g. tigre on the CPU, the numpy backend for 3D
+    or running out of memory) are skipped and the error is logged.
+
+    Parameters
+    ----------
+    acquisition_geometry : CIL AcquisitionGeometry
+
+    image_geometry : CIL ImageGeometry
+
+    repeats : int, default 3
+        Number of timed forward/adjoint pairs per candidate after one warm-up pair.
+        The fastest pair counts.
+
+    Returns
+    -------
+    dict with keys
+        "backend", "device" : the fastest candidate.
+        "timings" : dict of the time of a forward/adjoint pair in seconds per "backend/device" (None if it failed).
+    """
+    timings = {}
+    for backend, device in candidates():
+        try:
+            seconds = _time_candidate(acquisition_geometry, image_geometry, backend, device, repeats)
+        except Exception as e: # Any failure of a trial only rules out the candidate
+            _logger.warning("Autotuning skipped %s/%s: %r", backend, device, e)
+            seconds = None
+        timings[f"{backend}/{device}"] = seconds
+
+    measured = {name: seconds for name, seconds in timings.items() if seconds is not None}
+    if len(measured) == 0:
+        raise RuntimeError("Autotuning found no projection backend supporting the geometry.")
+    backend, device = min(measured, key=measured.get).split("/")
+    return {"backend": backend, "device": device, "timings": timings}
+
+def decision_key(acquisition_geometry, image_geometry):
+    """ Key of the stored decisions: host, geometry type and the sizes of image and data.
+
+    Sizes are listed by dimension label in sorted order, so the key does not depend on
+    the dimension order (which 3D models change to the order of the backend).
+    """
+    return "{}:{}{}:{}:{}".format(
+        platform.node(),
+        acquisition_geometry.geom_type,
+        acquisition_geometry.dimension,
+        _sizes(image_geometry),
+        _sizes(acquisition_geometry)
+    )
+
+def _sizes(geometry):
+    """ Sizes of geometry as "label=size" pairs sorted by label, e.g. "horizontal_x=64,horizontal_y=64". """
+    return ",".join(sorted(f"{label}={n}" for label, n in zip(geometry.dimension_labels, geometry.shape)))
+
+def info():
+    """ Stored decisions of this host, keyed by :func:`decision_key`. """
+    with _lock:
+        decisions = _load()
+        decisions.update(_decisions)
+    host = platform.node() + ":"
+    return {key: value for key, value in decisions.items() if key.startswith(host)}
+
+def clear(remove_file=False):
+    """ Forget the decisions of this process, and delete the cache file if remove_file is True. """
+    with _lock:
+        _decisions.clear()
+        if remove_file and os.path.isfile(cuqipy_cil.config.AUTOTUNE_CACHE_PATH):
+            os.remove(cuqipy_cil.config.AUTOTUNE_CACHE_PATH)
+
+def _time_candidate(acquisition_geometry, image_geometry, backend, device, repeats):
+    """ Fastest time of a forward/adjoint pair with the given backend and device. """
+    ag = acquisition_geometry.copy()
+    ig = image_geometry.copy()
+    if ag.dimension == "3D" and backend != "numpy":
+        ag.dimension_labels = DataOrder.get_order_for_engine(backend, ag)
+        ig.dimension_labels = DataOrder.get_order_for_engine(backend, ig)
+
+    operator = cuqipy_cil.model._create_projection_operator(ig, ag, backend, device)
+    image = cuqipy_cil.cache.allocate_empty(ig)
+    data = cuqipy_cil.cache.allocate_empty(ag)
+    image.fill(np.random.default_rng(0).random(ig.shape, dtype=np.float32))
+
+    best = np.inf
+    for i in range(repeats + 1):
+        t0 = time.perf_counter()
+        operator.direct(image, out=data)
+        operator.adjoint(data, out=image)
+        if i > 0: # First pair is a warm-up (e.g. GPU context, compilation)
+            best = min(best, time.perf_counter() - t0)
+    return best
+
+def _load():
+    """ Decisions stored in the cache file (empty if missing or unreadable). """
+    try:
+        with open(cuqipy_cil.config.AUTOTUNE_CACHE_PATH) as f:
+            decisions = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return decisions if isinstance(decisions, dict) else {}
+
+def _store(key, decision):
+    """ Add decision to the cache file, replacing the file atomically. """
+    path = cuqipy_cil.config.AUTOTUNE_CACHE_PATH
+    decisions = _load()
+    decisions[key] = decision
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(decisions, f, indent=2)
+        os.replace(tmp, path)
+    except OSError: # A read-only cache only costs a new trial in the next run
+        pass
@@ -0,0 +1,360 @@
+""" Process-level cache of CIL projection operators and their preallocated data containers.
+
+Models with identical geometry, backend and device share the projection operator and
+containers stored here, so constructing a repeated model does not rebuild the projector.
+Entries with the same image geometry (e.g. the angle subsets of a model) also share their
+image containers.
+The cache is bounded by :data:`cuqipy_cil.config.PROJECTOR_CACHE_SIZE` entries and
+:data:`cuqipy_cil.config.PROJECTOR_CACHE_MAX_BYTES` bytes of container memory (including
+the containers added to the pools by concurrent projections), evicting the least
+recently used entries first.
+
+Example
+-------
+.. code-block:: python
+
+    import cuqipy_cil
+
+    model = cuqipy_cil.model.ParallelBeam2DModel()
+    model2 = cuqipy_cil.model.ParallelBeam2DModel() # Reuses the projector of model
+
+    cuqipy_cil.cache.info() # {'hits': 1, 'misses': 1, ...}
+    cuqipy_cil.cache.clear()
+"""
+import os
+import hashlib
+import weakref
+import threading
+from contextlib import contextmanager
+from collections import OrderedDict
+import numpy as np
+import cuqipy_cil
+from cil.framework import AcquisitionGeometry, AcquisitionData, ImageData
+
+class ProjectorCacheEntry:
+    """ Projection operator and preallocated containers for one geometry.
+
+    Attributes
+    ----------
+    operator : CIL ProjectionOperator
+        The projection operator.
+
+    acquisition_data : CIL AcquisitionData
+        Preallocated container in the range of the operator.
+
+    image_data : CIL ImageData
+        Preallocated container in the domain of the operator.
+
+    containers : ContainerPool
+        Containers checked out by concurrent projections, starting with the preallocated pair.
+        Holds at most :data:`cuqipy_cil.config.CONTAINER_POOL_SIZE` pairs.
+
+    nbytes : int
+        Memory held by all containers of the pool in bytes (including shared image containers).
+    """
+    def __init__(self, operator, acquisition_data, image_data, images=None):
+        self.operator = operator
+        self.acquisition_data = acquisition_data
+        self.image_data = image_data
+        self.containers = ContainerPool(
+            image_data.geometry,
+            acquisition_data.geometry,
+            cuqipy_cil.config.get_container_pool_size(),
+            pairs=[(image_data, acquisition_data)],
+            images=images
+        )
+
+    @property
+    def nbytes(self):
+        """ Memory held by all containers of the pool in bytes. """
+        return self.containers.nbytes
+
+class ContainerPool:
+    """ Bounded pool of (image_data, acquisition_data) container pairs for concurrent callers.
+
+    Containers are allocated on first use (except for the given pairs) and returned to the
+    pool after use. At most maxsize pairs exist; callers block while all pairs are checked out.
+
+    Parameters
+    ----------
+    image_geometry : CIL ImageGeometry
+
+    acquisition_geometry : CIL AcquisitionGeometry
+
+    maxsize : int
+        Maximum number of pairs.
+
+    pairs : list of (image_data, acquisition_data), optional
+        Preallocated pairs placed in the pool.
+
+    images : ContainerPool, optional
+        Pool (of the same image geometry) whose image containers are shared instead of
+        allocating new ones. The image containers of pairs are then ignored.
+    """
+
+    def __init__(self, image_geometry, acquisition_geometry, maxsize, pairs=(), images=None):
+        self._maxsize = max(1, int(maxsize))
+        pairs = list(pairs)[:self._maxsize]
+        if images is None:
+            self._images = _Containers(image_geometry, self._maxsize, [image_data for image_data, _ in pairs])
+        else:
+            self._images = images._images
+        self._acquisitions = _Containers(acquisition_geometry, self._maxsize, [acquisition_data for _, acquisition_data in pairs])
+
+    @property
+    def maxsize(self):
+        """ Maximum number of container pairs. """
+        return self._maxsize
+
+    @property
+    def image_data(self):
+        """ The first image container of the pool, or None if it was created without pairs. """
+        return self._images.first
+
+    @property
+    def nbytes(self):
+        """ Memory held by all containers of the pool (including shared image containers) in bytes. """
+        return self._images.nbytes + self._acquisitions.nbytes
+
+    @contextmanager
+    def checkout(self):
+        """ Context manager yielding a (image_data, acquisition_data) pair reserved for the caller. """
+        # The image container is always taken first, so pools sharing image containers cannot deadlock
+        with self._images.checkout() as image_data, self._acquisitions.checkout() as acquisition_data:
+            yield image_data, acquisition_data
+
+class _Containers:
+    """ Bounded free list of containers of one geometry. """
+
+    def __init__(self, geometry, maxsize, containers):
+        self._geometry = geometry
+        self._semaphore = threading.BoundedSemaphore(maxsize)
+        self._lock = threading.Lock()
+        self._free = list(containers)
+        self.first = self._free[0] if self._free else None
+        self._nbytes = sum(container.as_array().nbytes for container in self._free)
+
+    @property
+    def nbytes(self):
+        with self._lock:
+            return self._nbytes
+
+    @contextmanager
+    def checkout(self):
+        with self._semaphore:
+            with self._lock:
+                container = self._free.pop() if self._free else None
+            if container is None:
+                container = allocate_empty(self._geometry)
+                with self._lock:
+                    self._nbytes += container.as_array().nbytes
+            try:
+                yield container
+            finally:
+                with self._lock:
+                    self._free.append(container)
+
+class ProjectorCache:
+    """ Least recently used cache of projection operators keyed by geometry.
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        Maximum number of entries. Defaults to :data:`cuqipy_cil.config.PROJECTOR_CACHE_SIZE`.
+        If 0 nothing is cached.
+
+    max_bytes : int, optional
+        Maximum container memory of all entries in bytes. Defaults to :data:`cuqipy_cil.config.PROJECTOR_CACHE_MAX_BYTES`.
+        The most recent entry is always kept even if it alone exceeds the limit.
+    """
+    def __init__(self, maxsize=None, max_bytes=None):
+        self._maxsize = maxsize
+        self._max_bytes = max_bytes
+        self._entries = OrderedDict()
+        # Container pools by image geometry, whose image containers new entries share
+        self._image_pools = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @property
+    def maxsize(self):
+        """ Maximum number of entries. """
+        return cuqipy_cil.config.PROJECTOR_CACHE_SIZE if self._maxsize is None else self._maxsize
+
+    @property
+    def max_bytes(self):
+        """ Maximum container memory of all entries in bytes. """
+        return cuqipy_cil.config.PROJECTOR_CACHE_MAX_BYTES if self._max_bytes is None else self._max_bytes
+
+    def get(self, acquisition_geometry, image_geometry, backend, device, factory):
+        """ Return the cache entry for the given geometries, creating it with factory if missing.
+
+        Parameters
+        ----------
+        acquisition_geometry : CIL AcquisitionGeometry
+
+        image_geometry : CIL ImageGeometry
+
+        backend : str
+            Projection backend.
+
+        device : str
+            Projection device.
+
+        factory : callable
+            Called as factory(image_geometry, acquisition_geometry, backend, device) to create the projection operator on a miss.
+
+        Returns
+        -------
+        ProjectorCacheEntry
+        """
+        key = geometry_key(acquisition_geometry, image_geometry, backend, device)
+        image_key = geometry_key(None, image_geometry)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                # Pools may have grown since the last check
+                self._evict()
+                return entry
+            self._misses += 1
+            images = self._image_pools.get(image_key)
+
+        # Build outside the lock since creating a projector can be slow
+        operator = factory(image_geometry, acquisition_geometry, backend, device)
+        if images is None:
+            entry = ProjectorCacheEntry(operator, allocate_empty(acquisition_geometry), allocate_empty(image_geometry))
+        else:
+            entry = ProjectorCacheEntry(operator, allocate_empty(acquisition_geometry), images.image_data, images=images)
+
+        if self.maxsize <= 0:
+            return entry
+
+        with self._lock:
+            # Another thread may have created the same entry in the meantime
+            entry = self._entries.setdefault(key, entry)
+            self._entries.move_to_end(key)
+            self._image_pools.setdefault(image_key, entry.containers)
+            self._evict()
+        return entry
+
+    def _evict(self):
+        """ Remove least recently used entries until size and memory are within bounds. Assumes lock is held. """
+        while len(self._entries) > self.maxsize or (len(self._entries) > 1 and self.nbytes > self.max_bytes):
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    @property
+    def nbytes(self):
+        """ Container memory held by all entries in bytes. Shared image containers are counted once. """
+        pools = [entry.containers for entry in self._entries.values()]
+        images = {id(pool._images): pool._images for pool in pools}
+        return sum(pool._acquisitions.nbytes for pool in pools) + sum(containers.nbytes for containers in images.values())
+
+    def info(self):
+        """ Return cache statistics as a dict with hits, misses, evictions, maxsize, currsize, nbytes and max_bytes. """
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "maxsize": self.maxsize,
+                "currsize": len(self._entries),
+                "nbytes": self.nbytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def clear(self):
+        """ Remove all entries and reset statistics. """
+        with self._lock:
+            self._entries.clear()
+            self._image_pools.clear()
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+def container_dtype(geometry):
+    """ Dtype of the CIL data containers of geometry (float32 unless the geometry sets it). """
+    return np.dtype(getattr(geometry, "dtype", np.float32))
+
+def allocate_empty(geometry):
+    """ Allocate a CIL data container with uninitialized storage.
+
+    Unlike geometry.allocate() the storage is not filled, so for large volumes the
+    memory is only committed by the operating system once it is written to.
+    """
+    array = np.empty(geometry.shape, dtype=container_dtype(geometry))
+    if isinstance(geometry, AcquisitionGeometry):
+        return AcquisitionData(array, deep_copy=False, geometry=geometry)
+    return ImageData(array, deep_copy=False, geometry=geometry)
+
+def _load_cached_arrays(path):
+    """ Load the .npy files in directory path memory-mapped (read-only) as a dict keyed by file name. """
+    if not os.path.isdir(path):
+        return {}
+    return {
+        os.path.splitext(file)[0]: np.load(os.path.join(path, file), mmap_mode="r")
+        for file in os.listdir(path) if file.endswith(".npy")
+    }
+
+def _save_cached_arrays(path, arrays):
+    """ Save arrays as .npy files in directory path. Files are written atomically, so concurrent readers never see partial files. """
+    os.makedirs(path, exist_ok=True)
+    for name, value in arrays.items():
+        tmp_file = os.path.join(path, f".{name}.{os.getpid()}.npy")
+        np.save(tmp_file, np.asarray(value))
+        os.replace(tmp_file, os.path.join(path, f"{name}.npy"))
+
+def geometry_key(acquisition_geometry, image_geometry, *args):
+    """ Canonical hash of CIL geometries (and any additional hashable arguments).
+
+    Geometries with identical configuration give identical keys, independent of object identity.
+    """
+    h = hashlib.sha1()
+    for obj in (acquisition_geometry, image_geometry) + args:
+        _update_hash(h, obj)
+    return h.hexdigest()
+
+def _update_hash(h, obj, depth=0):
+    """ Recursively feed a canonical representation of obj into hash h. """
+    if depth > 16:
+        raise RecursionError("Geometry configuration nested too deep to hash.")
+    if obj is None or isinstance(obj, (bool, int, float, complex, str, bytes, np.generic)):
+        h.update(repr(obj).encode())
+    elif isinstance(obj, np.ndarray):
+        h.update(f"ndarray{obj.dtype.str}{obj.shape}".encode())
+        h.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, (list, tuple)):
+        h.update(f"{type(obj).__name__}{len(obj)}".encode())
+        for item in obj:
+            _update_hash(h, item, depth+1)
+    elif isinstance(obj, dict):
+        h.update(f"dict{len(obj)}".encode())
+        for k in sorted(obj, key=str):
+            h.update(str(k).encode())
+            _update_hash(h, obj[k], depth+1)
+    elif isinstance(obj, type):
+        h.update(f"{obj.__module__}.{obj.__qualname__}".encode())
+    elif hasattr(obj, "__dict__"):
+        h.update(type(obj).__qualname__.encode())
+        _update_hash(h, vars(obj), depth+1)
+    else:
+        h.update(repr(obj).encode())
+
+projector_cache = ProjectorCache()
+""" The process-level projector cache used by :class:`cuqipy_cil.model.CILModel`. """
+
+def info():
+    """ Statistics of the process-level projector cache. See :meth:`ProjectorCache.info`. """
+    return projector_cache.info()
+
+def clear():
+    """ Clear the process-level projector cache. """
+    projector_cache.clear()
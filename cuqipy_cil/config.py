@@ -1,35 +1,192 @@
-""" This module controls global configuration settings for the package. """
+""" This module controls global configuration settings for the package.
+
+The projector backend and device are detected lazily the first time they are needed
+(typically when the first :class:`cuqipy_cil.model.CILModel` is constructed) and the
+result is memoized for the rest of the process. Detection can be skipped entirely by
+setting the environment variables ``CUQIPY_CIL_BACKEND`` ("tigre", "astra", "numpy") and
+``CUQIPY_CIL_DEVICE`` ("cpu", "gpu"), or by assigning :data:`PROJECTION_BACKEND` and
+:data:`PROJECTION_BACKEND_DEVICE` directly.
+
+Attributes
+----------
+PROJECTION_BACKEND : str
+    Projection backend to use. Currently supported: "tigre", "astra", "numpy". Defaults to tigre if possible, otherwise astra.
+    If neither is installed, the pure-NumPy projector of :mod:`cuqipy_cil.projector` ("numpy", 2D only) is used.
+
+PROJECTION_BACKEND_DEVICE : str
+    Device to use for projection backend. Currently supported: "cpu", "gpu". Defaults to GPU if present, otherwise cpu. Only relevant for astra backend.
+
+PROJECTOR_CACHE_SIZE : int
+    Maximum number of projection operators kept in :mod:`cuqipy_cil.cache`. Set to 0 to disable caching.
+
+PROJECTOR_CACHE_MAX_BYTES : int
+    Maximum memory of the data containers kept in :mod:`cuqipy_cil.cache`, in bytes.
+
+CONTAINER_POOL_SIZE : int or None
+    Maximum number of container pairs per projector, i.e. of concurrent projections of models
+    with the same geometry. Further threads wait until a pair is free. Defaults to None, meaning
+    the number of CPU cores.
+
+OPERATOR_CACHE_DIR : str or None
+    Directory in which :meth:`cuqipy_cil.model.CILModel.norm`, ``row_sums`` and ``column_sums``
+    are stored keyed by geometry, so they are computed once per geometry across runs.
+    Defaults to None (memoized per model only).
+
+AUTOTUNE : bool
+    If True, each :class:`cuqipy_cil.model.CILModel` uses the fastest available backend and device
+    for its geometry size, see :mod:`cuqipy_cil.autotune`. Defaults to False, or to the environment
+    variable ``CUQIPY_CIL_AUTOTUNE`` ("1" or "true").
+
+AUTOTUNE_CACHE_PATH : str
+    JSON file storing the autotuning decisions. Defaults to ``~/.cache/cuqipy_cil/autotune.json``,
+    or to the environment variable ``CUQIPY_CIL_AUTOTUNE_CACHE``.
+
+PRECISION : str
+    Floating point precision of the arrays created by the package: "float64" (default) or "float32".
+    With "float32" phantoms, data, prior means, solver iterates and samples are kept in float32,
+    which matches the CIL containers so arrays are passed to the projectors without casts.
+"""
+import os as _os
+import time as _time
+import shutil as _shutil
 import subprocess as _subprocess
+import importlib.util as _importlib_util
+import numpy as _np
+
+_SUPPORTED_BACKENDS = ("tigre", "astra", "numpy")
+_SUPPORTED_DEVICES = ("cpu", "gpu")
+_SUPPORTED_PRECISIONS = ("float32", "float64")
+
+_BACKEND_ENV_VAR = "CUQIPY_CIL_BACKEND"
+_DEVICE_ENV_VAR = "CUQIPY_CIL_DEVICE"
+_AUTOTUNE_ENV_VAR = "CUQIPY_CIL_AUTOTUNE"
+_AUTOTUNE_CACHE_ENV_VAR = "CUQIPY_CIL_AUTOTUNE_CACHE"
+
+PROJECTOR_CACHE_SIZE = 16
+""" Maximum number of projection operators kept in the projector cache. Set to 0 to disable caching. """
+
+PROJECTOR_CACHE_MAX_BYTES = 2**30
+""" Maximum memory of the data containers kept in the projector cache, in bytes. """
 
-# Try detecting GPU
-try:
-    _subprocess.check_output('nvidia-smi')
-    _detected_device = "gpu"
-except:
-    _detected_device = "cpu"
+CONTAINER_POOL_SIZE = None
+""" Maximum number of container pairs per projector (None means the number of CPU cores). """
 
-# Try detecting projector backend
-_detected_backend = None
+OPERATOR_CACHE_DIR = None
+""" Directory storing operator norms and row/column sums per geometry (None disables the on-disk cache). """
 
-try:
-    import astra
-    _detected_backend = "astra"
-except ImportError:
-    pass
+AUTOTUNE = _os.environ.get(_AUTOTUNE_ENV_VAR, "").lower() in ("1", "true")
+""" Select the fastest backend and device per geometry size (see :mod:`cuqipy_cil.autotune`). """
 
-# Try defaulting to tigre (only if GPU is available)
-if _detected_device == "gpu":
+AUTOTUNE_CACHE_PATH = _os.environ.get(
+    _AUTOTUNE_CACHE_ENV_VAR,
+    _os.path.join(_os.path.expanduser("~"), ".cache", "cuqipy_cil", "autotune.json")
+)
+""" JSON file storing the autotuning decisions. """
+
+PRECISION = "float64"
+""" Floating point precision of the arrays created by the package ("float32" or "float64"). """
+
+# Memoized result of detect()
+_detected = None
+
+def detect(refresh=False):
+    """ Detect the projection backend and device.
+
+    The result is memoized per process. Values given by the environment variables
+    ``CUQIPY_CIL_BACKEND`` and ``CUQIPY_CIL_DEVICE`` take precedence and are not probed.
+
+    Parameters
+    ----------
+    refresh : bool, default False
+        If True, ignore the memoized result and detect again.
+
+    Returns
+    -------
+    dict with keys
+        "backend" : detected backend ("tigre", "astra" or "numpy").
+        "device" : detected device ("cpu" or "gpu").
+        "source" : dict stating for backend and device if it was read from the "environment" or found by "probe".
+        "time" : time spent on detection in seconds.
+    """
+    global _detected
+    if _detected is not None and not refresh:
+        return dict(_detected)
+
+    t0 = _time.perf_counter()
+
+    device = _os.environ.get(_DEVICE_ENV_VAR)
+    device_source = "environment"
+    if device is None:
+        device = _probe_device()
+        device_source = "probe"
+    device = device.lower()
+    if device not in _SUPPORTED_DEVICES:
+        raise ValueError(f"Unsupported device '{device}' in {_DEVICE_ENV_VAR}. Supported: {_SUPPORTED_DEVICES}.")
+
+    backend = _os.environ.get(_BACKEND_ENV_VAR)
+    backend_source = "environment"
+    if backend is None:
+        backend = _probe_backend(device)
+        backend_source = "probe"
+    backend = backend.lower()
+    if backend not in _SUPPORTED_BACKENDS:
+        raise ValueError(f"Unsupported backend '{backend}' in {_BACKEND_ENV_VAR}. Supported: {_SUPPORTED_BACKENDS}.")
+
+    _detected = {
+        "backend": backend,
+        "device": device,
+        "source": {"backend": backend_source, "device": device_source},
+        "time": _time.perf_counter() - t0,
+    }
+    return dict(_detected)
+
+def get_dtype():
+    """ The numpy dtype corresponding to :data:`PRECISION`. """
+    if PRECISION not in _SUPPORTED_PRECISIONS:
+        raise ValueError(f"Unsupported precision '{PRECISION}'. Supported: {_SUPPORTED_PRECISIONS}.")
+    return _np.dtype(PRECISION)
+
+def get_container_pool_size():
+    """ The maximum number of container pairs per projector given by :data:`CONTAINER_POOL_SIZE`. """
+    if CONTAINER_POOL_SIZE is None:
+        return _os.cpu_count() or 1
+    if CONTAINER_POOL_SIZE < 1:
+        raise ValueError(f"CONTAINER_POOL_SIZE must be at least 1, got {CONTAINER_POOL_SIZE}.")
+    return int(CONTAINER_POOL_SIZE)
+
+def _probe_device():
+    """ Return "gpu" if nvidia-smi runs successfully, otherwise "cpu". """
+    # Avoid forking a subprocess if nvidia-smi is not even on the path
+    if _shutil.which("nvidia-smi") is None:
+        return "cpu"
     try:
-        import tigre
-        _detected_backend = "tigre"
-    except ImportError:
-        pass
+        _subprocess.check_output("nvidia-smi", stderr=_subprocess.DEVNULL)
+        return "gpu"
+    except (OSError, _subprocess.SubprocessError):
+        return "cpu"
 
-if _detected_backend is None:
-    raise ImportError("No projector backend found. Please install either astra or tigre.")
+def _probe_backend(device):
+    """ Find an installed projector backend without importing it. """
+    # Default to tigre only if GPU is available
+    if device == "gpu" and _is_installed("tigre"):
+        return "tigre"
+    if _is_installed("astra"):
+        return "astra"
+    # Pure-NumPy fallback (2D only)
+    return "numpy"
 
-PROJECTION_BACKEND = _detected_backend
-""" Projection backend to use. Currently supported: "tigre", "astra". Defaults to tigre if possible, otherwise astra. """
+def _is_installed(module_name):
+    """ Check if module can be found without importing it. """
+    try:
+        return _importlib_util.find_spec(module_name) is not None
+    except (ImportError, ValueError):
+        return False
 
-PROJECTION_BACKEND_DEVICE = _detected_device
-""" Device to use for projection backend. Currently supported: "cpu", "gpu". Defaults to GPU if present, otherwise cpu. Only relevant for astra backend. """
+def __getattr__(name):
+    # Only called if attribute is not set on the module, i.e. before the user
+    # assigns PROJECTION_BACKEND or PROJECTION_BACKEND_DEVICE explicitly.
+    if name == "PROJECTION_BACKEND":
+        return detect()["backend"]
+    if name == "PROJECTION_BACKEND_DEVICE":
+        return detect()["device"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,62 @@
+import numpy as np
+import matplotlib.pyplot as plt
+import cuqi
+
+class Image3D(cuqi.geometry.Image2D):
+    """ A class that represents a 3D image (volume).
+
+    The par2fun method converts the parameter vector into a volume.
+    The fun2par method converts the volume into a parameter vector.
+
+    Plotting shows a single slice along the first axis of the volume
+    using matplotlib.pyplot.imshow. Colormap is defaulted to grayscale.
+
+    Parameters
+    -----------
+    im_shape : tuple
+        shape of the volume (slices, rows, columns)
+
+    order : str
+        If order = 'C', the volume is represented in row-major order.
+        if order = 'F', the volume is represented column-major order.
+
+    visual_only : bool, Default: False
+        If visual_only = True, par2fun and fun2par will not convert parameter vector into volume and vice versa.
+        But visualization will still be in volume slice format.
+
+    """
+    def __init__(self, im_shape, order="C", visual_only=False):
+        if len(im_shape) != 3:
+            raise ValueError("Image3D requires a shape with three dimensions.")
+        super().__init__(im_shape, order=order, visual_only=visual_only)
+
+    def _vector_to_image(self, vectors):
+        """ Converts a vector or multiple vectors into a volume. """
+        image = vectors.reshape(self._im_shape+(-1,), order=self.order)
+        # Squeeze to return single volume if only one parameter vector was given
+        image = image.squeeze(axis=3) if image.shape[3] == 1 else image
+        return image
+
+    def _plot(self, values, slice_index=None, **kwargs):
+        """ Plot a slice of the volume(s). Defaults to the middle slice along the first axis. """
+        if self.visual_only:
+            values = self._vector_to_image(values)
+
+        kwargs.setdefault('cmap', "gray")
+
+        if slice_index is None:
+            slice_index = self._im_shape[0]//2
+
+        values = self._process_values(values)
+        subplot_ids = self._create_subplot_list(values.shape[-1])
+        ims = []
+        for rows, cols, subplot_id in subplot_ids:
+            plt.subplot(rows, cols, subplot_id)
+            ims.append(plt.imshow(values[slice_index, ..., subplot_id-1], **kwargs))
+        return ims
+
+    def _process_values(self, values):
+        values = np.asarray(values)
+        if values.ndim == 3:
+            values = values[..., np.newaxis]
+        return values
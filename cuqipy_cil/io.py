@@ -0,0 +1,200 @@
+""" Loading and block-wise streaming of large sinograms stored on disk.
+
+Sinograms are opened without reading them into memory (memory-mapped .npy or raw
+binary files, or HDF5/NeXus datasets) and :class:`StreamedSinogram` reads them one block
+of angles (or slices) at a time. Back projections, data misfits and their gradients are
+accumulated block by block, so only one block of the sinogram is in memory at a time.
+
+Example
+-------
+.. code-block:: python
+
+    import cuqipy_cil
+
+    model = cuqipy_cil.model.ParallelBeam2DModel(im_size=(2048, 2048), det_count=2048, angles=angles)
+    sinogram = cuqipy_cil.io.open_sinogram("sinogram.npy")
+    data = cuqipy_cil.io.StreamedSinogram(sinogram, model, block_size=64)
+
+    # Regularized least-squares reconstruction without loading the full sinogram
+    x, it = cuqipy_cil.solver.GramCG(model, c=data.adjoint(), shift=1e-2).solve()
+
+"""
+import os
+import numpy as np
+import cuqipy_cil
+
+NEXUS_DATA_PATH = "entry1/tomo_entry/data/data"
+""" Location of the data in NeXus files written by CIL. """
+
+def open_sinogram(path, shape=None, dtype="float32", offset=0, dataset=None):
+    """ Open a sinogram stored on disk without reading it into memory.
+
+    Parameters
+    ----------
+    path : str
+        File to open. The format is determined from the extension: ".npy" (memory-mapped),
+        ".h5", ".hdf5", ".nxs" (HDF5/NeXus dataset, requires h5py), otherwise raw binary (memory-mapped).
+
+    shape : tuple of ints, optional
+        Shape of the sinogram. Required for raw binary files.
+
+    dtype : numpy dtype, default "float32"
+        Data type of raw binary files.
+
+    offset : int, default 0
+        Offset in bytes of the data in raw binary files.
+
+    dataset : str, optional
+        Path of the dataset in HDF5 files. Defaults to :data:`NEXUS_DATA_PATH`.
+
+    Returns
+    -------
+    Array-like (numpy.memmap or h5py.Dataset) supporting slicing.
+    """
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension == ".npy":
+        return np.load(path, mmap_mode="r")
+
+    if extension in (".h5", ".hdf5", ".nxs"):
+        try:
+            import h5py
+        except ImportError:
+            raise ImportError("Unable to load h5py package needed to read HDF5/NeXus files! Install it with 'pip install h5py'.")
+        return h5py.File(path, "r")[NEXUS_DATA_PATH if dataset is None else dataset]
+
+    if shape is None:
+        raise ValueError("The shape of raw binary sinograms must be given.")
+    return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=tuple(shape))
+
+class StreamedSinogram:
+    """ Sinogram of a model read from an array-like source one block at a time.
+
+    For a :class:`cuqipy_cil.model.CILModel` the blocks are contiguous ranges of angles,
+    projected with angle-subset models (see :meth:`cuqipy_cil.model.CILModel.subset`). For a
+    :class:`cuqipy_cil.model.SliceStackModel` the blocks are ranges of slices.
+
+    Parameters
+    ----------
+    source : array-like
+        Sinogram in the data layout of the model (see :func:`open_sinogram`). Only the
+        block being processed is read.
+
+    model : cuqipy_cil.model.CILModel or cuqipy_cil.model.SliceStackModel
+        Model whose range the sinogram belongs to.
+
+    block_size : int, optional
+        Number of angles (or slices) per block. The last block may hold one extra angle.
+        Defaults to 32 angles (or 1 slice).
+    """
+
+    def __init__(self, source, model, block_size=None):
+        self._is_stack = isinstance(model, cuqipy_cil.model.SliceStackModel)
+        if self._is_stack:
+            shape = (model.num_slices,) + tuple(model.model.acquisition_geometry.shape)
+            axis = 0
+            block_size = 1 if block_size is None else int(block_size)
+            min_block_size = 1
+        elif isinstance(model, cuqipy_cil.model.CILModel):
+            shape = tuple(model.acquisition_geometry.shape)
+            axis = model.acquisition_geometry.dimension_labels.index("angle")
+            block_size = 32 if block_size is None else int(block_size)
+            # Angle subsets need at least two angles, since CIL drops dimensions of size one
+            min_block_size = 2
+        else:
+            raise TypeError("StreamedSinogram requires a CILModel or SliceStackModel.")
+
+        if tuple(source.shape) != tuple(shape):
+            raise ValueError(f"Sinogram has shape {tuple(source.shape)} but the model expects {tuple(shape)}.")
+        if block_size < min_block_size:
+            raise ValueError(f"block_size must be at least {min_block_size}.")
+
+        n = shape[axis]
+        bounds = list(range(0, n, block_size)) + [n]
+        if len(bounds) > 2 and bounds[-1] - bounds[-2] < min_block_size:
+            del bounds[-2]
+
+        self._source = source
+        self._model = model
+        self._axis = axis
+        self._bounds = list(zip(bounds[:-1], bounds[1:]))
+        self._block_models = {}
+
+    @property
+    def model(self):
+        """ The model the sinogram belongs to. """
+        return self._model
+
+    @property
+    def num_blocks(self):
+        """ Number of blocks. """
+        return len(self._bounds)
+
+    def read_block(self, index):
+        """ Read block index of the sinogram into memory as a float32 array (in container layout). """
+        start, stop = self._bounds[index]
+        slices = [slice(None)]*len(self._source.shape)
+        slices[self._axis] = slice(start, stop)
+        return np.ascontiguousarray(self._source[tuple(slices)], dtype=np.float32)
+
+    def blocks(self):
+        """ Iterate over (start, stop, block) for all blocks, reading one block at a time. """
+        for index, (start, stop) in enumerate(self._bounds):
+            yield start, stop, self.read_block(index)
+
+    def adjoint(self):
+        """ Back projection A^T y of the sinogram, accumulated block by block. Returns a parameter vector. """
+        out = self._image_array()
+        for index in range(self.num_blocks):
+            self._backproject_block(index, self.read_block(index), out)
+        return self._model.domain_geometry.fun2par(out)
+
+    def misfit(self, x):
+        """ Data misfit 0.5*||A x - y||^2 for parameter vector x, accumulated block by block. """
+        return self._misfit(x, gradient=False)[0]
+
+    def misfit_gradient(self, x):
+        """ Data misfit 0.5*||A x - y||^2 and its gradient A^T (A x - y) for parameter vector x. """
+        value, gradient = self._misfit(x, gradient=True)
+        return value, self._model.domain_geometry.fun2par(gradient)
+
+    def _misfit(self, x, gradient):
+        image = np.asarray(self._model.domain_geometry.par2fun(np.asarray(x)), dtype=np.float32)
+        out = self._image_array() if gradient else None
+        value = 0.0
+        for index in range(self.num_blocks):
+            residual = self._project_block(index, image)
+            residual -= self.read_block(index)
+            value += 0.5*float(np.vdot(residual, residual))
+            if gradient:
+                self._backproject_block(index, residual, out)
+        return value, out
+
+    def _image_array(self):
+        """ Zero-initialized image (stack) accumulating back projections. """
+        return np.zeros(self._model.domain_geometry.fun_shape, dtype=np.float32)
+
+    def _block_model(self, index):
+        """ Angle-subset model of block index (created on first use). """
+        if index not in self._block_models:
+            start, stop = self._bounds[index]
+            self._block_models[index] = self._model.subset(np.arange(start, stop))
+        return self._block_models[index]
+
+    def _project_block(self, index, image):
+        """ Forward projection of image restricted to block index. """
+        if self._is_stack:
+            start, stop = self._bounds[index]
+            model = self._model.model
+            return np.stack([model._project(image[i]) for i in range(start, stop)])
+        return self._block_model(index)._project(image)
+
+    def _backproject_block(self, index, block, out):
+        """ Add the back projection of sinogram block index to out. """
+        if self._is_stack:
+            start, stop = self._bounds[index]
+            model = self._model.model
+            for i in range(start, stop):
+                out[i] += model._backproject(block[i-start])
+            return
+        out += self._block_model(index)._backproject(block)
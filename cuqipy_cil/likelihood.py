@@ -0,0 +1,114 @@
+""" Likelihoods of CT data sharing projections between log density and gradient.
+
+Gradient-based samplers (e.g. :class:`cuqi.sampler.NUTS` and :class:`cuqi.sampler.MALA`)
+evaluate the log-likelihood and its gradient at the same point. With a
+:class:`cuqi.likelihood.Likelihood` both evaluations compute the forward projection A x,
+while :class:`FusedLikelihood` projects once and reuses the result, so a step costs one
+forward and one adjoint projection.
+"""
+import numpy as np
+import cuqi
+import cuqipy_cil
+
+class FusedLikelihood(cuqi.likelihood.Likelihood):
+    """ Likelihood of a linear model computing residual, log density and gradient from one forward projection.
+
+    The last forward projection A x is kept in a one-entry memo, so evaluating the log
+    density and the gradient at the same x (in any order) projects once.
+
+    Supported data distributions are :class:`cuqi.distribution.Gaussian` and
+    :class:`cuqipy_cil.distribution.TransmissionPoisson` whose mean (attenuation) is a
+    linear model, e.g. a :class:`cuqipy_cil.model.CILModel`, applied to the only parameter
+    of the likelihood. Other likelihoods are evaluated as a :class:`cuqi.likelihood.Likelihood`.
+
+    Parameters
+    ----------
+    distribution : cuqi.distribution.Distribution
+        Conditional data distribution.
+
+    data : cuqi.array.CUQIarray or array_like
+        Observed data.
+
+    Example
+    -------
+    .. code-block:: python
+
+        import cuqi
+        import cuqipy_cil
+
+        A = cuqipy_cil.model.ParallelBeam2DModel()
+        x = cuqi.distribution.Gaussian(np.zeros(A.domain_dim), cov=1)
+        y = cuqi.distribution.Gaussian(A(x), cov=0.05**2)
+
+        likelihood = cuqipy_cil.likelihood.FusedLikelihood(y, y_data)
+        sampler = cuqi.sampler.NUTS(cuqi.distribution.Posterior(likelihood, x))
+
+    """
+
+    def __init__(self, distribution, data):
+        super().__init__(distribution, data)
+        self._memo = None
+
+    @property
+    def is_fused(self):
+        """ True if log density and gradient share the forward projection. """
+        return _model_variable(self.distribution) is not None and len(self.get_parameter_names()) == 1
+
+    def logd_and_gradient(self, x):
+        """ Log-likelihood and its gradient at parameter vector x. """
+        if not self.is_fused:
+            return self.logd(x), self.gradient(x)
+        z = self._forward(x)
+        return self._logd_from_forward(z) + self._constant, self._gradient_from_forward(x, z)
+
+    def _logd(self, *args, **kwargs):
+        if not self.is_fused or len(args) != 1 or len(kwargs) > 0:
+            return super()._logd(*args, **kwargs)
+        return self._logd_from_forward(self._forward(args[0]))
+
+    def _gradient(self, *args, **kwargs):
+        if not self.is_fused or len(args) != 1 or len(kwargs) > 0:
+            return super()._gradient(*args, **kwargs)
+        return self._gradient_from_forward(args[0], self._forward(args[0]))
+
+    def _condition(self, *args, **kwargs):
+        new_likelihood = super()._condition(*args, **kwargs)
+        if isinstance(new_likelihood, FusedLikelihood):
+            new_likelihood._memo = None
+        return new_likelihood
+
+    def _forward(self, x):
+        """ Forward projection A x, reusing the last projection if x is unchanged. """
+        x = np.asarray(x)
+        if self._memo is not None and np.array_equal(self._memo[0], x):
+            return self._memo[1]
+        z = np.asarray(self.model.forward(x))
+        self._memo = (x.copy(), z)
+        return z
+
+    def _logd_from_forward(self, z):
+        """ Log density of the data given the forward projection z. """
+        distribution = self.distribution._make_copy()
+        setattr(distribution, _model_variable(self.distribution), z)
+        return distribution.logd(self.data)
+
+    def _gradient_from_forward(self, x, z):
+        """ Gradient A^T (d/dz log p(data | z)) with one adjoint projection. """
+        distribution = self.distribution
+        if isinstance(distribution, cuqipy_cil.distribution.TransmissionPoisson):
+            direction = distribution.photon_count*np.exp(-z) - distribution.counts(self.data)
+        else:
+            direction = distribution.prec @ (np.asarray(self.data) - z)
+        return self.model.gradient(direction, x)
+
+def _model_variable(distribution):
+    """ Name of the variable of distribution holding a linear model, or None if unsupported. """
+    if isinstance(distribution, cuqipy_cil.distribution.TransmissionPoisson):
+        variable = "attenuation"
+    elif isinstance(distribution, cuqi.distribution.Gaussian):
+        variable = "mean"
+    else:
+        return None
+    if not isinstance(getattr(distribution, variable), cuqi.model.LinearModel):
+        return None
+    return variable
@@ -1,24 +1,144 @@
+import os
+import types
+import weakref
+import asyncio
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
+import scipy.sparse
 import cuqi
 import cuqipy_cil
-from cil.framework import ImageGeometry, AcquisitionGeometry, DataContainer
-import subprocess # To check for CUDA
+from cil.framework import ImageGeometry, AcquisitionGeometry, AcquisitionData, DataContainer, DataOrder
 
-# Try importing astra projector
-try:
-    from cil.plugins.astra import ProjectionOperator as ProjectionOperatorAstra
-except ImportError:
-    ProjectionOperatorAstra = None
+def _load_projection_operator(backend):
+    """ Import the CIL projection operator of the given backend on first use.
 
-# Try importing tigre projector
-try:
-    from cil.plugins.tigre import ProjectionOperator as ProjectionOperatorTigre
-except ImportError:
-    ProjectionOperatorTigre = None
+    Importing the backend plugins is deferred to avoid loading astra/tigre when
+    importing the package.
+    """
+    if backend == "numpy":
+        return cuqipy_cil.projector.ProjectionOperator
+    if backend == "astra":
+        try:
+            from cil.plugins.astra import ProjectionOperator
+        except ImportError:
+            raise ImportError("Unable to load astra package needed by cil projector! Did you install cil with astra support?")
+    elif backend == "tigre":
+        try:
+            from cil.plugins.tigre import ProjectionOperator
+        except ImportError:
+            raise ImportError("Unable to load tigre package needed by cil projector! Did you install cil with tigre support?")
+    else:
+        raise ValueError(f"Unknown projection backend '{backend}'. Supported: 'astra', 'tigre', 'numpy'.")
+    return ProjectionOperator
+
+def _create_projection_operator(image_geometry, acquisition_geometry, backend, device):
+    """ Create CIL projection operator depending on the backend. """
+    if backend == "astra":
+        ProjectionOperator = _load_projection_operator(backend)
+        return ProjectionOperator(image_geometry, acquisition_geometry, device=device)
+
+    if backend == "tigre":
+
+        # If CPU is requested throw error
+        if device == "cpu":
+            raise NotImplementedError("Tigre CPU projector not implemented yet! Try using astra backend instead.")
+
+        ProjectionOperator = _load_projection_operator(backend)
+        return ProjectionOperator(image_geometry, acquisition_geometry) # no device option for tigre
+
+    if backend == "numpy":
+        ProjectionOperator = _load_projection_operator(backend)
+        return ProjectionOperator(image_geometry, acquisition_geometry) # runs on the CPU regardless of device
+
+    raise ValueError(f"Unknown projection backend '{backend}'. Supported: 'astra', 'tigre', 'numpy'.")
+
+def _analytic_reconstruction(acquisition_data, image_geometry, backend, device):
+    """ Filtered back projection (parallel beam) or FDK (fan/cone beam) using CIL's reconstruction tools.
+
+    The tigre backend uses :mod:`cil.recon`, the astra backend uses the FBP processor of the astra plugin.
+    The numpy backend has no analytic reconstruction and raises ImportError.
+    """
+    if backend == "tigre":
+        from cil.recon import FBP, FDK
+        Reconstructor = FBP if acquisition_data.geometry.geom_type == "parallel" else FDK
+        return Reconstructor(acquisition_data, image_geometry=image_geometry).run(verbose=0)
+
+    if backend == "astra":
+        from cil.plugins.astra import FBP
+        return FBP(image_geometry, acquisition_data.geometry, device=device)(acquisition_data)
+
+    if backend == "numpy":
+        raise ImportError("The numpy projection backend has no analytic reconstruction. Install astra or tigre.")
+
+    raise ValueError(f"Unknown projection backend '{backend}'. Supported: 'astra', 'tigre', 'numpy'.")
+
+def _select_backend(acquisition_geometry, image_geometry):
+    """ Backend and device for the given geometries: the autotuned ones if enabled, otherwise those of :mod:`cuqipy_cil.config`. """
+    if cuqipy_cil.config.AUTOTUNE:
+        return cuqipy_cil.autotune.select(acquisition_geometry, image_geometry)
+    return cuqipy_cil.config.PROJECTION_BACKEND, cuqipy_cil.config.PROJECTION_BACKEND_DEVICE
+
+# Executor running the projections of forward_async and adjoint_async, created on first use
+_executor = None
+_executor_lock = threading.Lock()
+
+def _projector_executor():
+    """ The thread pool shared by all models for asynchronous projections.
+
+    It has one thread per container pair (see :data:`cuqipy_cil.config.CONTAINER_POOL_SIZE`),
+    so every running projection has its own containers. Being a single module-level pool it
+    lives for the whole process and is shut down at interpreter exit.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(cuqipy_cil.config.get_container_pool_size(), thread_name_prefix="cuqipy_cil-projector")
+        return _executor
+
+class _ThreadPool:
+    """ Thread pool of a model, started on first use.
+
+    The threads are stopped by :meth:`close` (the pool restarts if used again) or when the
+    pool is garbage collected. Copies of the model share the pool.
+    """
+    def __init__(self, num_threads):
+        self._num_threads = num_threads
+        self._executor = None
+        self._finalizer = None
+        self._lock = threading.Lock()
+
+    def map(self, func, iterable):
+        """ Apply func to the items of iterable in the pool and return the results as a list (propagating exceptions). """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self._num_threads)
+                self._finalizer = weakref.finalize(self, self._executor.shutdown, wait=False)
+            executor = self._executor
+        return list(executor.map(func, iterable))
+
+    def close(self):
+        """ Stop the threads after the running tasks are done. """
+        with self._lock:
+            executor, self._executor = self._executor, None
+            if self._finalizer is not None:
+                self._finalizer.detach()
+                self._finalizer = None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+# Attributes of CILModel holding the projector, which are not pickled
+_PROJECTOR_ATTRIBUTES = ("_ProjectionOperator", "_acquisition_data", "_image_data", "_containers")
 
 class CILModel(cuqi.model.LinearModel):
     """ Base class of cuqi model using CIL for CT projectors.
 
+    Models are safe to use from multiple threads: each projection checks out its own pair
+    of CIL containers from a bounded pool (see :data:`cuqipy_cil.config.CONTAINER_POOL_SIZE`),
+    and the projection backends release the GIL, so a :class:`concurrent.futures.ThreadPoolExecutor`
+    can drive many forward/adjoint calls on one model.
+
     Parameters
     -----------
     acquisition_geometry : CIL acquisition geometry.
@@ -29,10 +149,10 @@ class CILModel(cuqi.model.LinearModel):
 
     Attributes
     -----------
-    range_geometry : cuqi.geometry.Image2D
+    range_geometry : cuqi.geometry.Image2D or cuqipy_cil.geometry.Image3D
         The geometry representing the range associated with sinogram.
 
-    domain_geometry : cuqi.geometry.Image2D
+    domain_geometry : cuqi.geometry.Image2D or cuqipy_cil.geometry.Image3D
         The geometry representing the domain associated with input image.
 
     ProjectionOperator : CIL ProjectionOperator
@@ -42,80 +162,671 @@ class CILModel(cuqi.model.LinearModel):
     -----------
     :meth:`forward` the forward operator.
     :meth:`adjoint` the adjoint operator.
+    :meth:`forward_async` the forward operator returning a future (:meth:`aforward` for asyncio).
+    :meth:`adjoint_async` the adjoint operator returning a future (:meth:`aadjoint` for asyncio).
+    :meth:`forward_batch` the forward operator applied to a stack of images.
+    :meth:`adjoint_batch` the adjoint operator applied to a stack of sinograms.
+    :meth:`gram` the normal operator A^T A.
+    :meth:`norm`, :meth:`row_sums`, :meth:`column_sums` memoized operator norm and row/column sums.
+    :meth:`fbp` filtered back projection (FBP/FDK) reconstruction.
+    :meth:`subset` model restricted to a subset of the projection angles.
+    :meth:`partition` split the model into angle subsets.
 
     """
     
     def __init__(self, acquisition_geometry: AcquisitionGeometry, image_geometry: ImageGeometry) -> None:
 
         # Define image geometries
-        range_geometry = cuqi.geometry.Image2D(acquisition_geometry.shape)
-        domain_geometry = cuqi.geometry.Image2D(image_geometry.shape)
+        range_geometry = self._image_geometry_from_shape(acquisition_geometry.shape)
+        domain_geometry = self._image_geometry_from_shape(image_geometry.shape)
         super().__init__(self._forward_func, self._adjoint_func, domain_geometry=domain_geometry, range_geometry=range_geometry)
 
-        # Create projection operator depending on the backend
-        if cuqipy_cil.config.PROJECTION_BACKEND == "astra":
+        self._acquisition_geometry = acquisition_geometry
+        self._image_geometry = image_geometry
 
-            # If None module is not available
-            if ProjectionOperatorAstra is None:
-                raise ImportError("Unable to load astra package needed by cil projector! Did you install cil with astra support?")
+        # Set for models created by subset()
+        self._subset_indices = None
+        self._subset_angle_axis = None
 
-            self._ProjectionOperator = ProjectionOperatorAstra(image_geometry, acquisition_geometry, device=cuqipy_cil.config.PROJECTION_BACKEND_DEVICE)
-        
-        elif cuqipy_cil.config.PROJECTION_BACKEND == "tigre":
-            
-            # If None module is not available
-            if ProjectionOperatorTigre is None:
-                raise ImportError("Unable to load tigre package needed by cil projector! Did you install cil with tigre support?")
+        # Memoized norm and row/column sums keyed by name
+        self._operator_statistics = {}
 
-            # If CPU is requested throw error
-            if cuqipy_cil.config.PROJECTION_BACKEND_DEVICE == "cpu":
-                raise NotImplementedError("Tigre CPU projector not implemented yet! Try using astra backend instead.")
+        self._load_projector()
 
-            self._ProjectionOperator = ProjectionOperatorTigre(image_geometry, acquisition_geometry) # no device option for tigre
-        
-        # Allocate data containers for efficiency
-        self._acquisition_data = acquisition_geometry.allocate()
-        self._image_data = image_geometry.allocate()
+    def _load_projector(self):
+        """ Get projection operator and preallocated containers from cache (or create them).
+
+        Attributes already set are kept. Models with the same image geometry (e.g. the subsets
+        of a model) share their image containers through the cache, also when the projector
+        is reloaded lazily after unpickling. The backend and device are detected (or autotuned) on first use.
+        """
+        entry = cuqipy_cil.cache.projector_cache.get(
+            self._acquisition_geometry,
+            self._image_geometry,
+            *_select_backend(self._acquisition_geometry, self._image_geometry),
+            _create_projection_operator
+        )
+        self.__dict__.setdefault("_ProjectionOperator", entry.operator)
+
+        # Data containers for efficiency. Projections check out a pair from the pool, so
+        # concurrent calls (also of other models sharing the cache entry) use separate containers.
+        self.__dict__.setdefault("_acquisition_data", entry.acquisition_data)
+        self.__dict__.setdefault("_image_data", entry.image_data)
+        self.__dict__.setdefault("_containers", entry.containers)
+
+    def __getattr__(self, name):
+        # Unpickled models load their projector on first use
+        if name in _PROJECTOR_ATTRIBUTES and "_acquisition_geometry" in self.__dict__:
+            self._load_projector()
+            if name in self.__dict__:
+                return self.__dict__[name]
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    def __getstate__(self):
+        """ Pickle only the geometries and settings, not the projector and containers.
+
+        The projector is recreated (or taken from the projector cache) on first use after
+        unpickling, so models are cheap to send to worker processes.
+        """
+        return {
+            key: value for key, value in self.__dict__.items()
+            if key not in _PROJECTOR_ATTRIBUTES and not isinstance(value, (types.FunctionType, types.MethodType))
+        }
+
+    def __setstate__(self, state):
+        # Recreate the forward and adjoint functions set up by cuqi, then restore the state
+        super().__init__(self._forward_func, self._adjoint_func, domain_geometry=state["_domain_geometry"], range_geometry=state["_range_geometry"])
+        self.__dict__.update(state)
+
+    def __copy__(self):
+        # Shallow copy sharing the projector (cuqi copies models when binding them to distributions)
+        model = self.__class__.__new__(self.__class__)
+        model.__dict__.update(self.__dict__)
+        return model
+
+    @staticmethod
+    def _image_geometry_from_shape(shape):
+        """ cuqi geometry representing CIL data of the given shape. """
+        if len(shape) == 3:
+            return cuqipy_cil.geometry.Image3D(shape)
+        return cuqi.geometry.Image2D(shape)
 
-    
     @property
     def acquisition_geometry(self):
         """ The CIL acquisition geometry. """
-        return self.ProjectionOperator.range_geometry()
+        return self._acquisition_geometry
 
     @property
     def image_geometry(self):
         """ The CIL image geometry. """
-        return self.ProjectionOperator.domain_geometry()
+        return self._image_geometry
 
     @property
     def ProjectionOperator(self):
         """ The CIL projection operator. """
         return self._ProjectionOperator
 
+    def forward(self, *args, out=None, **kwargs):
+        """ Forward projection.
+
+        If given a :class:`cuqi.samples.Samples` object all samples are projected in one batch (see :meth:`forward_batch`).
+
+        Parameters
+        ----------
+        out : ndarray, optional
+            Preallocated array of size range_dim in which the projection is stored (as parameters) and returned.
+            If out is a C-contiguous array of the container dtype (float32 by default) the projector writes
+            directly into it without any allocations. Otherwise the result is copied (and cast) into out.
+
+        Returns
+        -------
+        The projection. Never shares memory with the model unless out is given.
+        """
+        with cuqipy_cil.profiling.timer("CILModel.forward"):
+            if out is not None:
+                return self._apply_out(self._project, self.domain_geometry, out, *args, **kwargs)
+            if len(args) == 1 and self._is_batchable_samples(args[0]):
+                return self.forward_batch(args[0])
+            return super().forward(*args, **kwargs)
+
+    def adjoint(self, *args, out=None, **kwargs):
+        """ Back projection.
+
+        If given a :class:`cuqi.samples.Samples` object all samples are back projected in one batch (see :meth:`adjoint_batch`).
+
+        Parameters
+        ----------
+        out : ndarray, optional
+            Preallocated array of size domain_dim in which the back projection is stored (as parameters) and returned.
+            See :meth:`forward`.
+        """
+        with cuqipy_cil.profiling.timer("CILModel.adjoint"):
+            if out is not None:
+                return self._apply_out(self._backproject, self.range_geometry, out, *args, **kwargs)
+            if len(args) == 1 and self._is_batchable_samples(args[0]):
+                return self.adjoint_batch(args[0])
+            return super().adjoint(*args, **kwargs)
+
+    def forward_async(self, *args, out=None, **kwargs):
+        """ Schedule a forward projection on the projector executor and return immediately.
+
+        Takes the same arguments as :meth:`forward`. The projection runs in a thread of an
+        executor shared by all models, so NumPy work of the caller (e.g. the prior gradient)
+        overlaps with the projector. The input (and out) must not be modified until the
+        projection is done.
+
+        Returns
+        -------
+        concurrent.futures.Future holding the result of :meth:`forward`.
+
+        Example
+        -------
+        .. code-block:: python
+
+            future = model.forward_async(x)
+            g_prior = prior.gradient(x) # Runs while x is projected
+            y = future.result()
+
+        """
+        return _projector_executor().submit(self.forward, *args, out=out, **kwargs)
+
+    def adjoint_async(self, *args, out=None, **kwargs):
+        """ Schedule a back projection on the projector executor and return immediately.
+
+        Takes the same arguments as :meth:`adjoint`. See :meth:`forward_async`.
+
+        Returns
+        -------
+        concurrent.futures.Future holding the result of :meth:`adjoint`.
+        """
+        return _projector_executor().submit(self.adjoint, *args, out=out, **kwargs)
+
+    async def aforward(self, *args, out=None, **kwargs):
+        """ Awaitable forward projection for asyncio, see :meth:`forward_async`.
+
+        The event loop keeps running while the projector executor projects, e.g.
+        ``ys = await asyncio.gather(*(model.aforward(x) for x in xs))``.
+        """
+        return await asyncio.wrap_future(self.forward_async(*args, out=out, **kwargs))
+
+    async def aadjoint(self, *args, out=None, **kwargs):
+        """ Awaitable back projection for asyncio, see :meth:`adjoint_async`. """
+        return await asyncio.wrap_future(self.adjoint_async(*args, out=out, **kwargs))
+
+    def _apply_out(self, func, in_geometry, out, x, is_par=True):
+        """ Apply func to x storing the result in out, bypassing the cuqi geometry conversions. """
+        if isinstance(x, cuqi.array.CUQIarray):
+            x = x.funvals
+        elif is_par:
+            x = in_geometry.par2fun(x)
+        return func(np.asarray(x), out=out)
+
+    def gram(self, x, out=None):
+        """ Compute A^T A x, where A is the forward operator.
+
+        The intermediate sinogram stays inside the CIL containers between the
+        forward and back projection, so only the input and output are converted.
+
+        Parameters
+        ----------
+        x : ndarray
+            Parameter vector of size domain_dim.
+
+        out : ndarray, optional
+            Preallocated array of size domain_dim in which the result is stored and returned.
+
+        Returns
+        -------
+        ndarray of size domain_dim.
+        """
+        if isinstance(x, cuqi.array.CUQIarray):
+            x = x.funvals
+        else:
+            x = self.domain_geometry.par2fun(np.asarray(x))
+        if out is not None:
+            return self._gram(np.asarray(x), out=out)
+        return self.domain_geometry.fun2par(self._gram(np.asarray(x)))
+
+    def _gram(self, x: np.ndarray, out=None) -> np.ndarray:
+        """ Forward and back project image x (in function value shape) keeping the sinogram in the container. """
+        if x.shape != tuple(self._image_geometry.shape):
+            raise ValueError("Array shape does not match container shape.")
+
+        with self._containers.checkout() as (image_data, acquisition_data):
+            with self._borrow_storage(image_data, x) as borrowed:
+                if not borrowed:
+                    self._fill_container_from_numpy(x, image_data)
+                with cuqipy_cil.profiling.timer("projector.direct"):
+                    self.ProjectionOperator.direct(image_data, out=acquisition_data)
+
+            # The image container is free again and receives the back projection
+            return self._apply_container_operator(self.ProjectionOperator.adjoint, acquisition_data, image_data, out)
+
+    def norm(self, maxit=100, tol=1e-6, seed=0):
+        """ Operator 2-norm ||A||_2, e.g. for the step size 1/||A||^2 of gradient methods.
+
+        Estimated by power iteration on A^T A and memoized per combination of maxit, tol
+        and seed, see :meth:`row_sums`. A call with other settings estimates the norm again.
+
+        Parameters
+        ----------
+        maxit : int, default 100
+            Maximum number of power iterations (one forward and one back projection each).
+
+        tol : float, default 1e-6
+            Relative change of the eigenvalue estimate at which the iteration stops.
+
+        seed : int, default 0
+            Seed of the random start vector.
+
+        Returns
+        -------
+        float
+        """
+        name = f"norm_maxit{int(maxit)}_tol{float(tol)!r}_seed{seed}"
+        return float(self._operator_statistic(name, lambda: self._estimate_norm(maxit, tol, seed)))
+
+    def row_sums(self):
+        """ Row sums A 1 of the system matrix (parameter vector of size range_dim).
+
+        Computed with one forward projection on the first call and memoized on the model.
+        If :data:`cuqipy_cil.config.OPERATOR_CACHE_DIR` is set the result is also stored on
+        disk keyed by geometry, backend and device, so later runs load it. The returned
+        array is read-only.
+        """
+        return self._operator_statistic("row_sums", lambda: self.forward(np.ones(self.domain_dim)))
+
+    def column_sums(self):
+        """ Column sums A^T 1 of the system matrix (parameter vector of size domain_dim).
+
+        Computed with one back projection on the first call and memoized, see :meth:`row_sums`.
+        """
+        return self._operator_statistic("column_sums", lambda: self.adjoint(np.ones(self.range_dim)))
+
+    def _operator_statistic(self, name, compute):
+        """ Memoized value of statistic name, loaded from or stored in the on-disk cache if enabled. """
+        statistics = self._operator_statistics
+        if name in statistics:
+            return statistics[name]
+
+        path = None
+        if cuqipy_cil.config.OPERATOR_CACHE_DIR is not None:
+            key = cuqipy_cil.cache.geometry_key(
+                self._acquisition_geometry,
+                self._image_geometry,
+                *_select_backend(self._acquisition_geometry, self._image_geometry)
+            )
+            path = os.path.join(cuqipy_cil.config.OPERATOR_CACHE_DIR, key)
+            statistics.update(cuqipy_cil.cache._load_cached_arrays(path))
+            if name in statistics:
+                return statistics[name]
+
+        value = np.array(compute(), dtype=np.float64)
+        value.setflags(write=False)
+        statistics[name] = value
+        if path is not None:
+            cuqipy_cil.cache._save_cached_arrays(path, {name: value})
+        return value
+
+    def _estimate_norm(self, maxit, tol, seed):
+        """ Square root of the largest eigenvalue of A^T A by power iteration. """
+        x = np.random.default_rng(seed).standard_normal(self.domain_dim)
+        x /= np.linalg.norm(x)
+        eigenvalue = 0.0
+        for _ in range(maxit):
+            y = np.asarray(self.gram(x), dtype=np.float64)
+            previous, eigenvalue = eigenvalue, np.linalg.norm(y)
+            if eigenvalue == 0:
+                break
+            x = y/eigenvalue
+            if abs(eigenvalue - previous) <= tol*eigenvalue:
+                break
+        return np.sqrt(eigenvalue)
+
+    def fbp(self, data):
+        """ Analytic reconstruction of data by filtered back projection.
+
+        Uses FBP for parallel-beam and FDK for fan/cone-beam geometries via CIL's
+        reconstruction tools (see :mod:`cil.recon`). If these are unavailable (e.g. with the
+        numpy backend) 2D parallel-beam data is reconstructed by ramp filtering each projection
+        and back projecting with the projector of the model.
+
+        The reconstruction is cheap compared to iterative methods and is a good initial
+        point for solvers and samplers.
+
+        Parameters
+        ----------
+        data : ndarray or CUQIarray
+            Sinogram (parameter vector of size range_dim).
+
+        Returns
+        -------
+        CUQIarray in the domain geometry.
+        """
+        if isinstance(data, cuqi.array.CUQIarray):
+            data = data.funvals
+        else:
+            data = self.range_geometry.par2fun(np.asarray(data))
+
+        ag = self.acquisition_geometry
+        array = np.array(data, dtype=cuqipy_cil.cache.container_dtype(ag)).reshape(ag.shape)
+
+        try:
+            image = _analytic_reconstruction(
+                AcquisitionData(array, deep_copy=False, geometry=ag),
+                self.image_geometry,
+                *_select_backend(ag, self.image_geometry)
+            ).as_array()
+        except ImportError:
+            if ag.geom_type != "parallel" or ag.dimension != "2D":
+                raise
+            image = self._filtered_back_projection(array)
+
+        return cuqi.array.CUQIarray(self.domain_geometry.fun2par(image), geometry=self.domain_geometry)
+
+    def _filtered_back_projection(self, sinogram):
+        """ FBP of a 2D parallel-beam sinogram using the back projection of the model.
+
+        Each projection is filtered along the detector with the Ram-Lak kernel. The back
+        projection sums the filtered projections over the angles with the length of each ray
+        segment in a pixel, so it is scaled by the angular spacing pi/N_theta (for angles
+        covering [0, pi) or [0, 2 pi)) and by d/(dx dy), the detector spacing per pixel area.
+        """
+        ag, ig = self.acquisition_geometry, self.image_geometry
+        d = float(np.ravel(ag.config.panel.pixel_size)[0])
+        axis = ag.dimension_labels.index("horizontal")
+
+        # Ram-Lak kernel sampled at the detector spacing, applied with zero-padded FFTs
+        n = sinogram.shape[axis]
+        n_padded = 2**int(np.ceil(np.log2(2*n)))
+        k = np.round(np.fft.fftfreq(n_padded, 1/n_padded)).astype(int)
+        kernel = np.zeros(n_padded)
+        kernel[0] = 1/(4*d**2)
+        odd = np.abs(k) % 2 == 1
+        kernel[odd] = -1/(np.pi*k[odd]*d)**2
+        response = d*np.real(np.fft.fft(kernel))
+
+        shape = [1]*sinogram.ndim
+        shape[axis] = n_padded
+        filtered = np.fft.ifft(np.fft.fft(sinogram, n=n_padded, axis=axis)*response.reshape(shape), axis=axis).real
+        filtered = np.take(filtered, np.arange(n), axis=axis).astype(sinogram.dtype)
+
+        scale = np.pi/len(ag.angles)*d/(ig.voxel_size_x*ig.voxel_size_y)
+        return scale*self._backproject(filtered)
+
+    @property
+    def subset_indices(self):
+        """ Indices of the projection angles of the parent model if created by :meth:`subset`, otherwise None. """
+        return self._subset_indices
+
+    def subset(self, indices):
+        """ Model restricted to a subset of the projection angles.
+
+        The subset model projects only the given angles, so its cost scales with the
+        subset size. Its projector and containers are
+        stored in the projector cache (see :mod:`cuqipy_cil.cache`), so repeated subsets
+        are cheap to create, and it shares the image containers of this model.
+
+        Parameters
+        ----------
+        indices : array_like of ints or bools
+            Indices (or boolean mask) of the angles to keep. At least two angles are required.
+
+        Returns
+        -------
+        CILModel
+            Model with the sub-sampled acquisition geometry. Use its :meth:`subset_data`
+            to extract the corresponding data from data of this model.
+
+        Example
+        -------
+        .. code-block:: python
+
+            import cuqi
+            import cuqipy_cil
+
+            TP = cuqipy_cil.testproblem.ParallelBeam2D()
+            likelihoods = [
+                cuqi.distribution.Gaussian(A_i(TP.prior), cov=0.05**2).to_likelihood(A_i.subset_data(TP.data))
+                for A_i in TP.model.partition(4)
+            ]
+
+        """
+        indices = np.asarray(indices)
+        num_angles = len(self.acquisition_geometry.angles)
+        if indices.dtype == bool:
+            if indices.shape != (num_angles,):
+                raise ValueError(f"Boolean mask must have shape ({num_angles},), got {indices.shape}.")
+            indices = np.flatnonzero(indices)
+        indices = indices.astype(int).ravel()
+        if np.any(indices < 0) or np.any(indices >= num_angles):
+            raise ValueError(f"Angle indices must be between 0 and {num_angles-1}.")
+        # CIL drops dimensions of size one, so a single angle would change the data layout
+        if len(indices) < 2:
+            raise ValueError("A subset must contain at least two angles.")
+
+        ag = self.acquisition_geometry.copy()
+        angles = ag.config.angles
+        ag.set_angles(np.asarray(ag.angles)[indices], initial_angle=angles.initial_angle, angle_unit=angles.angle_unit)
+
+        model = self._subset_model(ag)
+        model._subset_indices = indices
+        model._subset_angle_axis = self.acquisition_geometry.dimension_labels.index("angle")
+        return model
+
+    def _subset_model(self, acquisition_geometry):
+        """ Create model with the given (sub-sampled) acquisition geometry and the image geometry of this model. """
+        return CILModel(acquisition_geometry, self.image_geometry)
+
+    def partition(self, n_subsets, method="staggered", seed=None):
+        """ Split the projection angles into disjoint subsets and return a model for each.
+
+        Parameters
+        ----------
+        n_subsets : int
+            Number of subsets.
+
+        method : str, default "staggered"
+            "staggered" assigns every n_subsets'th angle to the same subset, so each subset
+            covers the full angular range. "random" assigns the angles randomly.
+
+        seed : int or numpy.random.Generator, optional
+            Seed for the random partition.
+
+        Returns
+        -------
+        list of CILModel
+            See :meth:`subset`.
+        """
+        num_angles = len(self.acquisition_geometry.angles)
+        n_subsets = int(n_subsets)
+        if n_subsets < 1 or 2*n_subsets > num_angles:
+            raise ValueError(f"Number of subsets must be between 1 and {num_angles//2} (at least two angles per subset).")
+
+        if method == "staggered":
+            index_sets = [np.arange(i, num_angles, n_subsets) for i in range(n_subsets)]
+        elif method == "random":
+            permutation = np.random.default_rng(seed).permutation(num_angles)
+            index_sets = [np.sort(indices) for indices in np.array_split(permutation, n_subsets)]
+        else:
+            raise ValueError(f"Unknown partition method '{method}'. Supported: 'staggered', 'random'.")
+
+        return [self.subset(indices) for indices in index_sets]
+
+    def subset_data(self, data):
+        """ Extract the data of this subset model from data (parameter vector) of the parent model.
+
+        Only available for models created by :meth:`subset`.
+        """
+        if self._subset_indices is None:
+            raise ValueError("subset_data is only available for models created by subset().")
+        data = np.asarray(data)
+        shape = list(self._acquisition_geometry.shape)
+        shape[self._subset_angle_axis] = -1
+        sinogram = data.reshape(shape)
+        subset = np.take(sinogram, self._subset_indices, axis=self._subset_angle_axis)
+        return cuqi.array.CUQIarray(subset.ravel(), geometry=self.range_geometry)
+
+    def forward_batch(self, X):
+        """ Forward project a stack of images.
+
+        This is a convenience loop: the images are projected one at a time (the CIL
+        projectors have no multi-image call), but directly through the container pool
+        into one output array, bypassing the per-vector geometry conversions of
+        :meth:`forward`. The saving over a loop of :meth:`forward` calls is therefore
+        only the conversion overhead, which matters for small problems.
+
+        Parameters
+        ----------
+        X : ndarray or cuqi.samples.Samples
+            Parameter vectors of shape (n, k), where n is the domain dimension and k is the number of images.
+
+        Returns
+        -------
+        ndarray of shape (m, k), or cuqi.samples.Samples with the range geometry if X is a Samples object.
+        """
+        return self._apply_batch(X, self._project, self._image_geometry, self._acquisition_geometry, self.range_geometry)
+
+    def adjoint_batch(self, Y):
+        """ Back project a stack of sinograms, one at a time (see :meth:`forward_batch`).
+
+        Parameters
+        ----------
+        Y : ndarray or cuqi.samples.Samples
+            Parameter vectors of shape (m, k), where m is the range dimension and k is the number of sinograms.
+
+        Returns
+        -------
+        ndarray of shape (n, k), or cuqi.samples.Samples with the domain geometry if Y is a Samples object.
+        """
+        return self._apply_batch(Y, self._backproject, self._acquisition_geometry, self._image_geometry, self.domain_geometry)
+
+    def _apply_batch(self, X, func, in_cil_geometry, out_cil_geometry, out_geometry):
+        """ Apply func to each column of X (in in_cil_geometry) in a loop and return the stacked results (in out_cil_geometry). """
+        in_shape = tuple(in_cil_geometry.shape)
+        in_size = int(np.prod(in_shape))
+        out_size = int(np.prod(out_cil_geometry.shape))
+        is_samples = isinstance(X, cuqi.samples.Samples)
+        if is_samples:
+            X = X.samples
+
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X[:, np.newaxis]
+        if X.ndim != 2 or X.shape[0] != in_size:
+            raise ValueError(f"Batch input must have shape ({in_size}, k), got {X.shape}.")
+
+        # Results are stored row-wise so each projection writes directly to contiguous memory
+        out = np.empty((X.shape[1], out_size), dtype=cuqipy_cil.cache.container_dtype(out_cil_geometry))
+        for j in range(X.shape[1]):
+            func(X[:, j].reshape(in_shape), out=out[j])
+        out = out.T
+
+        if is_samples:
+            return cuqi.samples.Samples(out, geometry=out_geometry)
+        return out
+
+    @staticmethod
+    def _is_batchable_samples(x) -> bool:
+        """ Check if x is a Samples object holding parameter vectors. """
+        return isinstance(x, cuqi.samples.Samples) and getattr(x, "is_par", True)
+
+    def _project(self, x: np.ndarray, out=None) -> np.ndarray:
+        """ Forward project image x (in function value shape) using a pair of preallocated containers. """
+        with self._containers.checkout() as (image_data, acquisition_data):
+            return self._apply_operator(self.ProjectionOperator.direct, x, image_data, acquisition_data, out)
+
+    def _backproject(self, y: np.ndarray, out=None) -> np.ndarray:
+        """ Back project sinogram y (in function value shape) using a pair of preallocated containers. """
+        with self._containers.checkout() as (image_data, acquisition_data):
+            return self._apply_operator(self.ProjectionOperator.adjoint, y, acquisition_data, image_data, out)
+
+    def _apply_operator(self, operator, x, in_container, out_container, out=None):
+        """ Apply CIL operator to x and return the result in out (or a new array).
+
+        The input is used directly as container storage when possible (it is only read by the operator),
+        otherwise it is copied into the container. If out is not given a new array is allocated and
+        the operator writes directly into it. The container storage is never returned.
+        """
+        if x.shape != in_container.shape:
+            raise ValueError("Array shape does not match container shape.")
+
+        with self._borrow_storage(in_container, x) as borrowed:
+            if not borrowed:
+                self._fill_container_from_numpy(x, in_container)
+            return self._apply_container_operator(operator, in_container, out_container, out)
+
+    def _apply_container_operator(self, operator, in_container, out_container, out=None):
+        """ Apply CIL operator to the data in in_container and return the result in out (or a new array). """
+        if out is None:
+            out = np.empty(out_container.shape, dtype=out_container.dtype)
+
+        if out.size != out_container.size:
+            raise ValueError(f"Output array has size {out.size} but expected {out_container.size}.")
+
+        with self._borrow_storage(out_container, out) as borrowed_out:
+            with cuqipy_cil.profiling.timer("projector." + operator.__name__):
+                operator(in_container, out=out_container)
+            if borrowed_out:
+                # Guard against operators that rebind the storage instead of filling it
+                if not np.may_share_memory(out_container.array, out):
+                    np.copyto(out, out_container.array.reshape(out.shape))
+                return out
+
+        return self._copy_from_container(out_container, out)
+
     def _forward_func(self, x: np.ndarray) -> np.ndarray:
-        self._fill_container_from_numpy(x, self._image_data)
-        self.ProjectionOperator.direct(self._image_data, out=self._acquisition_data)
-        return self._acquisition_data.as_array()
+        return self._project(x)
 
     def _adjoint_func(self, x: np.ndarray) -> np.ndarray:
-        self._fill_container_from_numpy(x, self._acquisition_data)
-        self.ProjectionOperator.adjoint(self._acquisition_data, out=self._image_data)
-        return self._image_data.as_array()
+        return self._backproject(x)
+
+    @staticmethod
+    @contextmanager
+    def _borrow_storage(container: DataContainer, array):
+        """ Temporarily use array as the storage of container without copying.
+
+        Only possible if array is a C-contiguous array of the container dtype and size.
+        Yields True if storage was borrowed, otherwise False. The container storage is restored on exit.
+        """
+        owned = container.array
+        if (
+            not isinstance(array, np.ndarray) or
+            array.dtype != owned.dtype or
+            array.size != owned.size or
+            not array.flags.c_contiguous
+        ):
+            yield False
+            return
+        container.array = array.reshape(owned.shape)
+        try:
+            yield True
+        finally:
+            container.array = owned
+
+    @staticmethod
+    def _copy_from_container(container: DataContainer, out) -> np.ndarray:
+        """ Copy container values into out so internal storage is never shared. """
+        name = "container.copy" if out.dtype == container.dtype else "cast"
+        with cuqipy_cil.profiling.timer(name, out.nbytes):
+            np.copyto(out, container.array.reshape(out.shape), casting="same_kind")
+        return out
 
     @staticmethod
     def _fill_container_from_numpy(array: np.ndarray, container: DataContainer):
-        """ Fill a numpy array into a CIL data container without creating a copy. """
+        """ Copy a numpy array into the storage of a CIL data container.
+
+        The cast to the container dtype is fused with the copy, so no temporary array is created.
+        The container never holds a reference to array.
+        """
 
         # Check shape
         if array.shape != container.shape:
             raise ValueError("Array shape does not match container shape.")
-            
-        # Convert to dtype of container only if necessary (this is the main cost)
-        if array.dtype != container.dtype: array = array.astype(container.dtype) 
 
-        # Storing directly in .array avoids copying
-        container.array = array
+        name = "container.fill" if array.dtype == container.dtype else "cast"
+        with cuqipy_cil.profiling.timer(name, container.array.nbytes):
+            np.copyto(container.array, array, casting="same_kind")
 
 class ParallelBeam2DModel(CILModel):
     """ 2D CT model with parallel beam.
@@ -299,3 +1010,638 @@ class ShiftedFanBeam2DModel(CILModel):
         )
 
         super().__init__(acquisition_geometry, image_geometry)
+
+class CILModel3D(CILModel):
+    """ Base class of cuqi model using CIL for 3D CT projectors.
+
+    Data is stored in the dimension order required by the projection backend. Inputs
+    that are C-contiguous float32 arrays are passed to the projector without copies and
+    outputs are written directly into the returned (or given `out`) array, so no extra
+    full-volume copies are made per call.
+
+    Parameters
+    -----------
+    acquisition_geometry : CIL acquisition geometry.
+        See CIL documentation.
+
+    image_geometry : CIL image geometry.
+        See CIL documentation.
+
+    slab_size : int, optional
+        If given, the volume is projected in slabs of slab_size slices along the vertical axis
+        (the last slab may hold one extra slice). No projector or containers are created for
+        the full volume: each slab has its own projector onto the detector rows it can reach,
+        so the memory used by the projector is bounded by one slab of the volume and its data.
+        By linearity the forward projection is the sum of the projections of each slab and
+        the back projection is computed slab by slab.
+
+    """
+
+    def __init__(self, acquisition_geometry: AcquisitionGeometry, image_geometry: ImageGeometry, slab_size=None) -> None:
+
+        # Set dimension order required by the projection backend
+        backend, _ = _select_backend(acquisition_geometry, image_geometry)
+        if backend == "numpy":
+            raise NotImplementedError("The numpy projection backend only supports 2D geometries. Install astra or tigre for 3D.")
+        acquisition_geometry.dimension_labels = DataOrder.get_order_for_engine(backend, acquisition_geometry)
+        image_geometry.dimension_labels = DataOrder.get_order_for_engine(backend, image_geometry)
+
+        if slab_size is not None and slab_size < 2:
+            raise ValueError("slab_size must be at least 2.")
+
+        # Set before the projector is loaded, which is skipped in slab mode
+        self._slab_models = None
+        if slab_size is not None and slab_size < image_geometry.voxel_num_z:
+            self._slab_models = self._create_slab_models(acquisition_geometry, image_geometry, slab_size)
+
+        super().__init__(acquisition_geometry, image_geometry)
+
+    def _load_projector(self):
+        # In slab mode only the slab models hold projectors and containers
+        if self.__dict__.get("_slab_models") is not None:
+            return
+        super()._load_projector()
+
+    @classmethod
+    def _create_slab_models(cls, acquisition_geometry, image_geometry, slab_size):
+        """ Create models projecting slabs of the volume onto the detector rows each slab reaches.
+
+        Returns a list of (start, stop, row_start, row_stop, model), where start:stop are the
+        slices of the slab and row_start:row_stop the detector rows of its model.
+        """
+        nz = image_geometry.voxel_num_z
+        bounds = list(range(0, nz, slab_size)) + [nz]
+
+        # CIL drops dimensions of size one, so a single remaining slice is merged into the previous slab
+        if len(bounds) > 2 and bounds[-1] - bounds[-2] == 1:
+            del bounds[-2]
+
+        slab_models = []
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            slab_geometry = image_geometry.copy()
+            slab_geometry.voxel_num_z = stop-start
+            slab_geometry.center_z = image_geometry.center_z + ((start+stop)/2 - nz/2)*image_geometry.voxel_size_z
+
+            z_lo = image_geometry.center_z + (start - nz/2)*image_geometry.voxel_size_z
+            z_hi = image_geometry.center_z + (stop - nz/2)*image_geometry.voxel_size_z
+            row_start, row_stop = cls._slab_detector_rows(acquisition_geometry, image_geometry, z_lo, z_hi)
+            slab_acquisition_geometry = cls._detector_rows_geometry(acquisition_geometry, row_start, row_stop)
+
+            slab_models.append((start, stop, row_start, row_stop, CILModel(slab_acquisition_geometry, slab_geometry)))
+        return slab_models
+
+    @staticmethod
+    def _slab_detector_rows(acquisition_geometry, image_geometry, z_lo, z_hi):
+        """ Detector rows row_start:row_stop reached by rays through the slab z_lo <= z <= z_hi.
+
+        Heights are relative to the rotation axis. Only geometries rotating about a vertical
+        axis with a vertical detector column are restricted, otherwise all rows are returned.
+        """
+        system = acquisition_geometry.config.system
+        panel = acquisition_geometry.config.panel
+        nv = panel.num_pixels[1]
+        vertical = np.array([0, 0, 1])
+
+        axis = np.asarray(system.rotation_axis.direction, dtype=float)
+        column = np.asarray(system.detector.direction_y, dtype=float)
+        if not np.allclose(np.abs(axis), vertical) or not np.allclose(np.abs(column), vertical):
+            return 0, nv
+
+        rotation_centre = np.asarray(system.rotation_axis.position, dtype=float)
+        detector = np.asarray(system.detector.position, dtype=float) - rotation_centre
+
+        if acquisition_geometry.geom_type == "parallel":
+            if not np.isclose(system.ray.direction[2], 0):
+                return 0, nv
+            heights = [z_lo, z_hi]
+        else:
+            # Magnification of a point at distance d from the source along the detector normal is SDD/d.
+            # The slab lies within radius r of the rotation axis, so SOD - r <= d <= SOD + r at all angles.
+            source = np.asarray(system.source.position, dtype=float) - rotation_centre
+            normal = np.cross(system.detector.direction_x, system.detector.direction_y)
+            normal = normal/np.linalg.norm(normal)
+            source_to_detector = abs(np.dot(detector - source, normal))
+            source_to_axis = abs(np.dot(-source, normal))
+            radius = max(
+                np.hypot(x, y)
+                for x in image_geometry.center_x + np.array([-0.5, 0.5])*image_geometry.voxel_num_x*image_geometry.voxel_size_x
+                for y in image_geometry.center_y + np.array([-0.5, 0.5])*image_geometry.voxel_num_y*image_geometry.voxel_size_y
+            )
+            if radius >= source_to_axis:
+                return 0, nv
+            heights = [
+                source[2] + (z - source[2])*source_to_detector/d
+                for z in (z_lo, z_hi)
+                for d in (source_to_axis - radius, source_to_axis + radius)
+            ]
+
+        # Row k is centred at height detector[2] + (k - (nv-1)/2)*step, with row 0 at the panel origin
+        step = panel.pixel_size[1]*column[2]
+        if "top" in panel.origin:
+            step = -step
+        rows = [(height - detector[2])/step + (nv-1)/2 for height in heights]
+
+        # One extra row on each side for interpolating projectors. CIL drops dimensions of size one, so keep two rows.
+        row_start = max(int(np.floor(min(rows) + 0.5)) - 1, 0)
+        row_stop = min(int(np.floor(max(rows) + 0.5)) + 2, nv)
+        if row_stop - row_start < 2:
+            row_start, row_stop = (row_start, row_start + 2) if row_start + 2 <= nv else (nv - 2, nv)
+        return row_start, row_stop
+
+    @staticmethod
+    def _detector_rows_geometry(acquisition_geometry, row_start, row_stop):
+        """ Copy of acquisition_geometry with a detector of only the rows row_start:row_stop. """
+        panel = acquisition_geometry.config.panel
+        nv = panel.num_pixels[1]
+        if row_start == 0 and row_stop == nv:
+            return acquisition_geometry
+
+        geometry = acquisition_geometry.copy()
+        geometry.set_panel(
+            [panel.num_pixels[0], row_stop-row_start],
+            pixel_size=list(panel.pixel_size),
+            origin=panel.origin
+        )
+
+        # Move the detector centre to the centre of the rows, counted from the panel origin
+        offset = ((row_start + row_stop - 1)/2 - (nv-1)/2)*panel.pixel_size[1]
+        if "top" in panel.origin:
+            offset = -offset
+        detector = geometry.config.system.detector
+        detector.position = np.asarray(detector.position) + offset*np.asarray(detector.direction_y)
+        return geometry
+
+    def _subset_model(self, acquisition_geometry):
+        return CILModel3D(acquisition_geometry, self.image_geometry, self.slab_size)
+
+    @property
+    def slab_size(self):
+        """ Number of slices per slab, or None if the volume is projected at once. """
+        if self._slab_models is None:
+            return None
+        start, stop, _, _, _ = self._slab_models[0]
+        return stop-start
+
+    def _project(self, x: np.ndarray, out=None) -> np.ndarray:
+        if self._slab_models is None:
+            return super()._project(x, out=out)
+        if x.shape != tuple(self._image_geometry.shape):
+            raise ValueError("Array shape does not match container shape.")
+
+        # Each slab is projected in its own containers and added to its rows of the result
+        result = self._output_array(self._acquisition_geometry, out)
+        result.fill(0)
+        rows_axis = self._acquisition_geometry.dimension_labels.index("vertical")
+        rows = [slice(None)]*result.ndim
+        for start, stop, row_start, row_stop, slab_model in self._slab_models:
+            rows[rows_axis] = slice(row_start, row_stop)
+            with slab_model._containers.checkout() as (image_data, acquisition_data):
+                slab = x[start:stop]
+                with slab_model._borrow_storage(image_data, slab) as borrowed:
+                    if not borrowed:
+                        slab_model._fill_container_from_numpy(slab, image_data)
+                    with cuqipy_cil.profiling.timer("projector.direct"):
+                        slab_model.ProjectionOperator.direct(image_data, out=acquisition_data)
+                result[tuple(rows)] += acquisition_data.array
+        return self._finalize_output(result, out)
+
+    def _backproject(self, y: np.ndarray, out=None) -> np.ndarray:
+        if self._slab_models is None:
+            return super()._backproject(y, out=out)
+        if y.shape != tuple(self._acquisition_geometry.shape):
+            raise ValueError("Array shape does not match container shape.")
+
+        result = self._output_array(self._image_geometry, out)
+        rows_axis = self._acquisition_geometry.dimension_labels.index("vertical")
+        rows = [slice(None)]*y.ndim
+        for start, stop, row_start, row_stop, slab_model in self._slab_models:
+            rows[rows_axis] = slice(row_start, row_stop)
+            slab_model._backproject(y[tuple(rows)], out=result[start:stop])
+        return self._finalize_output(result, out)
+
+    def _gram(self, x: np.ndarray, out=None) -> np.ndarray:
+        if self._slab_models is None:
+            return super()._gram(x, out=out)
+        return self._backproject(self._project(x), out=out)
+
+    @staticmethod
+    def _output_array(geometry, out):
+        """ Array (in the shape of geometry) to compute the result in. Uses out directly if possible. """
+        shape = tuple(geometry.shape)
+        dtype = cuqipy_cil.cache.container_dtype(geometry)
+        if out is not None and out.size != np.prod(shape):
+            raise ValueError(f"Output array has size {out.size} but expected {np.prod(shape)}.")
+        if out is not None and out.dtype == dtype and out.flags.c_contiguous:
+            return out.reshape(shape)
+        return np.empty(shape, dtype=dtype)
+
+    @staticmethod
+    def _finalize_output(result, out):
+        """ Return result, copying into out if result could not be computed in out directly. """
+        if out is None:
+            return result
+        if not np.may_share_memory(result, out):
+            np.copyto(out, result.reshape(out.shape), casting="same_kind")
+        return out
+
+class ParallelBeam3DModel(CILModel3D):
+    """ 3D CT model with parallel beam.
+
+    Requires a GPU for the astra backend.
+
+    Parameters
+    ----------
+    im_size : tuple of ints
+        Dimensions of volume in voxels (x, y, z).
+
+    det_count : tuple of ints
+        Number of detector elements (horizontal, vertical).
+
+    angles : ndarray
+        Angles of projections, in radians.
+
+    det_spacing : float or tuple of floats, default 1
+        Detector element size/spacing (horizontal, vertical).
+
+    domain : tuple, default im_size
+        Size of volume domain.
+
+    slab_size : int, optional
+        Project the volume in slabs of at most slab_size slices. See :class:`CILModel3D`.
+
+    """
+
+    def __init__(self,
+        im_size = (45,45,45),
+        det_count = (50,50),
+        angles = np.linspace(0,np.pi,60),
+        det_spacing = None,
+        domain = None,
+        slab_size = None
+        ):
+
+        if domain is None:
+            domain = im_size
+
+        if det_spacing is None:
+            det_spacing = 1
+
+        # Setup cil geometries for parallel beam CT
+        acquisition_geometry = AcquisitionGeometry.create_Parallel3D()
+        acquisition_geometry.set_angles(angles, angle_unit="radian")
+        acquisition_geometry.set_panel(det_count, pixel_size=det_spacing)
+
+        image_geometry = _create_image_geometry_3D(im_size, domain)
+
+        super().__init__(acquisition_geometry, image_geometry, slab_size=slab_size)
+
+class ConeBeam3DModel(CILModel3D):
+    """ 3D CT model with cone beam.
+
+    Assumes a centered beam. Requires a GPU for the astra backend.
+
+    Parameters
+    ----------
+    im_size : tuple of ints
+        Dimensions of volume in voxels (x, y, z).
+
+    det_count : tuple of ints
+        Number of detector elements (horizontal, vertical).
+
+    angles : ndarray
+        Angles of projections, in radians.
+
+    source_object_dist : scalar
+        Distance between source and object.
+
+    object_detector_dist : scalar
+        Distance between detector and object.
+
+    det_spacing : float or tuple of floats, default 1
+        Detector element size/spacing (horizontal, vertical).
+
+    domain : tuple, default im_size
+        Size of volume domain.
+
+    slab_size : int, optional
+        Project the volume in slabs of at most slab_size slices. See :class:`CILModel3D`.
+
+    """
+
+    def __init__(self,
+        im_size = (45,45,45),
+        det_count = (50,50),
+        angles = np.linspace(0,2*np.pi,60),
+        source_object_dist = 200,
+        object_detector_dist = 30,
+        det_spacing = None,
+        domain = None,
+        slab_size = None
+        ):
+
+        if domain is None:
+            domain = im_size
+
+        if det_spacing is None:
+            det_spacing = 1
+
+        # Setup cil geometries for cone beam CT
+        acquisition_geometry = AcquisitionGeometry.create_Cone3D(
+            source_position=[0.0, -source_object_dist, 0.0],
+            detector_position=[0.0, object_detector_dist, 0.0],
+        )
+        acquisition_geometry.set_angles(angles, angle_unit="radian")
+        acquisition_geometry.set_panel(det_count, pixel_size=det_spacing)
+
+        image_geometry = _create_image_geometry_3D(im_size, domain)
+
+        super().__init__(acquisition_geometry, image_geometry, slab_size=slab_size)
+
+def _create_image_geometry_3D(im_size, domain):
+    """ CIL image geometry of a volume with im_size voxels covering domain. """
+    return ImageGeometry(
+        voxel_num_x=im_size[0],
+        voxel_num_y=im_size[1],
+        voxel_num_z=im_size[2],
+        voxel_size_x=domain[0] / im_size[0],
+        voxel_size_y=domain[1] / im_size[1],
+        voxel_size_z=domain[2] / im_size[2],
+    )
+
+class SliceStackModel(cuqi.model.LinearModel):
+    """ CT model of a stack of independent 2D slices sharing the same 2D model.
+
+    All slices are projected in one call, distributing the slices over a pool of
+    threads. Each thread uses its own CIL containers, and the projection backends release
+    the GIL, so throughput scales with the number of cores on CPU-only nodes.
+
+    Parameters
+    ----------
+    model : CILModel
+        2D CT model used for every slice.
+
+    num_slices : int
+        Number of slices in the stack.
+
+    num_workers : int, optional
+        Number of threads used to project slices. Defaults to the number of CPU cores (at most num_slices).
+        The threads are started on first use and stopped by :meth:`close` (or when leaving a ``with`` block).
+
+    Attributes
+    ----------
+    range_geometry : cuqipy_cil.geometry.Image3D
+        The geometry representing the stack of sinograms (slice, angle, detector).
+
+    domain_geometry : cuqipy_cil.geometry.Image3D
+        The geometry representing the stack of images (slice, row, column).
+
+    Example
+    -------
+    .. code-block:: python
+
+        import cuqipy_cil
+
+        model = cuqipy_cil.model.ParallelBeam2DModel()
+        with cuqipy_cil.model.SliceStackModel(model, num_slices=100, num_workers=8) as stack_model:
+            y = stack_model.forward(x) # x has shape (100*45*45,)
+
+    """
+
+    def __init__(self, model: CILModel, num_slices: int, num_workers=None):
+
+        if len(model.domain_geometry.fun_shape) != 2:
+            raise ValueError("SliceStackModel requires a 2D model.")
+
+        range_geometry = cuqipy_cil.geometry.Image3D((num_slices,) + tuple(model.range_geometry.fun_shape))
+        domain_geometry = cuqipy_cil.geometry.Image3D((num_slices,) + tuple(model.domain_geometry.fun_shape))
+        super().__init__(self._forward_func, self._adjoint_func, domain_geometry=domain_geometry, range_geometry=range_geometry)
+
+        if num_workers is None:
+            num_workers = os.cpu_count() or 1
+        self._num_workers = max(1, min(int(num_workers), num_slices))
+
+        self._model = model
+        self._num_slices = num_slices
+        self._containers = cuqipy_cil.cache.ContainerPool(model.image_geometry, model.acquisition_geometry, self._num_workers)
+        self._thread_pool = _ThreadPool(self._num_workers) if self._num_workers > 1 else None
+
+    @property
+    def model(self):
+        """ The 2D model used for every slice. """
+        return self._model
+
+    @property
+    def num_slices(self):
+        """ Number of slices in the stack. """
+        return self._num_slices
+
+    @property
+    def num_workers(self):
+        """ Number of threads used to project slices. """
+        return self._num_workers
+
+    def close(self):
+        """ Stop the worker threads. They are restarted if the model is used again. """
+        if self._thread_pool is not None:
+            self._thread_pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _forward_func(self, x: np.ndarray) -> np.ndarray:
+        return self._apply_slices(x, True)
+
+    def _adjoint_func(self, x: np.ndarray) -> np.ndarray:
+        return self._apply_slices(x, False)
+
+    def _apply_slices(self, x, fwd):
+        """ Apply the forward (or adjoint) operator of the 2D model to each slice of x. """
+        op = self._model.ProjectionOperator
+        image_shape = self._model.domain_geometry.fun_shape
+        sinogram_shape = self._model.range_geometry.fun_shape
+        in_shape, out_shape = (image_shape, sinogram_shape) if fwd else (sinogram_shape, image_shape)
+        out_dtype = cuqipy_cil.cache.container_dtype(self._model.acquisition_geometry if fwd else self._model.image_geometry)
+
+        x = np.asarray(x).reshape((self._num_slices,) + tuple(in_shape))
+        out = np.empty((self._num_slices,) + tuple(out_shape), dtype=out_dtype)
+
+        def work(i):
+            with self._containers.checkout() as (image_data, acquisition_data):
+                if fwd:
+                    self._model._apply_operator(op.direct, x[i], image_data, acquisition_data, out=out[i])
+                else:
+                    self._model._apply_operator(op.adjoint, x[i], acquisition_data, image_data, out=out[i])
+
+        if self._thread_pool is None:
+            for i in range(self._num_slices):
+                work(i)
+        else:
+            self._thread_pool.map(work, range(self._num_slices))
+        return out
+
+class SparseMatrixModel(cuqi.model.LinearModel):
+    """ CT model with the system matrix of a :class:`CILModel` assembled as a sparse matrix.
+
+    The forward operator is assembled once into a CSR matrix by projecting blocks of
+    basis images, and the transposed matrix is stored for the adjoint. Subsequent
+    forward and adjoint calls are pure SciPy sparse matrix-vector products.
+    Suitable for 2D problems up to roughly 512x512 pixels.
+
+    Parameters
+    ----------
+    model : CILModel
+        The CT model to assemble the matrix from.
+
+    batch_size : int, optional
+        Number of basis images projected per batch during assembly.
+        Default is chosen such that a batch uses around 256 MB.
+
+    threshold : float, default 0
+        Matrix entries with absolute value at or below threshold are dropped.
+
+    cache_dir : str, optional
+        Directory in which the matrix is stored as a .npz file keyed by geometry, backend and device.
+        If the file exists it is loaded instead of assembling the matrix.
+
+    num_threads : int, default 1
+        Number of threads used for the sparse matrix-vector products.
+        The rows of the matrices are split into blocks that are multiplied in parallel.
+        The threads are started on first use and stopped by :meth:`close` (or when leaving a ``with`` block).
+
+    Attributes
+    ----------
+    matrix : scipy.sparse.csr_matrix
+        The system matrix.
+
+    Example
+    -------
+    .. code-block:: python
+
+        import cuqipy_cil
+
+        model = cuqipy_cil.model.ParallelBeam2DModel(im_size=(128, 128), det_count=128)
+        A = cuqipy_cil.model.SparseMatrixModel(model, cache_dir="matrices")
+
+        y = A.forward(x)
+        A.get_matrix() # Exact system matrix
+
+    """
+
+    def __init__(self, model: CILModel, batch_size=None, threshold=0, cache_dir=None, num_threads=1):
+
+        super().__init__(self._forward_func, self._adjoint_func, domain_geometry=model.domain_geometry, range_geometry=model.range_geometry)
+
+        self._acquisition_geometry = model.acquisition_geometry
+        self._image_geometry = model.image_geometry
+
+        path = None
+        if cache_dir is not None:
+            key = cuqipy_cil.cache.geometry_key(
+                self._acquisition_geometry,
+                self._image_geometry,
+                *_select_backend(self._acquisition_geometry, self._image_geometry),
+                threshold
+            )
+            path = os.path.join(cache_dir, f"{key}.npz")
+
+        if path is not None and os.path.isfile(path):
+            A = scipy.sparse.load_npz(path).tocsr()
+        else:
+            A = self._assemble(model, batch_size, threshold)
+            if path is not None:
+                os.makedirs(cache_dir, exist_ok=True)
+                scipy.sparse.save_npz(path, A)
+
+        self._matrix = A
+        self._matrix_T = A.T.tocsr()
+
+        # Split rows into blocks for threaded products
+        self._num_threads = max(1, int(num_threads))
+        self._blocks = self._row_blocks(A, self._num_threads)
+        self._blocks_T = self._row_blocks(self._matrix_T, self._num_threads)
+        self._thread_pool = _ThreadPool(self._num_threads) if self._num_threads > 1 else None
+
+    @property
+    def acquisition_geometry(self):
+        """ The CIL acquisition geometry. """
+        return self._acquisition_geometry
+
+    @property
+    def image_geometry(self):
+        """ The CIL image geometry. """
+        return self._image_geometry
+
+    @property
+    def matrix(self):
+        """ The system matrix in CSR format. """
+        return self._matrix
+
+    def get_matrix(self):
+        """ Returns the sparse system matrix. """
+        return self._matrix
+
+    def close(self):
+        """ Stop the threads of the matrix-vector products. They are restarted if the model is used again. """
+        if self._thread_pool is not None:
+            self._thread_pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _forward_func(self, x: np.ndarray) -> np.ndarray:
+        y = self._matvec(self._matrix, self._blocks, x.ravel())
+        return y.reshape(self.range_geometry.fun_shape)
+
+    def _adjoint_func(self, x: np.ndarray) -> np.ndarray:
+        y = self._matvec(self._matrix_T, self._blocks_T, x.ravel())
+        return y.reshape(self.domain_geometry.fun_shape)
+
+    def _matvec(self, A, blocks, x):
+        """ Compute A@x, in parallel over row blocks if more than one thread is used. """
+        if self._thread_pool is None:
+            return A @ x
+        out = np.empty(A.shape[0], dtype=np.result_type(A.dtype, x.dtype))
+        def work(block):
+            start, stop, A_block = block
+            out[start:stop] = A_block @ x
+        self._thread_pool.map(work, blocks)
+        return out
+
+    @staticmethod
+    def _row_blocks(A, num_blocks):
+        """ Split CSR matrix into row blocks of roughly equal number of nonzeros. """
+        if num_blocks == 1:
+            return [(0, A.shape[0], A)]
+        splits = np.searchsorted(A.indptr, np.linspace(0, A.nnz, num_blocks+1)[1:-1])
+        bounds = np.concatenate(([0], splits, [A.shape[0]]))
+        return [(start, stop, A[start:stop]) for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+
+    @staticmethod
+    def _assemble(model: CILModel, batch_size, threshold):
+        """ Assemble the system matrix of model by projecting blocks of basis images. """
+        n, m = model.domain_dim, model.range_dim
+        if batch_size is None:
+            batch_size = max(1, 2**28 // (4*(n+m)))
+        batch_size = min(batch_size, n)
+
+        # Transposed matrix is assembled row-block wise since each projection gives a column of A
+        E = np.zeros((n, batch_size), dtype=np.float32)
+        blocks = []
+        for start in range(0, n, batch_size):
+            stop = min(start+batch_size, n)
+            cols = np.arange(stop-start)
+            E[start+cols, cols] = 1
+            Yt = model.forward_batch(E[:, :stop-start]).T
+            E[start+cols, cols] = 0
+            if threshold > 0:
+                Yt[np.abs(Yt) <= threshold] = 0
+            blocks.append(scipy.sparse.csr_matrix(Yt))
+
+        At = scipy.sparse.vstack(blocks, format="csr")
+        return At.T.tocsr()
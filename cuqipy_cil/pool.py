@@ -0,0 +1,278 @@
+""" Pool of worker processes distributing projections over several devices.
+
+Each worker process is pinned to one device (a CPU or a single GPU) and builds the
+projectors it needs on first use. Arrays are passed to and from the workers through
+:mod:`multiprocessing.shared_memory`, and the workers project directly from and into the
+shared buffers, so calls are not serialized through pickling.
+
+Forward and adjoint calls from several models (or chains) are dispatched to the worker
+with the fewest pending calls.
+
+Example
+-------
+.. code-block:: python
+
+    import cuqipy_cil
+
+    model = cuqipy_cil.model.ParallelBeam2DModel()
+
+    # Four astra CPU workers (no GPU needed)
+    with cuqipy_cil.pool.ProjectorPool(devices="cpu", num_workers=4) as pool:
+        y = pool.forward(model, x)
+
+    # One worker per GPU, models using the pool can be passed to the samplers
+    with cuqipy_cil.pool.ProjectorPool(devices=["gpu:0", "gpu:1"]) as pool:
+        pooled_model = pool.wrap(model)
+        y = pooled_model.forward(x)
+
+"""
+import os
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+import numpy as np
+import cuqi
+import cuqipy_cil
+from cuqipy_cil.shared import SharedArray
+
+class ProjectorPool:
+    """ Pool of worker processes applying forward and adjoint projections of CIL models.
+
+    Parameters
+    ----------
+    devices : str or list of str, default "cpu"
+        Devices to distribute the workers over, assigned round-robin. Each entry is "cpu",
+        "gpu" (default GPU) or "gpu:<index>" (the GPU with the given CUDA index).
+
+    num_workers : int, optional
+        Number of worker processes. Defaults to the number of CPU cores if all devices
+        are "cpu", otherwise to the number of devices.
+
+    backend : str, optional
+        Projection backend used by the workers. Defaults to :data:`cuqipy_cil.config.PROJECTION_BACKEND`,
+        or to astra if that is tigre and there are CPU workers (tigre has no CPU projector).
+        CPU workers use the astra or numpy backend.
+    """
+
+    def __init__(self, devices="cpu", num_workers=None, backend=None):
+        if isinstance(devices, str):
+            devices = [devices]
+        devices = [_parse_device(device) for device in devices]
+        if len(devices) == 0:
+            raise ValueError("At least one device is required.")
+
+        all_cpu = all(device == "cpu" for device, _ in devices)
+        if num_workers is None:
+            num_workers = (os.cpu_count() or 1) if all_cpu else len(devices)
+        if num_workers < 1:
+            raise ValueError("Number of workers must be at least 1.")
+
+        has_cpu = any(device == "cpu" for device, _ in devices)
+        if backend is None:
+            backend = cuqipy_cil.config.PROJECTION_BACKEND
+            if backend == "tigre" and has_cpu:
+                backend = "astra"
+        if backend not in cuqipy_cil.config._SUPPORTED_BACKENDS:
+            raise ValueError(f"Unknown projection backend '{backend}'. Supported: {cuqipy_cil.config._SUPPORTED_BACKENDS}.")
+        if backend == "tigre" and has_cpu:
+            raise ValueError("The tigre backend does not support CPU workers. Use the astra or numpy backend instead.")
+        # Fail here rather than in the workers on first use
+        if backend == "astra" and not cuqipy_cil.config._is_installed("astra"):
+            raise ValueError("CPU workers require astra, which is not installed. Install astra or use backend='numpy'." if has_cpu else "The astra backend is not installed.")
+
+        # Spawn (instead of fork) so every worker initializes its own device context
+        context = multiprocessing.get_context("spawn")
+        self._devices = [devices[i % len(devices)] for i in range(num_workers)]
+        self._workers = [
+            ProcessPoolExecutor(1, mp_context=context, initializer=_initialize_worker, initargs=(backend, device, index))
+            for device, index in self._devices
+        ]
+        self._backend = backend
+        self._pending = [0]*num_workers
+        self._known_keys = [set() for _ in range(num_workers)]
+        self._lock = threading.Lock()
+
+    @property
+    def num_workers(self):
+        """ Number of worker processes. """
+        return len(self._workers)
+
+    @property
+    def devices(self):
+        """ Device of each worker as a list of strings. """
+        return [device if index is None else f"{device}:{index}" for device, index in self._devices]
+
+    @property
+    def backend(self):
+        """ Projection backend used by the workers. """
+        return self._backend
+
+    def submit(self, model, x, adjoint=False):
+        """ Schedule forward (or adjoint) projection of x with model and return a Future.
+
+        Parameters
+        ----------
+        model : cuqipy_cil.model.CILModel
+            The model whose geometry is projected. Workers create (and keep) an equivalent projector.
+
+        x : ndarray
+            Parameter vector of size domain_dim (range_dim if adjoint).
+
+        adjoint : bool, default False
+            If True apply the adjoint (back projection).
+
+        Returns
+        -------
+        concurrent.futures.Future holding the result as an ndarray in the container shape of the model.
+        """
+        ag, ig = model.acquisition_geometry, model.image_geometry
+        in_geometry, out_geometry = (ag, ig) if adjoint else (ig, ag)
+        x = np.asarray(x)
+        if x.size != np.prod(in_geometry.shape):
+            raise ValueError(f"Input has size {x.size} but expected {np.prod(in_geometry.shape)}.")
+
+        key = cuqipy_cil.cache.geometry_key(ag, ig)
+
+        shm_in = SharedArray.empty(in_geometry.shape, cuqipy_cil.cache.container_dtype(in_geometry))
+        shm_out = SharedArray.empty(out_geometry.shape, cuqipy_cil.cache.container_dtype(out_geometry))
+        np.copyto(shm_in.array, x.reshape(in_geometry.shape), casting="same_kind")
+
+        with self._lock:
+            worker = int(np.argmin(self._pending))
+            self._pending[worker] += 1
+            # Workers run calls in submission order, so the geometry only has to be sent once
+            geometries = None
+            if key not in self._known_keys[worker]:
+                geometries = (model.acquisition_geometry, model.image_geometry)
+                self._known_keys[worker].add(key)
+            try:
+                worker_future = self._workers[worker].submit(_worker_project, key, geometries, adjoint, shm_in, shm_out)
+            except BaseException:
+                self._pending[worker] -= 1
+                shm_in.close()
+                shm_out.close()
+                raise
+
+        future = Future()
+
+        def done(worker_future):
+            with self._lock:
+                self._pending[worker] -= 1
+            try:
+                worker_future.result()
+                future.set_result(shm_out.array.copy())
+            except BaseException as e:
+                if geometries is not None:
+                    # The worker may have failed to create the projector, so resend the geometry next time
+                    with self._lock:
+                        self._known_keys[worker].discard(key)
+                future.set_exception(e)
+            finally:
+                shm_in.close()
+                shm_out.close()
+
+        worker_future.add_done_callback(done)
+        return future
+
+    def forward(self, model, x):
+        """ Forward projection of parameter vector x with model. Returns a parameter vector. """
+        return self.submit(model, x).result().ravel()
+
+    def adjoint(self, model, y):
+        """ Back projection of parameter vector y with model. Returns a parameter vector. """
+        return self.submit(model, y, adjoint=True).result().ravel()
+
+    def map(self, model, X, adjoint=False):
+        """ Project the columns of X (shape (n, k)) in parallel and return the results as columns. """
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X[:, np.newaxis]
+        futures = [self.submit(model, X[:, j], adjoint=adjoint) for j in range(X.shape[1])]
+        return np.stack([future.result().ravel() for future in futures], axis=1)
+
+    def wrap(self, model):
+        """ Return a :class:`PooledModel` applying model through this pool. """
+        return PooledModel(model, self)
+
+    def shutdown(self, wait=True):
+        """ Shut down the worker processes. """
+        for worker in self._workers:
+            worker.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+class PooledModel(cuqi.model.LinearModel):
+    """ Linear model applying the forward and adjoint of a CIL model through a :class:`ProjectorPool`.
+
+    Several pooled models (e.g. one per chain) share the workers of the pool.
+
+    Parameters
+    ----------
+    model : cuqipy_cil.model.CILModel
+        The model to apply.
+
+    pool : ProjectorPool
+        The pool executing the projections.
+    """
+
+    def __init__(self, model, pool: ProjectorPool):
+        super().__init__(self._forward_func, self._adjoint_func, domain_geometry=model.domain_geometry, range_geometry=model.range_geometry)
+        self._model = model
+        self._pool = pool
+
+    @property
+    def model(self):
+        """ The wrapped CIL model. """
+        return self._model
+
+    @property
+    def pool(self):
+        """ The projector pool. """
+        return self._pool
+
+    def _forward_func(self, x: np.ndarray) -> np.ndarray:
+        return self._pool.submit(self._model, x).result()
+
+    def _adjoint_func(self, x: np.ndarray) -> np.ndarray:
+        return self._pool.submit(self._model, x, adjoint=True).result()
+
+def _parse_device(device):
+    """ Parse "cpu", "gpu" or "gpu:<index>" into (device, index). """
+    name, _, index = str(device).lower().partition(":")
+    if name not in cuqipy_cil.config._SUPPORTED_DEVICES:
+        raise ValueError(f"Unsupported device '{device}'. Supported: 'cpu', 'gpu', 'gpu:<index>'.")
+    if index == "":
+        return name, None
+    if name == "cpu" or not index.isdigit():
+        raise ValueError(f"Unsupported device '{device}'. Supported: 'cpu', 'gpu', 'gpu:<index>'.")
+    return name, int(index)
+
+# Projection models of a worker process keyed by geometry
+_worker_models = {}
+
+def _initialize_worker(backend, device, index):
+    """ Pin a worker process to its backend and device. Runs before any projector is created. """
+    os.environ[cuqipy_cil.config._BACKEND_ENV_VAR] = backend
+    os.environ[cuqipy_cil.config._DEVICE_ENV_VAR] = device
+    cuqipy_cil.config.AUTOTUNE = False
+    if index is not None:
+        os.environ["CUDA_VISIBLE_DEVICES"] = str(index)
+
+def _worker_project(key, geometries, adjoint, x, out):
+    """ Project the shared input array x into the shared output array out in a worker process. """
+    if key not in _worker_models:
+        if geometries is None:
+            raise RuntimeError("Geometry of projection model not available in worker.")
+        _worker_models[key] = cuqipy_cil.model.CILModel(*geometries)
+    model = _worker_models[key]
+
+    try:
+        func = model._backproject if adjoint else model._project
+        func(x.array, out=out.array)
+    finally:
+        x.close()
+        out.close()
@@ -0,0 +1,170 @@
+""" Preconditioners for the normal equations of CIL models.
+
+The preconditioners approximate the inverse of ``weight*A^T A + shift*I`` and can be
+passed to :class:`cuqipy_cil.solver.GramCG` and :class:`cuqipy_cil.sampler.LinearRTO`,
+or converted to a :class:`scipy.sparse.linalg.LinearOperator` for SciPy solvers.
+"""
+import numpy as np
+import scipy.sparse.linalg
+
+class RampFilterPreconditioner:
+    """ Fourier (ramp filter) preconditioner for 2D parallel-beam models.
+
+    For parallel-beam geometries A^T A is approximately a convolution with symbol
+
+    .. math::
+
+        H(\\nu) = \\frac{c}{|\\nu|},
+
+    where nu is the spatial frequency and c is about N_theta Delta_x Delta_y/(pi d) for
+    N_theta angles, pixel sizes Delta_x, Delta_y and detector spacing d. To match the
+    discrete operator, H is measured from the response of :meth:`~cuqipy_cil.model.CILModel.gram`
+    to a centred point (one forward and back projection): c is fitted in the mid-band
+    (0.1 to 0.4 times the Nyquist frequency) and H(0) is the sum of the response. The
+    preconditioner applies the filter 1/(weight*H + shift) with zero-padded FFTs.
+
+    Parameters
+    ----------
+    model : cuqipy_cil.model.CILModel
+        2D parallel-beam model, e.g. :class:`cuqipy_cil.model.ParallelBeam2DModel`.
+
+    weight : float, default 1
+        Weight of A^T A in the system operator.
+
+    shift : float, default 0
+        Shift (e.g. prior precision) added to the diagonal of the system operator.
+
+    Example
+    -------
+    .. code-block:: python
+
+        import cuqipy_cil
+
+        model = cuqipy_cil.model.ParallelBeam2DModel()
+        M = cuqipy_cil.preconditioner.RampFilterPreconditioner(model, shift=1e-2)
+        x, it = cuqipy_cil.solver.GramCG(model, b, shift=1e-2, preconditioner=M).solve()
+
+    """
+
+    def __init__(self, model, weight=1, shift=0):
+        ag = model.acquisition_geometry
+        ig = model.image_geometry
+        if ag.geom_type != "parallel" or ag.dimension != "2D":
+            raise ValueError("RampFilterPreconditioner requires a 2D parallel-beam model.")
+
+        self._shape = tuple(model.domain_geometry.fun_shape)
+        self._padded_shape = tuple(2*n for n in self._shape)
+
+        dy, dx = ig.voxel_size_y, ig.voxel_size_x
+
+        # Spatial frequencies (cycles per unit length) of the padded grid
+        nu_y = np.fft.fftfreq(self._padded_shape[0], d=dy)[:, np.newaxis]
+        nu_x = np.fft.rfftfreq(self._padded_shape[1], d=dx)[np.newaxis, :]
+        nu = np.sqrt(nu_y**2 + nu_x**2)
+
+        # Symbol of A^T A measured from its response to a centred point
+        point = np.zeros(self._shape)
+        point[self._shape[0]//2, self._shape[1]//2] = 1
+        response = np.asarray(model.gram(point.ravel()), dtype=float).reshape(self._shape)
+        symbol = np.abs(np.fft.rfft2(response, s=self._padded_shape))
+
+        nyquist = 0.5/max(dx, dy)
+        band = (nu > 0.1*nyquist) & (nu < 0.4*nyquist)
+        self._scale = float(np.median(symbol[band]*nu[band]))
+
+        H = np.empty_like(nu)
+        np.divide(self._scale, nu, out=H, where=nu > 0)
+        H[0, 0] = symbol[0, 0]
+        self._filter = 1/(weight*H + shift)
+
+    @property
+    def scale(self):
+        """ The fitted constant c of the symbol c/|nu| of A^T A. """
+        return self._scale
+
+    @property
+    def filter(self):
+        """ The filter applied in the (real) Fourier domain of the zero-padded image. """
+        return self._filter
+
+    def apply(self, r):
+        """ Apply the preconditioner to a vector (or image) r. """
+        r = np.asarray(r)
+        image = r.reshape(self._shape)
+        R = np.fft.rfft2(image, s=self._padded_shape)
+        R *= self._filter
+        out = np.fft.irfft2(R, s=self._padded_shape)[:self._shape[0], :self._shape[1]]
+        return out.reshape(r.shape)
+
+    def __call__(self, r):
+        return self.apply(r)
+
+    def as_linear_operator(self):
+        """ The preconditioner as a scipy LinearOperator, e.g. for the M argument of scipy.sparse.linalg.cg. """
+        n = self._shape[0]*self._shape[1]
+        return scipy.sparse.linalg.LinearOperator((n, n), matvec=self.apply, rmatvec=self.apply, dtype=float)
+
+class SIRTPreconditioner:
+    """ Diagonal (Jacobi) preconditioner built from the row sums of the system matrix.
+
+    For a nonnegative system matrix A the diagonal matrix of the row sums of A^T A,
+
+    .. math::
+
+        D = \\mathrm{diag}(A^T A \\mathbf{1}) = \\mathrm{diag}(A^T (A \\mathbf{1})),
+
+    bounds A^T A from above, and D^{-1} A^T A maps the constant image to itself, as the
+    normalization of SIRT does. The preconditioner applies 1/(weight*D + shift), using the
+    memoized :meth:`cuqipy_cil.model.CILModel.row_sums` and one back projection. Pixels
+    outside the field of view (zero diagonal without shift) are left unchanged.
+
+    The eigenvalues of the preconditioned operator are at most one, so gradient
+    (Landweber/SIRT) iterations ``x += M(A^T (b - A x))`` converge with unit step size
+    without estimating :meth:`cuqipy_cil.model.CILModel.norm`, for all geometries. Inside the
+    field of view the diagonal is nearly constant, so for CG on the normal equations of
+    parallel-beam models :class:`RampFilterPreconditioner` reduces the iterations much more.
+
+    Parameters
+    ----------
+    model : cuqipy_cil.model.CILModel
+        The CT model.
+
+    weight : float, default 1
+        Weight of A^T A in the system operator.
+
+    shift : float, default 0
+        Shift (e.g. prior precision) added to the diagonal of the system operator.
+
+    Example
+    -------
+    .. code-block:: python
+
+        import cuqipy_cil
+
+        model = cuqipy_cil.model.FanBeam2DModel()
+        M = cuqipy_cil.preconditioner.SIRTPreconditioner(model, shift=1e-2)
+        x, it = cuqipy_cil.solver.GramCG(model, b, shift=1e-2, preconditioner=M).solve()
+
+    """
+
+    def __init__(self, model, weight=1, shift=0):
+        diagonal = weight*np.asarray(model.adjoint(model.row_sums()), dtype=float) + shift
+        self._inverse = np.ones_like(diagonal)
+        np.divide(1, diagonal, out=self._inverse, where=diagonal > 0)
+
+    @property
+    def diagonal(self):
+        """ The diagonal of the preconditioner, i.e. of the approximate inverse of the system operator. """
+        return self._inverse
+
+    def apply(self, r):
+        """ Apply the preconditioner to a vector r. """
+        r = np.asarray(r)
+        return (self._inverse*r.ravel()).reshape(r.shape)
+
+    def __call__(self, r):
+        return self.apply(r)
+
+    def as_linear_operator(self):
+        """ The preconditioner as a scipy LinearOperator, e.g. for the M argument of scipy.sparse.linalg.cg. """
+        return scipy.sparse.linalg.aslinearoperator(scipy.sparse.diags(self._inverse))
@@ -0,0 +1,171 @@
+""" Counters and timers of the projection hot path.
+
+:class:`cuqipy_cil.model.CILModel` reports the time spent in its sections (forward and
+adjoint calls, the projector, filling and copying the CIL containers and dtype casts)
+to the active :class:`Profiler`. Profiling is off by default and then costs one
+no-op context manager per section.
+
+Sections
+--------
+CILModel.forward, CILModel.adjoint
+    Complete forward/adjoint calls including the cuqi geometry conversions.
+
+projector.direct, projector.adjoint
+    The CIL projection operator.
+
+container.fill, container.copy
+    Copies into the input container and out of the output container (same dtype).
+
+cast
+    Copies into or out of the containers that convert the dtype.
+
+The time of a call not spent in the nested sections is spent in cuqi bookkeeping.
+
+Example
+-------
+.. code-block:: python
+
+    import cuqipy_cil
+
+    with cuqipy_cil.profile(trace=True) as p:
+        TP.sample_posterior(100)
+
+    print(p.report())
+    p.to_json("profile.json")
+    p.to_chrome_trace("trace.json") # Open in chrome://tracing or https://ui.perfetto.dev
+
+"""
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager, nullcontext
+
+# Profiler receiving the measurements (None if profiling is disabled)
+_active = None
+
+_NULL_TIMER = nullcontext()
+
+class Profiler:
+    """ Collects call counts, times and bytes moved per section.
+
+    Created by :func:`profile`.
+
+    Parameters
+    ----------
+    trace : bool, default False
+        If True every call is also stored as an event for :meth:`to_chrome_trace`.
+    """
+
+    def __init__(self, trace=False):
+        self._trace = trace
+        self._sections = {}
+        self._events = []
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+
+    def timer(self, name, nbytes=0):
+        """ Context manager timing one call of section name moving nbytes bytes. """
+        return _Timer(self, name, nbytes)
+
+    def _record(self, name, start, stop, nbytes):
+        with self._lock:
+            section = self._sections.get(name)
+            if section is None:
+                section = self._sections[name] = {"calls": 0, "total_time": 0.0, "max_time": 0.0, "bytes": 0}
+            duration = stop - start
+            section["calls"] += 1
+            section["total_time"] += duration
+            section["max_time"] = max(section["max_time"], duration)
+            section["bytes"] += nbytes
+            if self._trace:
+                self._events.append((name, start, duration, threading.get_ident(), nbytes))
+
+    def report(self):
+        """ Measurements as a dict keyed by section.
+
+        Each section holds the number of calls, the total, mean and maximum time per call
+        in seconds, and the number of bytes moved.
+        """
+        with self._lock:
+            return {
+                name: dict(section, mean_time=section["total_time"]/section["calls"])
+                for name, section in sorted(self._sections.items())
+            }
+
+    def reset(self):
+        """ Discard all measurements. """
+        with self._lock:
+            self._sections.clear()
+            self._events.clear()
+            self._start = time.perf_counter()
+
+    def to_json(self, path=None):
+        """ Report as a JSON string, written to path if given. """
+        text = json.dumps(self.report(), indent=2)
+        if path is not None:
+            with open(path, "w") as f:
+                f.write(text)
+        return text
+
+    def to_chrome_trace(self, path):
+        """ Write the events in the Chrome trace format (requires trace=True). """
+        if not self._trace:
+            raise ValueError("Chrome traces require a profiler created with trace=True.")
+        pid = os.getpid()
+        with self._lock:
+            events = [
+                {
+                    "name": name, "cat": name.split(".")[0], "ph": "X", "pid": pid, "tid": tid,
+                    "ts": (start - self._start)*1e6, "dur": duration*1e6, "args": {"bytes": nbytes}
+                }
+                for name, start, duration, tid, nbytes in self._events
+            ]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+class _Timer:
+    """ Times one call and records it in the profiler. """
+    __slots__ = ("_profiler", "_name", "_nbytes", "_start")
+
+    def __init__(self, profiler, name, nbytes):
+        self._profiler = profiler
+        self._name = name
+        self._nbytes = nbytes
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._profiler._record(self._name, self._start, time.perf_counter(), self._nbytes)
+
+def timer(name, nbytes=0):
+    """ Time section name in the active profiler (a no-op if profiling is disabled). """
+    if _active is None:
+        return _NULL_TIMER
+    return _active.timer(name, nbytes)
+
+@contextmanager
+def profile(trace=False):
+    """ Collect counters and timers of the models while the context is active.
+
+    Profilers can be nested, in which case the innermost one receives the measurements.
+
+    Parameters
+    ----------
+    trace : bool, default False
+        If True every call is stored as an event, see :meth:`Profiler.to_chrome_trace`.
+
+    Yields
+    ------
+    Profiler
+    """
+    global _active
+    profiler = Profiler(trace=trace)
+    previous = _active
+    _active = profiler
+    try:
+        yield profiler
+    finally:
+        _active = previous
@@ -0,0 +1,306 @@
+""" Pure-NumPy projection operator for 2D CT geometries (the "numpy" backend).
+
+The operator implements Joseph's ray-driven method: every ray is stepped through the
+image one row or column at a time (whichever is closer to perpendicular to the ray) and
+the image is linearly interpolated between the two nearest pixels of each step. The
+adjoint applies the transposed interpolation weights, so it is matched to the forward
+projection up to rounding.
+
+Both directions are vectorized over all rays of all angles, looping only over the image
+rows or columns. If numba is installed the loops are compiled and run in parallel.
+
+The backend needs neither astra nor tigre and supports the 2D parallel-beam and
+(shifted) fan-beam geometries of :mod:`cuqipy_cil.model`. Select it with
+
+.. code-block:: python
+
+    cuqipy_cil.config.PROJECTION_BACKEND = "numpy"
+
+or by setting the environment variable ``CUQIPY_CIL_BACKEND=numpy``. It is used
+automatically if neither astra nor tigre is installed.
+"""
+import numpy as np
+
+class ProjectionOperator:
+    """ Joseph forward projection and its adjoint for a 2D CIL geometry.
+
+    Follows the interface of the CIL projection operators (``direct`` and ``adjoint``
+    acting on CIL data containers).
+
+    Parameters
+    ----------
+    image_geometry : CIL ImageGeometry
+        2D image geometry.
+
+    acquisition_geometry : CIL AcquisitionGeometry
+        2D parallel-beam or fan-beam acquisition geometry.
+
+    use_numba : bool, optional
+        Use compiled kernels. Defaults to True if numba is installed.
+    """
+
+    def __init__(self, image_geometry, acquisition_geometry, use_numba=None):
+        if acquisition_geometry.dimension != "2D":
+            raise NotImplementedError("The numpy projection backend only supports 2D geometries.")
+
+        self._image_geometry = image_geometry
+        self._acquisition_geometry = acquisition_geometry
+
+        if use_numba is None:
+            use_numba = _load_numba_kernels() is not None
+        elif use_numba and _load_numba_kernels() is None:
+            raise ImportError("Unable to load numba package needed for compiled kernels! Install it with 'pip install numba'.")
+        self._use_numba = use_numba
+
+        # Image layout: rows along y, columns along x
+        labels = list(image_geometry.dimension_labels)
+        self._image_transposed = labels.index("horizontal_x") < labels.index("horizontal_y")
+        self._image_shape = (image_geometry.voxel_num_y, image_geometry.voxel_num_x)
+
+        points, directions = _ray_geometry(acquisition_geometry)
+        num_angles, num_pixels = points.shape[:2]
+
+        # Sinogram layout: flat index of each ray
+        labels = list(acquisition_geometry.dimension_labels)
+        ray_index = np.arange(num_angles*num_pixels).reshape(num_angles, num_pixels)
+        if labels.index("angle") > labels.index("horizontal"):
+            ray_index = ray_index.reshape(num_pixels, num_angles).T
+        self._num_rays = num_angles*num_pixels
+
+        self._groups = _joseph_groups(points.reshape(-1, 2), directions.reshape(-1, 2), ray_index.ravel(), image_geometry)
+
+    @property
+    def use_numba(self):
+        """ True if the compiled kernels are used. """
+        return self._use_numba
+
+    def domain_geometry(self):
+        """ The CIL image geometry. """
+        return self._image_geometry
+
+    def range_geometry(self):
+        """ The CIL acquisition geometry. """
+        return self._acquisition_geometry
+
+    def direct(self, x, out=None):
+        """ Forward projection of ImageData x (into AcquisitionData out). """
+        image = x.as_array().reshape(self._image_shape[::-1] if self._image_transposed else self._image_shape)
+        if self._image_transposed:
+            image = image.T
+        sinogram = self.project(image)
+
+        if out is None:
+            out = self._acquisition_geometry.allocate(None)
+        out.array[...] = sinogram.reshape(out.shape)
+        return out
+
+    def adjoint(self, y, out=None):
+        """ Back projection of AcquisitionData y (into ImageData out). """
+        image = self.backproject(y.as_array().ravel())
+        if self._image_transposed:
+            image = image.T
+
+        if out is None:
+            out = self._image_geometry.allocate(None)
+        out.array[...] = image.reshape(out.shape)
+        return out
+
+    def project(self, image):
+        """ Forward projection of image (array of shape (ny, nx)). Returns the flat sinogram. """
+        dtype = np.result_type(image.dtype, np.float32)
+        sinogram = np.zeros(self._num_rays, dtype=dtype)
+        forward, _ = self._kernels()
+        for group in self._groups:
+            lines = group.padded_lines(image, dtype)
+            sinogram[group.rays] = forward(lines, group.start, group.step)*group.length
+        return sinogram
+
+    def backproject(self, sinogram):
+        """ Back projection of the flat sinogram. Returns an image of shape (ny, nx). """
+        dtype = np.result_type(sinogram.dtype, np.float32)
+        image = np.zeros(self._image_shape, dtype=dtype)
+        _, adjoint = self._kernels()
+        for group in self._groups:
+            lines = np.zeros(group.lines_shape, dtype=dtype)
+            adjoint((sinogram[group.rays]*group.length).astype(dtype, copy=False), group.start, group.step, lines)
+            image += group.unpad_lines(lines)
+        return image
+
+    def _kernels(self):
+        if self._use_numba:
+            return _load_numba_kernels()
+        return _forward_numpy, _adjoint_numpy
+
+class _RayGroup:
+    """ Rays stepped along the same image axis.
+
+    Each ray visits every line (column for axis "x", row for axis "y") of the image and
+    is interpolated at the fractional sample index start + i*step along line i. The
+    lines are zero-padded by one sample before and two after, so samples outside the
+    image contribute zero.
+    """
+
+    def __init__(self, axis, rays, start, step, length, image_shape):
+        self.axis = axis
+        self.rays = rays
+        self.start = start
+        self.step = step
+        self.length = length
+        ny, nx = image_shape
+        self.lines_shape = (nx, ny + 3) if axis == "x" else (ny, nx + 3)
+
+    def padded_lines(self, image, dtype):
+        """ Zero-padded lines of image as a contiguous array. """
+        lines = np.zeros(self.lines_shape, dtype=dtype)
+        lines[:, 1:-2] = image.T if self.axis == "x" else image
+        return lines
+
+    def unpad_lines(self, lines):
+        """ Image from (padded) lines. """
+        lines = lines[:, 1:-2]
+        return lines.T if self.axis == "x" else lines
+
+def _ray_geometry(acquisition_geometry):
+    """ Points on and unit directions of all rays in the frame of the image.
+
+    The sample rotates anticlockwise by the projection angle about the rotation axis,
+    which is the origin of the image frame. Equivalently, the source and detector
+    rotate clockwise about the image. Returns arrays of shape (num_angles, num_pixels, 2).
+    """
+    config = acquisition_geometry.config
+    system = config.system
+    panel = config.panel
+    angles = config.angles
+
+    theta = np.asarray(angles.angle_data, dtype=float) + angles.initial_angle
+    if angles.angle_unit == "degree":
+        theta = np.deg2rad(theta)
+
+    c, s = np.cos(-theta), np.sin(-theta)
+    rotation = np.stack([np.stack([c, -s], axis=-1), np.stack([s, c], axis=-1)], axis=-2) # (num_angles, 2, 2)
+
+    def rotate(v):
+        return np.einsum("aij,...j->a...i", rotation, v)
+
+    axis = np.asarray(system.rotation_axis.position, dtype=float)
+
+    # Detector pixel centres relative to the detector position
+    num_pixels = int(np.ravel(panel.num_pixels)[0])
+    pixel_size = float(np.ravel(panel.pixel_size)[0])
+    offsets = (np.arange(num_pixels) - (num_pixels - 1)/2)*pixel_size
+    if "right" in str(panel.origin):
+        offsets = -offsets
+    pixels = np.asarray(system.detector.position, dtype=float) - axis + offsets[:, np.newaxis]*np.asarray(system.detector.direction_x, dtype=float)
+    pixels = rotate(pixels) # (num_angles, num_pixels, 2)
+
+    if acquisition_geometry.geom_type == "parallel":
+        direction = rotate(np.asarray(system.ray.direction, dtype=float))[:, np.newaxis, :]
+        directions = np.broadcast_to(direction, pixels.shape)
+    else:
+        source = rotate(np.asarray(system.source.position, dtype=float) - axis)[:, np.newaxis, :]
+        directions = pixels - source
+    directions = directions/np.linalg.norm(directions, axis=-1, keepdims=True)
+    return pixels, directions
+
+def _joseph_groups(points, directions, rays, image_geometry):
+    """ Split rays into groups stepped along x (columns) and y (rows) and compute their sample indices. """
+    nx, ny = image_geometry.voxel_num_x, image_geometry.voxel_num_y
+    vx, vy = image_geometry.voxel_size_x, image_geometry.voxel_size_y
+    x0 = image_geometry.center_x - (nx - 1)/2*vx # Centre of first column
+    y0 = image_geometry.center_y + (ny - 1)/2*vy # Centre of first row
+
+    # Rows are ordered from the largest to the smallest y, as in the astra backend
+    sy = -vy
+
+    px, py = points[:, 0], points[:, 1]
+    dx, dy = directions[:, 0], directions[:, 1]
+
+    # Step along x if the ray crosses at most one row per column
+    along_x = np.abs(dy)*vx <= np.abs(dx)*vy
+    groups = []
+    for axis, mask in (("x", along_x), ("y", ~along_x)):
+        if not np.any(mask):
+            continue
+        if axis == "x":
+            slope = dy[mask]/dx[mask]
+            start = (py[mask] + (x0 - px[mask])*slope - y0)/sy
+            step = slope*vx/sy
+            length = vx/np.abs(dx[mask])
+        else:
+            slope = dx[mask]/dy[mask]
+            start = (px[mask] + (y0 - py[mask])*slope - x0)/vx
+            step = slope*sy/vx
+            length = vy/np.abs(dy[mask])
+        groups.append(_RayGroup(axis, rays[mask], start, step, length, (ny, nx)))
+    return groups
+
+def _forward_numpy(lines, start, step):
+    """ Sum over lines of the interpolated samples of each ray. """
+    n = lines.shape[1] - 3
+    acc = np.zeros(len(start), dtype=lines.dtype)
+    for i in range(lines.shape[0]):
+        r = np.clip(start + i*step, -1, n)
+        f = np.floor(r)
+        w = (r - f).astype(lines.dtype)
+        index = f.astype(np.intp) + 1
+        line = lines[i]
+        low = line[index]
+        acc += low + w*(line[index + 1] - low)
+    return acc
+
+def _adjoint_numpy(values, start, step, lines):
+    """ Add values of each ray to the lines with the interpolation weights of :func:`_forward_numpy`. """
+    n = lines.shape[1] - 3
+    size = lines.shape[1]
+    for i in range(lines.shape[0]):
+        r = np.clip(start + i*step, -1, n)
+        f = np.floor(r)
+        w = r - f
+        index = f.astype(np.intp) + 1
+        lines[i] += np.bincount(index, weights=values*(1 - w), minlength=size)
+        lines[i] += np.bincount(index + 1, weights=values*w, minlength=size)
+
+# Compiled kernels (None if numba is not installed), loaded on first use
+_numba_kernels = None
+_numba_loaded = False
+
+def _load_numba_kernels():
+    """ Compile the numba kernels on first use. Returns (forward, adjoint) or None if numba is not installed. """
+    global _numba_kernels, _numba_loaded
+    if _numba_loaded:
+        return _numba_kernels
+    _numba_loaded = True
+    try:
+        import numba
+    except ImportError:
+        return None
+
+    @numba.njit(parallel=True, cache=True)
+    def forward(lines, start, step):
+        n = lines.shape[1] - 3
+        acc = np.zeros(start.shape[0], dtype=lines.dtype)
+        for j in numba.prange(start.shape[0]): # Rays are independent
+            total = 0.0
+            for i in range(lines.shape[0]):
+                r = min(max(start[j] + i*step[j], -1.0), n)
+                f = np.floor(r)
+                w = r - f
+                index = int(f) + 1
+                total += lines[i, index] + w*(lines[i, index + 1] - lines[i, index])
+            acc[j] = total
+        return acc
+
+    @numba.njit(parallel=True, cache=True)
+    def adjoint(values, start, step, lines):
+        n = lines.shape[1] - 3
+        for i in numba.prange(lines.shape[0]): # Each line is only written by its own iteration
+            for j in range(start.shape[0]):
+                r = min(max(start[j] + i*step[j], -1.0), n)
+                f = np.floor(r)
+                w = r - f
+                index = int(f) + 1
+                lines[i, index] += values[j]*(1 - w)
+                lines[i, index + 1] += values[j]*w
+
+    _numba_kernels = (forward, adjoint)
+    return _numba_kernels
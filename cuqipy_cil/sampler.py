@@ -0,0 +1,84 @@
+import numpy as np
+import scipy.sparse
+import cuqi
+import cuqipy_cil
+from cuqipy_cil.solver import GramCG, _scalar_sqrtprec
+
+class LinearRTO(cuqi.sampler.LinearRTO):
+    """ Linear RTO (Randomize-Then-Optimize) sampler for CIL models.
+
+    Same as :class:`cuqi.sampler.LinearRTO`, but if the model is a
+    :class:`cuqipy_cil.model.CILModel` and the likelihood precision is a scalar times
+    the identity, the perturbed least-squares problems are solved on the normal equations
+    with :class:`cuqipy_cil.solver.GramCG`. Each iteration then uses one fused
+    :meth:`~cuqipy_cil.model.CILModel.gram` call and the solver can be preconditioned.
+    Each solve is warm-started from the previous sample by default. Otherwise falls back
+    to the CGLS solver of :class:`cuqi.sampler.LinearRTO`.
+
+    Parameters
+    ------------
+    target : `cuqi.distribution.Posterior`
+        The posterior distribution.
+
+    preconditioner : ndarray or callable, optional
+        Preconditioner for the normal equations. See :class:`cuqipy_cil.solver.GramCG`.
+
+    See :class:`cuqi.sampler.LinearRTO` for the remaining parameters.
+
+    """
+    def __init__(self, target=None, initial_point=None, maxit=10, tol=1e-6, inner_initial_point="previous_sample", preconditioner=None, **kwargs):
+        self.preconditioner = preconditioner
+        super().__init__(target=target, initial_point=initial_point, maxit=maxit, tol=tol, inner_initial_point=inner_initial_point, **kwargs)
+
+    def _precompute(self):
+        super()._precompute()
+        self._normal_terms = self._setup_normal_equations()
+
+    def _setup_normal_equations(self):
+        """ Return (model, s, L2, P) for the fused normal-equation solve, or None if not applicable. """
+        if len(self.likelihoods) != 1:
+            return None
+        return _gaussian_normal_equations(self.model, self.likelihood, self.prior)
+
+    def _solve(self, y, x0):
+        """ Solve the (perturbed) least-squares problem for stacked right-hand side y. """
+        if self._normal_terms is None:
+            sim = cuqi.solver.CGLS(self.M, y, x0, self.maxit, self.tol)
+            return sim.solve()[0]
+
+        model, s, L2, P = self._normal_terms
+        m = model.range_dim
+        c = L2*y[m:] if np.isscalar(L2) else L2.T @ y[m:]
+        sim = GramCG(model, y[:m]/s, x0, self.maxit, self.tol, weight=s**2, regularization=P, c=c, preconditioner=self.preconditioner)
+        return sim.solve()[0]
+
+    def _compute_map(self):
+        self._map = self._solve(self.b_tild, self.current_point)
+
+    def step(self):
+        y = self.b_tild + np.random.randn(len(self.b_tild))
+        self.current_point = self._solve(y, self.inner_initial_point)
+        acc = 1
+        return acc
+
+def _gaussian_normal_equations(model, likelihood, prior):
+    """ Terms of the normal equations (s^2 A^T A + L2^T L2) x = s A^T y1 + L2^T y2 of a Gaussian posterior.
+
+    Returns (model, s, L2, P) with P = L2^T L2 if the model is a CIL model and the likelihood
+    square-root precision is s times the identity, otherwise None.
+    """
+    if not isinstance(model, cuqipy_cil.model.CILModel):
+        return None
+    if not hasattr(likelihood.distribution, "sqrtprec") or not hasattr(prior, "sqrtprec"):
+        return None
+    s = _scalar_sqrtprec(likelihood.distribution.sqrtprec)
+    if s is None:
+        return None
+    L2 = prior.sqrtprec
+    if np.isscalar(L2):
+        P = L2**2
+    elif scipy.sparse.issparse(L2):
+        P = (L2.T @ L2).tocsr()
+    else:
+        P = L2.T @ L2
+    return model, s, L2, P
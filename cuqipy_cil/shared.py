@@ -0,0 +1,107 @@
+""" NumPy arrays in shared memory for process-parallel computations.
+
+A :class:`SharedArray` pickles by reference (the name of its shared memory block), so
+passing it to a worker process costs a few bytes regardless of the array size, and the
+worker reads and writes the same memory as the parent.
+
+Example
+-------
+.. code-block:: python
+
+    from concurrent.futures import ProcessPoolExecutor
+    import cuqipy_cil
+
+    def run_chain(samples, i):
+        samples.array[:, :, i] = ... # Write chain i directly into the shared buffer
+
+    with cuqipy_cil.shared.SharedArray.empty((n, Ns, 32)) as samples:
+        with ProcessPoolExecutor() as executor:
+            list(executor.map(run_chain, [samples]*32, range(32)))
+        result = samples.array.copy()
+
+"""
+from multiprocessing import shared_memory
+import numpy as np
+
+class SharedArray:
+    """ NumPy array stored in a :class:`multiprocessing.shared_memory.SharedMemory` block.
+
+    The process creating the array owns the block and unlinks it in :meth:`close`
+    (or when leaving the context manager). Copies unpickled in other processes attach
+    to the same block and only close it.
+
+    Use :meth:`empty` or :meth:`from_array` to create a shared array.
+
+    Attributes
+    ----------
+    array : ndarray
+        View of the shared memory.
+    """
+
+    def __init__(self, shm, shape, dtype, owner):
+        self._shm = shm
+        self._owner = owner
+        self.array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+    @classmethod
+    def empty(cls, shape, dtype=float):
+        """ Create an uninitialized shared array. """
+        dtype = np.dtype(dtype)
+        shape = (int(shape),) if np.isscalar(shape) else tuple(int(n) for n in shape)
+        nbytes = max(1, int(np.prod(shape))*dtype.itemsize)
+        return cls(shared_memory.SharedMemory(create=True, size=nbytes), shape, dtype, owner=True)
+
+    @classmethod
+    def from_array(cls, array):
+        """ Create a shared array holding a copy of array. """
+        array = np.asarray(array)
+        shared = cls.empty(array.shape, array.dtype)
+        np.copyto(shared.array, array)
+        return shared
+
+    @classmethod
+    def _attach(cls, name, shape, dtype):
+        """ Attach to an existing shared memory block. """
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False) # Python >= 3.13
+        except TypeError:
+            # Child processes share the resource tracker of the parent, which owns the block
+            shm = shared_memory.SharedMemory(name=name)
+        return cls(shm, shape, dtype, owner=False)
+
+    @property
+    def name(self):
+        """ Name of the shared memory block. """
+        return self._shm.name
+
+    @property
+    def owner(self):
+        """ True if this process created (and unlinks) the shared memory block. """
+        return self._owner
+
+    def __reduce__(self):
+        return (SharedArray._attach, (self.name, self.array.shape, self.array.dtype.str))
+
+    def __array__(self, dtype=None, copy=None):
+        if dtype is None:
+            return self.array
+        return self.array.astype(dtype)
+
+    def close(self):
+        """ Close the shared memory block, unlinking it if this process is the owner.
+
+        Views of :attr:`array` must not be used after closing.
+        """
+        if self._shm is None:
+            return
+        self.array = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+        self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,169 @@
+import numpy as np
+import scipy.sparse
+import cuqipy_cil
+
+class GramCG(object):
+    """ Preconditioned conjugate gradient method for the normal equations of a linear model.
+
+    Solves
+
+    .. math::
+
+        (w A^T A + s I + R) x = w A^T b + c
+
+    where A is the forward operator of the model, w a scalar weight, s a shift and R a
+    symmetric positive semi-definite regularization operator. Products with A^T A use
+    :meth:`cuqipy_cil.model.CILModel.gram` if available, which keeps the intermediate
+    sinogram inside the CIL containers.
+
+    Parameters
+    ----------
+    model : cuqipy_cil.model.CILModel or cuqi.model.LinearModel
+        The linear model.
+
+    b : ndarray, optional
+        Data vector of size range_dim.
+
+    x0 : ndarray, optional
+        Initial guess (warm start). Defaults to zeros.
+
+    maxit : int
+        The maximum number of iterations.
+
+    tol : float
+        Relative residual tolerance for convergence.
+
+    weight : float, default 1
+        Weight w of the data term.
+
+    shift : float, default 0
+        Shift s added to the diagonal.
+
+    regularization : scalar, matrix or callable, optional
+        Regularization operator R. A callable is applied as R(x).
+
+    c : ndarray, optional
+        Additional right-hand side term of size domain_dim.
+
+    preconditioner : ndarray or callable, optional
+        Approximate inverse of the system operator. An ndarray is interpreted as the
+        diagonal of the approximate inverse and a callable is applied as M(r).
+
+    dtype : numpy dtype, optional
+        Floating point type of the iterates. Defaults to :func:`cuqipy_cil.config.get_dtype`.
+
+    Example
+    -------
+    .. code-block:: python
+
+        import cuqipy_cil
+
+        model = cuqipy_cil.model.ParallelBeam2DModel()
+        x, it = cuqipy_cil.solver.GramCG(model, b, maxit=50, shift=1e-2).solve()
+
+    """
+    def __init__(self, model, b=None, x0=None, maxit=100, tol=1e-6, weight=1, shift=0, regularization=None, c=None, preconditioner=None, dtype=None):
+        self.model = model
+        self.b = b
+        self.x0 = x0
+        self.maxit = int(maxit)
+        self.tol = tol
+        self.weight = weight
+        self.shift = shift
+        self.regularization = _as_operator(regularization)
+        self.c = c
+        self.preconditioner = _as_preconditioner(preconditioner)
+        self.dtype = cuqipy_cil.config.get_dtype() if dtype is None else np.dtype(dtype)
+
+    def _apply_system(self, x):
+        """ Apply the system operator (w A^T A + s I + R) to x. """
+        if hasattr(self.model, "gram"):
+            out = self.weight*np.asarray(self.model.gram(x), dtype=self.dtype)
+        else:
+            out = self.weight*np.asarray(self.model.adjoint(self.model.forward(x)), dtype=self.dtype)
+        if self.shift != 0:
+            out += self.shift*x
+        if self.regularization is not None:
+            out += self.regularization(x)
+        return out
+
+    def _rhs(self):
+        """ Right-hand side w A^T b + c. """
+        rhs = np.zeros(self.model.domain_dim, dtype=self.dtype)
+        if self.b is not None:
+            rhs += self.weight*np.asarray(self.model.adjoint(np.asarray(self.b)), dtype=self.dtype)
+        if self.c is not None:
+            rhs += np.asarray(self.c, dtype=self.dtype)
+        return rhs
+
+    def _precondition(self, r):
+        """ Apply the preconditioner (if any) to the residual r. """
+        if self.preconditioner is None:
+            return r
+        return np.asarray(self.preconditioner(r), dtype=self.dtype)
+
+    def solve(self):
+        """ Run the solver and return the solution and the number of iterations. """
+        rhs = self._rhs()
+        x = np.zeros(self.model.domain_dim, dtype=self.dtype) if self.x0 is None else np.array(self.x0, dtype=self.dtype).ravel()
+
+        norm_rhs = np.linalg.norm(rhs)
+        if norm_rhs == 0:
+            return np.zeros_like(x), 0
+
+        r = rhs - self._apply_system(x)
+        z = self._precondition(r)
+        p = z.copy()
+        rz = r @ z
+
+        k = 0
+        while k < self.maxit and np.linalg.norm(r) > self.tol*norm_rhs:
+            k += 1
+            q = self._apply_system(p)
+            alpha = rz/(p @ q)
+            x += alpha*p
+            r -= alpha*q
+            z = self._precondition(r)
+            rz_new = r @ z
+            p = z + (rz_new/rz)*p
+            rz = rz_new
+        return x, k
+
+def _as_operator(A):
+    """ Convert scalar, matrix or callable to a callable x -> A x (or None). """
+    if A is None or callable(A):
+        return A
+    if np.isscalar(A):
+        return lambda x: A*x
+    return lambda x: np.asarray(A @ x).ravel()
+
+def _as_preconditioner(M):
+    """ Convert diagonal (ndarray) or callable preconditioner to a callable (or None). """
+    if M is None or callable(M):
+        return M
+    if hasattr(M, "apply"):
+        return M.apply
+    diagonal = np.asarray(M, dtype=float).ravel()
+    return lambda r: diagonal*r
+
+def _scalar_sqrtprec(sqrtprec):
+    """ Return s if sqrtprec represents s*I, otherwise None. """
+    if np.isscalar(sqrtprec):
+        return float(sqrtprec)
+    if not scipy.sparse.issparse(sqrtprec):
+        sqrtprec = np.asarray(sqrtprec)
+        if sqrtprec.ndim == 0:
+            return float(sqrtprec)
+    if sqrtprec.ndim == 1:
+        diagonal = sqrtprec
+    else:
+        # Diagonal matrix with all nonzeros on the diagonal (cuqi uses dense matrices only in small dimensions)
+        if sqrtprec.shape[0] != sqrtprec.shape[1]:
+            return None
+        diagonal = sqrtprec.diagonal()
+        nnz = sqrtprec.count_nonzero() if scipy.sparse.issparse(sqrtprec) else np.count_nonzero(sqrtprec)
+        if nnz != np.count_nonzero(diagonal):
+            return None
+    if np.all(diagonal == diagonal[0]) and diagonal[0] != 0:
+        return float(diagonal[0])
+    return None
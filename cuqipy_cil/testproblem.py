@@ -1,6 +1,10 @@
+import os
 import cuqi
 import numpy as np
 import cuqipy_cil
+from cuqipy_cil.solver import GramCG
+from cuqipy_cil.sampler import _gaussian_normal_equations
+from cuqipy_cil.shared import SharedArray
 
 #=============================================================================
 class ParallelBeam2D(cuqi.problem.BayesianProblem):
@@ -35,9 +39,16 @@ class ParallelBeam2D(cuqi.problem.BayesianProblem):
         The type of noise
         "Gaussian" - Gaussian white noise¨
         "scaledGaussian" - Scaled (by data) Gaussian noise
+        "Poisson" - Poisson distributed photon counts of transmission CT (data are counts)
+        "logPoisson" - Log-transformed Poisson photon counts (data are log(photon_count/counts))
+        See :class:`cuqipy_cil.distribution.TransmissionPoisson` for the Poisson noise types.
 
     noise_std : scalar
-        Standard deviation of the noise
+        Standard deviation of the noise (Gaussian noise types)
+
+    photon_count : scalar, default 1e4
+        Photon count of the unattenuated beam (Poisson noise types).
+        Lower photon counts give noisier data.
 
     prior : cuqi.distribution.Distribution, optional
         Distribution of the prior.
@@ -46,6 +57,14 @@ class ParallelBeam2D(cuqi.problem.BayesianProblem):
     data : cuqi.array.CUQIarray, optional
         Data to be stored in testproblem.
 
+    seed : int, optional
+        Seed of the noise added to the generated data.
+
+    cache_dir : str, optional
+        Directory in which the exact solution, exact data and (if seed is given) the noisy data
+        are stored as .npy files keyed by all parameters and the seed. Later constructions with the
+        same parameters load them memory-mapped instead of regenerating them.
+
     Attributes
     ----------
     data : CUQIarray
@@ -57,7 +76,7 @@ class ParallelBeam2D(cuqi.problem.BayesianProblem):
     prior : cuqi.distribution.Distribution, Default None
         Distribution of the prior.
 
-    likelihood : cuqi.likelihood.Likelihood
+    likelihood : cuqipy_cil.likelihood.FusedLikelihood
         Likelihood function. 
         (automatically computed from noise distribution)
 
@@ -75,8 +94,12 @@ class ParallelBeam2D(cuqi.problem.BayesianProblem):
 
     sample_posterior(Ns)
         Sample Ns samples of the posterior.
+        Samplers are started from the FBP reconstruction of the data (see :meth:`cuqipy_cil.model.CILModel.fbp`).
         NB: Requires prior to be defined.
 
+    spec()
+        Picklable lightweight description of the test problem for worker processes.
+
 
     """
     def __init__(self,
@@ -88,8 +111,11 @@ class ParallelBeam2D(cuqi.problem.BayesianProblem):
         phantom = "shepp-logan",
         noise_type="gaussian",
         noise_std=0.05,
+        photon_count=1e4,
         prior=None,
-        data=None
+        data=None,
+        seed=None,
+        cache_dir=None
         ):
         
         # CT model with default values
@@ -101,8 +127,26 @@ class ParallelBeam2D(cuqi.problem.BayesianProblem):
             domain=domain,
         )
                       
+        # Arrays are stored in the precision set in cuqipy_cil.config
+        dtype = cuqipy_cil.config.get_dtype()
+
+        # Previously generated arrays (only used if data is generated)
+        cache_path = None
+        cached = {}
+        if cache_dir is not None and data is None:
+            key = cuqipy_cil.cache.geometry_key(
+                model.acquisition_geometry,
+                model.image_geometry,
+                *cuqipy_cil.model._select_backend(model.acquisition_geometry, model.image_geometry),
+                phantom, noise_type.lower(), noise_std, photon_count, seed, dtype.str
+            )
+            cache_path = os.path.join(cache_dir, f"{type(self).__name__}_{key}")
+            cached = cuqipy_cil.cache._load_cached_arrays(cache_path)
+
         # Get exact phantom
-        if isinstance(phantom, np.ndarray):
+        if "exact_solution" in cached:
+            x_exact = cached["exact_solution"]
+        elif isinstance(phantom, np.ndarray):
             if phantom.shape != model.domain_geometry.fun_shape:
                 raise ValueError(f"Phantom shape does not match model domain geometry image shape {model.domain_geometry.fun_shape}.")
             x_exact = phantom
@@ -116,31 +160,52 @@ class ParallelBeam2D(cuqi.problem.BayesianProblem):
         else:
             raise ValueError("Phantom must be a string or ndarray. See string options in cuqi.data.")
         
-        x_exact = cuqi.array.CUQIarray(x_exact, is_par=False, geometry=model.domain_geometry)
+        x_exact = cuqi.array.CUQIarray(np.asarray(x_exact, dtype=dtype), is_par=False, geometry=model.domain_geometry)
 
         # Define prior
         if prior is None:
-            prior = cuqi.distribution.Gaussian(np.zeros(model.domain_dim), cov=1, geometry = model.domain_geometry, name="x")
+            prior = cuqi.distribution.Gaussian(np.zeros(model.domain_dim, dtype=dtype), cov=1, geometry = model.domain_geometry, name="x")
 
-        # Define and add noise #TODO: Add Poisson and logpoisson
+        # Define and add noise
         if noise_type.lower() == "gaussian":
             data_dist = cuqi.distribution.Gaussian(model(prior), cov=noise_std**2, geometry = model.range_geometry, name="y")
         elif noise_type.lower() == "scaledgaussian":
             if data is None:
                 raise ValueError("Scaled Gaussian noise requires data to be defined.")
             data_dist = cuqi.distribution.Gaussian(model(prior), cov=data*(noise_std**2), geometry = model.range_geometry, name="y")
+        elif noise_type.lower() in ("poisson", "logpoisson"):
+            data_dist = cuqipy_cil.distribution.TransmissionPoisson(model(prior), photon_count=photon_count, log_data=noise_type.lower() == "logpoisson", geometry = model.range_geometry, name="y")
         else:
             raise NotImplementedError("This noise type is not implemented")
         
         # Generate data
         if data is None:
-            b_exact = model.forward(x_exact)
-            data = data_dist(x_exact).sample()
+            b_exact = cached.get("exact_data")
+            if b_exact is None:
+                b_exact = np.asarray(model.forward(x_exact), dtype=dtype)
+                if isinstance(data_dist, cuqipy_cil.distribution.TransmissionPoisson) and not data_dist.log_data:
+                    b_exact = (photon_count*np.exp(-b_exact)).astype(dtype) # Expected photon counts
+            b_exact = cuqi.array.CUQIarray(b_exact, geometry=model.range_geometry)
+            if "data" in cached:
+                data = cuqi.array.CUQIarray(cached["data"], geometry=model.range_geometry)
+            elif seed is not None:
+                data = data_dist(x_exact).sample(rng=np.random.RandomState(seed))
+            else:
+                data = data_dist(x_exact).sample()
         else:
             b_exact = None # No exact data if data is provided
+        if np.asarray(data).dtype != dtype:
+            data = cuqi.array.CUQIarray(np.asarray(data, dtype=dtype), geometry=model.range_geometry)
 
-        # Make likelihood
-        likelihood = data_dist.to_likelihood(data)
+        # Store generated arrays for later constructions. Noisy data is only stored if seeded.
+        if cache_path is not None:
+            arrays = {"exact_solution": x_exact, "exact_data": b_exact}
+            if seed is not None:
+                arrays["data"] = data
+            cuqipy_cil.cache._save_cached_arrays(cache_path, {name: value for name, value in arrays.items() if name not in cached})
+
+        # Make likelihood (sharing the forward projection between log density and gradient)
+        likelihood = cuqipy_cil.likelihood.FusedLikelihood(data_dist, data)
 
         # Initialize CT as BayesianProblem problem
         super().__init__(likelihood, prior)
@@ -148,4 +213,196 @@ class ParallelBeam2D(cuqi.problem.BayesianProblem):
         # Store exact values
         self.exactSolution = x_exact
         self.exactData = b_exact
-        self.infoString = "Noise type: Additive {} with std: {}".format(noise_type.capitalize(), noise_std)
+        if isinstance(data_dist, cuqipy_cil.distribution.TransmissionPoisson):
+            self.infoString = "Noise type: {} with photon count: {}".format(noise_type.capitalize(), photon_count)
+        else:
+            self.infoString = "Noise type: Additive {} with std: {}".format(noise_type.capitalize(), noise_std)
+
+        # Parameters needed to recreate the test problem from a spec
+        self._parameters = {
+            "im_size": im_size,
+            "det_count": det_count,
+            "angles": angles,
+            "det_spacing": det_spacing,
+            "domain": domain,
+            "noise_type": noise_type,
+            "noise_std": noise_std,
+            "photon_count": photon_count,
+        }
+
+    def spec(self):
+        """ Picklable lightweight description of the test problem.
+
+        The data, exact solution and exact data are placed in shared memory, so pickling
+        the spec (e.g. to start chains in a :class:`concurrent.futures.ProcessPoolExecutor`)
+        only sends the geometry parameters, the prior and the names of the shared memory
+        blocks. Calling :meth:`TestProblemSpec.build` in a worker recreates the test problem
+        on the shared arrays without copying them. The projector is created in the worker.
+
+        The shared memory is released by :meth:`TestProblemSpec.close` in the creating process.
+
+        Example
+        -------
+        .. code-block:: python
+
+            from concurrent.futures import ProcessPoolExecutor
+            import cuqipy_cil
+
+            def run_chain(spec, Ns):
+                TP = spec.build()
+                return TP.sample_posterior(Ns).samples
+
+            TP = cuqipy_cil.testproblem.ParallelBeam2D()
+            with TP.spec() as spec, ProcessPoolExecutor() as executor:
+                chains = list(executor.map(run_chain, [spec]*32, [100]*32))
+
+        """
+        return TestProblemSpec(type(self), self._parameters, self.prior, self.likelihood.data, self.exactSolution, self.exactData)
+
+
+    def MAP(self, disp=True, x0=None, maxit=500, tol=1e-6):
+        """ Compute MAP estimate of posterior.
+
+        For Gaussian prior and likelihood with scalar noise precision the normal equations are
+        solved with :class:`cuqipy_cil.solver.GramCG`, warm-started from x0 (by default the
+        FBP reconstruction of the data). Small problems and other posteriors use
+        :meth:`cuqi.problem.BayesianProblem.MAP`.
+        """
+        normal = self._normal_equations()
+        if normal is None or self.model.domain_dim <= cuqi.config.MAX_DIM_INV:
+            return super().MAP(disp=disp, x0=x0)
+
+        if x0 is None:
+            x0 = self._fbp_initial_point()
+
+        model, s, L2, P = normal
+        if disp: print("Using cuqipy_cil.solver.GramCG on the normal equations of the Gaussian posterior.")
+        c = L2*self.prior.sqrtprecTimesMean if np.isscalar(L2) else L2.T @ self.prior.sqrtprecTimesMean
+        b = self.likelihood.data - getattr(model, "shift", 0)
+        x_MAP, it = GramCG(model, b, x0, maxit, tol, weight=s**2, regularization=P, c=c).solve()
+
+        x_MAP = cuqi.array.CUQIarray(x_MAP, geometry=self.posterior.geometry)
+        x_MAP.info = {"solver": "GramCG", "iterations": it}
+        return x_MAP
+
+    def sample_posterior(self, Ns, Nb=None, callback=None, legacy=False, initial_point="fbp"):
+        """ Sample the posterior. Sampler choice and tuning is handled automatically.
+
+        See :meth:`cuqi.problem.BayesianProblem.sample_posterior`.
+
+        Parameters
+        ----------
+        initial_point : ndarray, "fbp" or None, default "fbp"
+            Initial point of the sampler. If "fbp" the FBP reconstruction of the data is used,
+            which reduces the burn-in needed compared to the default initial point of the sampler.
+            The reconstruction is only computed if the chosen sampler uses it, and the sampler
+            default is used if no reconstruction method is available. Ignored by the legacy samplers.
+        """
+        self._initial_point = initial_point
+        try:
+            return super().sample_posterior(Ns, Nb, callback, legacy=legacy)
+        finally:
+            self._initial_point = None
+
+    # The samplers chosen by cuqi are started from the initial point of sample_posterior
+
+    def _sampleLinearRTO(self, Ns, Nb, callback=None, legacy=False, **kwargs):
+        if legacy or self._normal_equations() is None:
+            return super()._sampleLinearRTO(Ns, Nb, callback, legacy=legacy, **kwargs)
+        return self._sample(cuqipy_cil.sampler.LinearRTO, Ns, Nb, callback)
+
+    def _sampleNUTS(self, Ns, Nb, callback=None, legacy=False):
+        return self._sample(cuqi.sampler.NUTS, Ns, Nb, callback, legacy, default=super()._sampleNUTS)
+
+    def _sampleUGLA(self, Ns, Nb, callback=None, legacy=False):
+        return self._sample(cuqi.sampler.UGLA, Ns, Nb, callback, legacy, default=super()._sampleUGLA)
+
+    def _samplepCN(self, Ns, Nb, callback=None, legacy=False):
+        return self._sample(cuqi.sampler.PCN, Ns, Nb, callback, legacy, default=super()._samplepCN, scale=0.02)
+
+    def _sample(self, sampler_class, Ns, Nb, callback=None, legacy=False, default=None, **kwargs):
+        """ Warm up and sample with sampler_class from the initial point and return the samples after burn-in.
+
+        Falls back to default (the sampler method of cuqi) for the legacy samplers or if no initial point is set.
+        """
+        if default is not None and legacy:
+            return default(Ns, Nb, callback, legacy=legacy)
+        initial_point = self._get_initial_point()
+        if default is not None and initial_point is None:
+            return default(Ns, Nb, callback, legacy=legacy)
+
+        print(f"Using {sampler_class.__module__.split('.')[0]}.sampler {sampler_class.__name__} sampler, burn-in: {Nb/Ns*100:g}%")
+        sampler = sampler_class(self.posterior, initial_point=initial_point, callback=callback, **kwargs)
+        sampler.warmup(Nb)
+        sampler.sample(Ns)
+        return sampler.get_samples().burnthin(Nb)
+
+    def _get_initial_point(self):
+        """ Initial point for the samplers set by :meth:`sample_posterior` (None means sampler default).
+
+        The FBP reconstruction is computed on first use.
+        """
+        initial_point = getattr(self, "_initial_point", None)
+        if isinstance(initial_point, str) and initial_point == "fbp":
+            try:
+                initial_point = self._fbp_initial_point()
+            except ImportError: # No analytic reconstruction for this backend and geometry
+                initial_point = None
+            self._initial_point = initial_point
+        return initial_point
+
+    def _fbp_initial_point(self):
+        """ FBP reconstruction of the data (of its line integrals for Poisson noise) as parameter vector. """
+        data = self.likelihood.data
+        if isinstance(self.likelihood.distribution, cuqipy_cil.distribution.TransmissionPoisson):
+            data = self.likelihood.distribution.line_integrals(data)
+        return np.asarray(self.model.fbp(data))
+
+    def _normal_equations(self):
+        """ Terms of the normal equations of the posterior if they can be solved with GramCG, otherwise None. """
+        if not hasattr(self.prior, "sqrtprecTimesMean"):
+            return None
+        return _gaussian_normal_equations(self.model, self.likelihood, self.prior)
+
+class TestProblemSpec:
+    """ Picklable lightweight description of a test problem with its arrays in shared memory.
+
+    Created by :meth:`ParallelBeam2D.spec`.
+    """
+
+    def __init__(self, problem_class, parameters, prior, data, exact_solution, exact_data=None):
+        self._problem_class = problem_class
+        self._parameters = dict(parameters)
+        self._prior = prior
+        self._arrays = {
+            name: SharedArray.from_array(np.asarray(value))
+            for name, value in (("data", data), ("exact_solution", exact_solution), ("exact_data", exact_data))
+            if value is not None
+        }
+
+    def build(self):
+        """ Recreate the test problem using the shared arrays (without copying them). """
+        arrays = {name: shared.array for name, shared in self._arrays.items()}
+        TP = self._problem_class(
+            phantom=arrays["exact_solution"],
+            prior=self._prior,
+            data=arrays["data"],
+            **self._parameters
+        )
+        if "exact_data" in arrays:
+            TP.exactData = cuqi.array.CUQIarray(arrays["exact_data"], geometry=TP.model.range_geometry)
+
+        # Keep the shared memory mapped as long as the test problem lives
+        TP._shared_arrays = self._arrays
+        return TP
+
+    def close(self):
+        """ Release the shared memory (unlinking it if called in the creating process). """
+        for shared in self._arrays.values():
+            shared.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,59 @@
+import cuqipy_cil
+import pytest
+import json
+import numpy as np
+
+def test_autotune_persists_decision(monkeypatch, tmp_path):
+    # Test that the first model times the backends and later models reuse the stored decision
+    path = tmp_path / "autotune.json"
+    monkeypatch.setattr(cuqipy_cil.config, "AUTOTUNE", True)
+    monkeypatch.setattr(cuqipy_cil.config, "AUTOTUNE_CACHE_PATH", str(path))
+    cuqipy_cil.autotune.clear()
+
+    model = cuqipy_cil.model.ParallelBeam2DModel(im_size=(32, 32), det_count=48)
+    assert model.forward(np.ones(model.domain_dim)).shape == (model.range_dim,)
+
+    decisions = json.loads(path.read_text())
+    assert len(decisions) == 1
+    decision, = decisions.values()
+    assert (decision["backend"], decision["device"]) in cuqipy_cil.autotune.candidates()
+    assert decision["timings"][f"{decision['backend']}/{decision['device']}"] == min(t for t in decision["timings"].values() if t is not None)
+
+    # A new process (simulated by clearing the in-memory decisions) reads the file instead of tuning
+    cuqipy_cil.autotune.clear()
+    monkeypatch.setattr(cuqipy_cil.autotune, "tune", lambda *args, **kwargs: pytest.fail("backends were timed again"))
+    cuqipy_cil.model.ParallelBeam2DModel(im_size=(32, 32), det_count=48)
+    assert cuqipy_cil.autotune.info() == decisions
+
+    cuqipy_cil.autotune.clear(remove_file=True)
+    assert not path.exists()
+
+def test_decision_key_independent_of_dimension_order():
+    # Test that relabelling geometries to the backend order (as 3D models do) keeps the key
+    model = cuqipy_cil.model.ParallelBeam2DModel(im_size=(32, 48), det_count=40)
+    ag = model.acquisition_geometry.copy()
+    ig = model.image_geometry.copy()
+    key = cuqipy_cil.autotune.decision_key(ag, ig)
+
+    ag.dimension_labels = ag.dimension_labels[::-1]
+    ig.dimension_labels = ig.dimension_labels[::-1]
+    assert cuqipy_cil.autotune.decision_key(ag, ig) == key
+
+def test_autotune_skips_failing_candidates(monkeypatch, tmp_path):
+    # Test that any failure of a trial only skips the candidate, and that trials run without holding the lock
+    monkeypatch.setattr(cuqipy_cil.config, "AUTOTUNE_CACHE_PATH", str(tmp_path / "autotune.json"))
+    monkeypatch.setattr(cuqipy_cil.autotune, "candidates", lambda: [("astra", "gpu"), ("numpy", "cpu")])
+    cuqipy_cil.autotune.clear()
+
+    def time_candidate(ag, ig, backend, device, repeats):
+        assert not cuqipy_cil.autotune._lock.locked()
+        if backend == "astra":
+            raise MemoryError("trial too large")
+        return 1.0
+    monkeypatch.setattr(cuqipy_cil.autotune, "_time_candidate", time_candidate)
+
+    model = cuqipy_cil.model.ParallelBeam2DModel(im_size=(32, 32), det_count=48)
+    assert cuqipy_cil.autotune.select(model.acquisition_geometry, model.image_geometry) == ("numpy", "cpu")
+    decision, = cuqipy_cil.autotune.info().values()
+    assert decision["timings"] == {"astra/gpu": None, "numpy/cpu": 1.0}
+    cuqipy_cil.autotune.clear(remove_file=True)
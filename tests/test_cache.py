@@ -0,0 +1,57 @@
+import cuqipy_cil
+import numpy as np
+
+def test_repeated_model_reuses_projector():
+    cuqipy_cil.cache.clear()
+
+    model1 = cuqipy_cil.model.ParallelBeam2DModel(im_size=(32, 32), det_count=40)
+    model2 = cuqipy_cil.model.ParallelBeam2DModel(im_size=(32, 32), det_count=40)
+    model3 = cuqipy_cil.model.ParallelBeam2DModel(im_size=(32, 32), det_count=41)
+
+    assert model1.ProjectionOperator is model2.ProjectionOperator
+    assert model1.ProjectionOperator is not model3.ProjectionOperator
+
+    info = cuqipy_cil.cache.info()
+    assert info["hits"] == 1
+    assert info["misses"] == 2
+    assert info["currsize"] == 2
+
+def test_geometry_key_depends_on_angles():
+    model = cuqipy_cil.model.ParallelBeam2DModel(angles=np.linspace(0, np.pi, 10))
+    ag = model.acquisition_geometry.copy()
+    ig = model.image_geometry
+
+    key = cuqipy_cil.cache.geometry_key(ag, ig, "astra", "cpu")
+    assert key == cuqipy_cil.cache.geometry_key(ag.copy(), ig.copy(), "astra", "cpu")
+
+    ag.set_angles(np.linspace(0, np.pi, 11), angle_unit="radian")
+    assert key != cuqipy_cil.cache.geometry_key(ag, ig, "astra", "cpu")
+
+def test_cache_eviction():
+    cache = cuqipy_cil.cache.ProjectorCache(maxsize=1)
+    model = cuqipy_cil.model.ParallelBeam2DModel()
+    factory = lambda ig, ag, backend, device: object()
+
+    cache.get(model.acquisition_geometry, model.image_geometry, "astra", "cpu", factory)
+    cache.get(model.acquisition_geometry, model.image_geometry, "astra", "gpu", factory)
+
+    info = cache.info()
+    assert info["currsize"] == 1
+    assert info["evictions"] == 1
+
+    cache.clear()
+    assert len(cache) == 0
+
+def test_cache_counts_pooled_containers(monkeypatch):
+    # Test that containers added to the pool by concurrent projections count towards nbytes
+    monkeypatch.setattr(cuqipy_cil.config, "CONTAINER_POOL_SIZE", 2)
+    cuqipy_cil.cache.clear()
+    model = cuqipy_cil.model.ParallelBeam2DModel(im_size=(32, 32), det_count=40)
+    nbytes = cuqipy_cil.cache.info()["nbytes"]
+    pair_nbytes = model._image_data.as_array().nbytes + model._acquisition_data.as_array().nbytes
+    assert nbytes == pair_nbytes
+
+    with model._containers.checkout(), model._containers.checkout():
+        pass
+    assert cuqipy_cil.cache.info()["nbytes"] == 2*pair_nbytes
+    cuqipy_cil.cache.clear()
@@ -0,0 +1,36 @@
+import cuqipy_cil
+import pytest
+
+def test_detect_is_memoized():
+    # Test that detection runs once per process and is reused
+    first = cuqipy_cil.config.detect()
+    second = cuqipy_cil.config.detect()
+
+    assert first == second
+    assert first["backend"] in ("astra", "tigre", "numpy")
+    assert first["device"] in ("cpu", "gpu")
+    assert first["time"] >= 0
+
+def test_detect_environment_override(monkeypatch):
+    # Test that environment variables bypass probing
+    monkeypatch.setenv("CUQIPY_CIL_BACKEND", "astra")
+    monkeypatch.setenv("CUQIPY_CIL_DEVICE", "cpu")
+    monkeypatch.setattr(cuqipy_cil.config, "_probe_device", lambda: pytest.fail("device was probed"))
+    monkeypatch.setattr(cuqipy_cil.config, "_probe_backend", lambda device: pytest.fail("backend was probed"))
+
+    result = cuqipy_cil.config.detect(refresh=True)
+
+    assert result["backend"] == "astra"
+    assert result["device"] == "cpu"
+    assert result["source"] == {"backend": "environment", "device": "environment"}
+
+    # Restore detection for other tests
+    monkeypatch.undo()
+    cuqipy_cil.config.detect(refresh=True)
+
+def test_detect_invalid_environment(monkeypatch):
+    monkeypatch.setenv("CUQIPY_CIL_DEVICE", "tpu")
+    with pytest.raises(ValueError):
+        cuqipy_cil.config.detect(refresh=True)
+    monkeypatch.undo()
+    cuqipy_cil.config.detect(refresh=True)
@@ -0,0 +1,57 @@
+import cuqipy_cil
+import pytest
+import numpy as np
+
+@pytest.fixture
+def problem():
+    model = cuqipy_cil.model.ParallelBeam2DModel()
+    rng = np.random.default_rng(0)
+    y = model.forward(rng.standard_normal(model.domain_dim)).astype(np.float32)
+    x = rng.standard_normal(model.domain_dim)
+    return model, y, x
+
+@pytest.mark.parametrize("extension", [".npy", ".raw"])
+def test_open_sinogram(tmp_path, problem, extension):
+    model, y, _ = problem
+    sinogram = y.reshape(model.range_geometry.fun_shape)
+    path = str(tmp_path / f"sinogram{extension}")
+    if extension == ".npy":
+        np.save(path, sinogram)
+        source = cuqipy_cil.io.open_sinogram(path)
+    else:
+        sinogram.tofile(path)
+        source = cuqipy_cil.io.open_sinogram(path, shape=sinogram.shape)
+
+    assert isinstance(source, np.memmap)
+    assert np.array_equal(source, sinogram)
+
+def test_open_sinogram_hdf5(tmp_path, problem):
+    h5py = pytest.importorskip("h5py")
+    model, y, _ = problem
+    path = str(tmp_path / "sinogram.nxs")
+    with h5py.File(path, "w") as f:
+        f.create_dataset(cuqipy_cil.io.NEXUS_DATA_PATH, data=y.reshape(model.range_geometry.fun_shape))
+
+    source = cuqipy_cil.io.open_sinogram(path)
+    assert np.array_equal(source[:], y.reshape(model.range_geometry.fun_shape))
+
+@pytest.mark.parametrize("block_size", [2, 7, 60])
+def test_streamed_sinogram_matches_model(problem, block_size):
+    # Test that block-wise back projection and misfit match the full model.
+    model, y, x = problem
+    data = cuqipy_cil.io.StreamedSinogram(y.reshape(model.range_geometry.fun_shape), model, block_size=block_size)
+
+    value, gradient = data.misfit_gradient(x)
+    residual = model.forward(x) - y
+
+    assert np.allclose(data.adjoint(), model.adjoint(y), rtol=1e-4, atol=1e-3)
+    assert np.isclose(value, 0.5*np.sum(residual**2), rtol=1e-4)
+    assert np.allclose(gradient, model.adjoint(residual), rtol=1e-4, atol=1e-3)
+
+def test_streamed_sinogram_slice_stack():
+    model = cuqipy_cil.model.SliceStackModel(cuqipy_cil.model.ParallelBeam2DModel(), num_slices=3, num_workers=1)
+    y = model.forward(np.ones(model.domain_dim))
+    data = cuqipy_cil.io.StreamedSinogram(y.reshape(model.range_geometry.fun_shape), model)
+
+    assert data.num_blocks == 3
+    assert np.allclose(data.adjoint(), model.adjoint(y), rtol=1e-4, atol=1e-3)
@@ -0,0 +1,45 @@
+import cuqi
+import cuqipy_cil
+import pytest
+import numpy as np
+
+@pytest.mark.parametrize("noise_type", ["gaussian", "poisson"])
+def test_fused_likelihood_matches_cuqi(noise_type):
+    # Test that the fused likelihood evaluates the same log density and gradient as cuqi.
+    TP = cuqipy_cil.testproblem.ParallelBeam2D(phantom=0.05*cuqi.data.shepp_logan(size=45), noise_type=noise_type, photon_count=1e3, seed=0)
+    likelihood = TP.likelihood.distribution.to_likelihood(TP.data)
+    x = np.random.default_rng(0).random(TP.model.domain_dim)*0.05
+
+    assert isinstance(TP.likelihood, cuqipy_cil.likelihood.FusedLikelihood)
+    assert TP.likelihood.is_fused
+    assert np.allclose(TP.likelihood.logd(x), likelihood.logd(x))
+    assert np.allclose(TP.likelihood.gradient(x), likelihood.gradient(x))
+
+    value, gradient = TP.likelihood.logd_and_gradient(2*x)
+    assert np.allclose(value, likelihood.logd(2*x))
+    assert np.allclose(gradient, likelihood.gradient(2*x))
+
+def test_fused_likelihood_single_forward(monkeypatch):
+    # Test that log density and gradient at the same point cost one forward and one adjoint.
+    TP = cuqipy_cil.testproblem.ParallelBeam2D()
+    model = TP.likelihood.model
+    calls = {"forward": 0, "adjoint": 0}
+    project, backproject = model._project, model._backproject
+
+    def counting_project(*args, **kwargs):
+        calls["forward"] += 1
+        return project(*args, **kwargs)
+
+    def counting_backproject(*args, **kwargs):
+        calls["adjoint"] += 1
+        return backproject(*args, **kwargs)
+
+    monkeypatch.setattr(model, "_project", counting_project)
+    monkeypatch.setattr(model, "_backproject", counting_backproject)
+
+    x = np.random.default_rng(0).standard_normal(TP.model.domain_dim)
+    for i in range(3):
+        TP.posterior.logd(x + i)
+        TP.posterior.gradient(x + i)
+
+    assert calls == {"forward": 3, "adjoint": 3}
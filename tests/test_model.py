@@ -1,3 +1,4 @@
+import cuqi
 import cuqipy_cil
 import pytest
 import numpy as np
@@ -28,3 +29,272 @@ def test_model_simple(model: cuqipy_cil.model.CILModel):
     assert x2.shape == (model.domain_dim,)
 
 
+
+@pytest.mark.parametrize("model",
+    [
+        (cuqipy_cil.model.ParallelBeam2DModel()),
+        (cuqipy_cil.model.FanBeam2DModel()),
+        (cuqipy_cil.model.ShiftedFanBeam2DModel())
+    ])
+def test_model_batch_matches_single(model: cuqipy_cil.model.CILModel):
+    # Test that batched projections match column-wise projections.
+    rng = np.random.default_rng(0)
+    X = rng.standard_normal((model.domain_dim, 3))
+
+    Y = model.forward_batch(X)
+    assert Y.shape == (model.range_dim, 3)
+    for j in range(3):
+        assert np.allclose(Y[:, j], model.forward(X[:, j]), rtol=1e-5)
+
+    Z = model.adjoint_batch(Y)
+    assert Z.shape == (model.domain_dim, 3)
+    for j in range(3):
+        assert np.allclose(Z[:, j], model.adjoint(Y[:, j]), rtol=1e-5)
+
+def test_model_forward_samples_uses_batch():
+    # Test that Samples are projected in one batch and returned as Samples.
+    model = cuqipy_cil.model.ParallelBeam2DModel()
+    samples = cuqi.samples.Samples(np.ones((model.domain_dim, 4)), geometry=model.domain_geometry)
+
+    Y = model.forward(samples)
+
+    assert isinstance(Y, cuqi.samples.Samples)
+    assert Y.samples.shape == (model.range_dim, 4)
+    assert np.allclose(Y.samples[:, 0], model.forward(np.ones(model.domain_dim)))
+
+def test_sparse_matrix_model(tmp_path):
+    # Test that the assembled matrix reproduces the projector and is persisted.
+    model = cuqipy_cil.model.ParallelBeam2DModel(im_size=(16, 16), det_count=20, angles=np.linspace(0, np.pi, 10))
+    x = np.random.default_rng(0).standard_normal(model.domain_dim)
+
+    with cuqipy_cil.model.SparseMatrixModel(model, batch_size=50, cache_dir=tmp_path, num_threads=2) as A:
+        assert A.get_matrix().shape == (model.range_dim, model.domain_dim)
+        assert np.allclose(A.forward(x), model.forward(x), rtol=1e-4, atol=1e-4)
+        y = A.forward(x)
+        assert np.allclose(A.adjoint(y), A.get_matrix().T @ y)
+    assert len(list(tmp_path.glob("*.npz"))) == 1
+
+    # Threads are restarted after closing
+    assert np.allclose(A.forward(x), y)
+    A.close()
+
+    # Loading from disk gives the same matrix
+    B = cuqipy_cil.model.SparseMatrixModel(model, cache_dir=tmp_path)
+    assert (A.get_matrix() != B.get_matrix()).nnz == 0
+
+def test_model_output_not_shared():
+    # Test that results do not share memory with the model or alias the input.
+    model = cuqipy_cil.model.ParallelBeam2DModel()
+    x = np.ones(model.domain_dim, dtype=np.float32)
+    x_copy = x.copy()
+
+    y1 = model.forward(x)
+    y1_copy = np.array(y1)
+    model.adjoint(np.ones(model.range_dim))
+    y2 = model.forward(2*x)
+
+    assert np.allclose(y1, y1_copy)
+    assert np.allclose(y2, 2*y1_copy, rtol=1e-5)
+    assert np.array_equal(x, x_copy)
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+def test_model_out_argument(dtype):
+    # Test that forward and adjoint write into preallocated arrays.
+    model = cuqipy_cil.model.FanBeam2DModel()
+    x = np.random.default_rng(0).standard_normal(model.domain_dim)
+
+    out = np.empty(model.range_dim, dtype=dtype)
+    y = model.forward(x, out=out)
+    assert y is out
+    assert np.allclose(out, model.forward(x), rtol=1e-5)
+
+    out_adj = np.empty(model.domain_dim, dtype=dtype)
+    z = model.adjoint(out, out=out_adj)
+    assert z is out_adj
+    assert np.allclose(out_adj, model.adjoint(out), rtol=1e-4)
+
+    with pytest.raises(ValueError):
+        model.forward(x, out=np.empty(model.range_dim + 1))
+
+requires_gpu = pytest.mark.skipif(
+    cuqipy_cil.config.PROJECTION_BACKEND_DEVICE != "gpu",
+    reason="3D projectors require a GPU"
+)
+
+@requires_gpu
+@pytest.mark.parametrize("model_class", [cuqipy_cil.model.ParallelBeam3DModel, cuqipy_cil.model.ConeBeam3DModel])
+def test_model_3D_slabs_match_full(model_class):
+    # Test that slab-wise projection matches projecting the full volume.
+    model = model_class(im_size=(16, 16, 10), det_count=(20, 14), angles=np.linspace(0, np.pi, 12))
+    slab_model = model_class(im_size=(16, 16, 10), det_count=(20, 14), angles=np.linspace(0, np.pi, 12), slab_size=3)
+    x = np.random.default_rng(0).random(model.domain_dim).astype(np.float32)
+
+    assert isinstance(model.domain_geometry, cuqipy_cil.geometry.Image3D)
+    assert slab_model.slab_size == 3
+
+    y = model.forward(x)
+    assert y.shape == (model.range_dim,)
+    assert np.allclose(slab_model.forward(x), y, rtol=1e-3, atol=1e-3)
+    assert np.allclose(slab_model.adjoint(y), model.adjoint(y), rtol=1e-3, atol=1e-3)
+
+def test_image3D_geometry():
+    geometry = cuqipy_cil.geometry.Image3D((4, 5, 6))
+    x = np.arange(geometry.par_dim)
+
+    assert geometry.par2fun(x).shape == (4, 5, 6)
+    assert np.array_equal(geometry.fun2par(geometry.par2fun(x)), x)
+
+@pytest.mark.parametrize("num_workers", [1, 3])
+def test_slice_stack_model(num_workers):
+    # Test that projecting a stack matches projecting each slice.
+    model = cuqipy_cil.model.ParallelBeam2DModel()
+    stack_model = cuqipy_cil.model.SliceStackModel(model, num_slices=5, num_workers=num_workers)
+    x = np.random.default_rng(0).random((5,) + model.domain_geometry.fun_shape)
+
+    y = stack_model.forward(x.ravel())
+    assert y.shape == (stack_model.range_dim,)
+
+    Y = y.reshape(stack_model.range_geometry.fun_shape)
+    for i in range(5):
+        assert np.allclose(Y[i].ravel(), model.forward(x[i].ravel()), rtol=1e-5)
+
+    z = stack_model.adjoint(y)
+    Z = z.reshape(stack_model.domain_geometry.fun_shape)
+    assert np.allclose(Z[2].ravel(), model.adjoint(Y[2].ravel()), rtol=1e-4)
+
+    # Threads are restarted after closing
+    stack_model.close()
+    assert np.allclose(stack_model.forward(x.ravel()), y)
+    stack_model.close()
+
+def test_model_gram():
+    # Test that the fused gram operator matches adjoint(forward(x)).
+    model = cuqipy_cil.model.ParallelBeam2DModel()
+    x = np.random.default_rng(0).standard_normal(model.domain_dim)
+
+    g = model.gram(x)
+
+    assert g.shape == (model.domain_dim,)
+    assert np.allclose(g, model.adjoint(model.forward(x)), rtol=1e-4, atol=1e-4)
+
+@pytest.mark.parametrize("model_class", [cuqipy_cil.model.ParallelBeam2DModel, cuqipy_cil.model.FanBeam2DModel])
+def test_model_fbp(model_class):
+    # Test that FBP reconstructs the phantom from noise free data better than plain back projection.
+    model = model_class(im_size=(64, 64), det_count=96, angles=np.linspace(0, 2*np.pi, 180, endpoint=False))
+    x = cuqi.data.shepp_logan(size=64).ravel()
+    y = model.forward(x)
+
+    x_fbp = model.fbp(y)
+
+    assert x_fbp.shape == (model.domain_dim,)
+    assert np.linalg.norm(x_fbp - x) < 0.5*np.linalg.norm(x)
+
+@pytest.mark.parametrize("method", ["staggered", "random"])
+def test_model_partition(method):
+    # Test that angle subsets project the corresponding rows of the full sinogram.
+    model = cuqipy_cil.model.ParallelBeam2DModel()
+    x = np.random.default_rng(0).standard_normal(model.domain_dim)
+    y = model.forward(x)
+
+    subsets = model.partition(4, method=method, seed=0)
+
+    assert sorted(np.concatenate([A_i.subset_indices for A_i in subsets])) == list(range(60))
+    for A_i in subsets:
+        assert A_i.range_dim == len(A_i.subset_indices)*50
+        assert np.allclose(A_i.forward(x), A_i.subset_data(y), rtol=1e-4, atol=1e-4)
+
+def test_model_subset_shares_image_container():
+    # Test that subsets share the image container of the parent, also after reloading the projector
+    import pickle
+    model = cuqipy_cil.model.ParallelBeam2DModel()
+    A_1, A_2 = model.partition(2)
+    assert A_1._image_data is model._image_data
+    assert A_2._image_data is model._image_data
+    assert pickle.loads(pickle.dumps(A_1))._image_data is model._image_data
+
+def test_model_subset_invalid():
+    model = cuqipy_cil.model.ParallelBeam2DModel()
+    with pytest.raises(ValueError):
+        model.subset([0])
+    with pytest.raises(ValueError):
+        model.partition(2, method="unknown")
+
+def test_model_pickle():
+    # Test that models pickle without the projector and work after unpickling.
+    import pickle
+    model = cuqipy_cil.model.ParallelBeam2DModel()
+    x = np.random.default_rng(0).standard_normal(model.domain_dim)
+
+    data = pickle.dumps(model)
+    model2 = pickle.loads(data)
+
+    assert len(data) < 10000
+    assert np.allclose(model2.forward(x), model.forward(x))
+
+def test_model_thread_safe(monkeypatch):
+    # Test that concurrent projections on one model give the same results as serial ones
+    from concurrent.futures import ThreadPoolExecutor
+    monkeypatch.setattr(cuqipy_cil.config, "CONTAINER_POOL_SIZE", 3)
+    cuqipy_cil.cache.clear()
+    model = cuqipy_cil.model.ParallelBeam2DModel(im_size=(32, 32), det_count=48)
+    assert model._containers.maxsize == 3
+
+    rng = np.random.default_rng(0)
+    X = [rng.random(model.domain_dim) for _ in range(16)]
+    expected = [(model.forward(x), model.adjoint(model.forward(x))) for x in X]
+
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(lambda x: (model.forward(x), model.adjoint(model.forward(x))), X))
+
+    for (y, z), (y_expected, z_expected) in zip(results, expected):
+        assert np.allclose(y, y_expected)
+        assert np.allclose(z, z_expected)
+    cuqipy_cil.cache.clear()
+
+def test_model_async():
+    # Test that futures and asyncio wrappers give the results of the blocking calls
+    import asyncio
+    model = cuqipy_cil.model.FanBeam2DModel(im_size=(32, 32), det_count=48)
+
+    rng = np.random.default_rng(0)
+    x = rng.random(model.domain_dim)
+    y = rng.random(model.range_dim)
+
+    futures = [model.forward_async(x), model.adjoint_async(y)]
+    assert np.allclose(futures[0].result(), model.forward(x))
+    assert np.allclose(futures[1].result(), model.adjoint(y))
+
+    out = np.empty(model.range_dim, dtype=np.float32)
+    assert model.forward_async(x, out=out).result() is out
+    assert np.allclose(out, model.forward(x))
+
+    async def run():
+        return await asyncio.gather(model.aforward(x), model.aadjoint(y))
+    y_async, x_async = asyncio.run(run())
+    assert np.allclose(y_async, model.forward(x))
+    assert np.allclose(x_async, model.adjoint(y))
+
+def test_model_norm_and_sums(monkeypatch, tmp_path):
+    # Test that norm and row/column sums are correct, memoized and loaded from the on-disk cache
+    monkeypatch.setattr(cuqipy_cil.config, "OPERATOR_CACHE_DIR", str(tmp_path))
+    model = cuqipy_cil.model.ParallelBeam2DModel(im_size=(16, 16), det_count=24, angles=np.linspace(0, np.pi, 20))
+    A = model.get_matrix().toarray()
+
+    assert np.isclose(model.norm(), np.linalg.norm(A, 2), rtol=1e-3)
+    assert np.allclose(model.row_sums(), A.sum(axis=1), rtol=1e-4, atol=1e-4)
+    assert np.allclose(model.column_sums(), A.sum(axis=0), rtol=1e-4, atol=1e-4)
+
+    # Neither memoized nor cached values project again
+    model2 = cuqipy_cil.model.ParallelBeam2DModel(im_size=(16, 16), det_count=24, angles=np.linspace(0, np.pi, 20))
+    for m in (model, model2):
+        monkeypatch.setattr(m, "_project", lambda *args, **kwargs: pytest.fail("projected again"))
+        monkeypatch.setattr(m, "_backproject", lambda *args, **kwargs: pytest.fail("projected again"))
+        assert m.norm() == model.norm()
+        assert np.array_equal(m.row_sums(), model.row_sums())
+        assert np.array_equal(m.column_sums(), model.column_sums())
+
+    # Other power iteration settings estimate the norm again
+    monkeypatch.setattr(model, "_estimate_norm", lambda maxit, tol, seed: float(maxit))
+    assert model.norm(maxit=3) == 3.0
+    assert model.norm(maxit=3, tol=1e-10) == 3.0
+    assert model.norm() == model2.norm()
@@ -0,0 +1,37 @@
+import cuqipy_cil
+import pytest
+import numpy as np
+
+def test_projector_pool_cpu_workers():
+    # Test that projections in CPU worker processes match the local model.
+    model = cuqipy_cil.model.ParallelBeam2DModel()
+    fan_model = cuqipy_cil.model.FanBeam2DModel()
+    x = np.random.default_rng(0).standard_normal(model.domain_dim)
+
+    with cuqipy_cil.pool.ProjectorPool(devices="cpu", num_workers=2) as pool:
+        assert pool.num_workers == 2
+        assert pool.devices == ["cpu", "cpu"]
+
+        y = pool.forward(model, x)
+        Y = pool.map(fan_model, np.stack([x, 2*x], axis=1))
+        z = pool.wrap(model).adjoint(y)
+
+    assert np.allclose(y, model.forward(x), rtol=1e-4, atol=1e-4)
+    assert np.allclose(Y[:, 1], fan_model.forward(2*x), rtol=1e-4, atol=1e-4)
+    assert np.allclose(z, model.adjoint(model.forward(x)), rtol=1e-4, atol=1e-3)
+
+@pytest.mark.parametrize("devices", ["tpu", "cpu:0", "gpu:a"])
+def test_projector_pool_invalid_device(devices):
+    with pytest.raises(ValueError):
+        cuqipy_cil.pool.ProjectorPool(devices=devices)
+
+def test_projector_pool_backend(monkeypatch):
+    # Test that CPU pools use the configured backend, and fail up front if they need astra and it is missing
+    monkeypatch.setattr(cuqipy_cil.config, "PROJECTION_BACKEND", "numpy")
+    with cuqipy_cil.pool.ProjectorPool(devices="cpu", num_workers=1) as pool:
+        assert pool.backend == "numpy"
+
+    monkeypatch.setattr(cuqipy_cil.config, "PROJECTION_BACKEND", "tigre")
+    monkeypatch.setattr(cuqipy_cil.config, "_is_installed", lambda module: False)
+    with pytest.raises(ValueError, match="astra"):
+        cuqipy_cil.pool.ProjectorPool(devices="cpu", num_workers=1)
@@ -0,0 +1,36 @@
+import json
+import cuqipy_cil
+import numpy as np
+
+def test_profile_counts_model_calls(tmp_path):
+    # Test that model calls are counted while profiling and exported as JSON and Chrome trace.
+    model = cuqipy_cil.model.ParallelBeam2DModel()
+    x = np.random.default_rng(0).standard_normal(model.domain_dim)
+
+    with cuqipy_cil.profile(trace=True) as p:
+        for _ in range(3):
+            y = model.forward(x)
+            model.adjoint(y)
+    model.forward(x) # Not recorded
+
+    report = p.report()
+    assert report["CILModel.forward"]["calls"] == 3
+    assert report["CILModel.adjoint"]["calls"] == 3
+    assert report["projector.direct"]["calls"] == 3
+    assert report["cast"]["bytes"] == 3*model.domain_dim*4 # float64 input cast into the float32 container
+    assert report["CILModel.forward"]["total_time"] >= report["projector.direct"]["total_time"]
+
+    assert json.loads(p.to_json(tmp_path / "profile.json")) == json.loads((tmp_path / "profile.json").read_text())
+
+    p.to_chrome_trace(tmp_path / "trace.json")
+    events = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+    assert sum(event["name"] == "CILModel.forward" for event in events) == 3
+
+def test_profile_disabled():
+    # Without an active profiler the timers are no-ops.
+    assert cuqipy_cil.profiling._active is None
+    with cuqipy_cil.profiling.timer("section"):
+        pass
+    with cuqipy_cil.profile() as p:
+        pass
+    assert p.report() == {}
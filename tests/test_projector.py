@@ -0,0 +1,70 @@
+import cuqipy_cil
+import pytest
+import numpy as np
+
+MODELS = [
+    cuqipy_cil.model.ParallelBeam2DModel,
+    cuqipy_cil.model.FanBeam2DModel,
+    cuqipy_cil.model.ShiftedFanBeam2DModel,
+]
+
+@pytest.mark.parametrize("model_class", MODELS)
+def test_numpy_backend_matches_astra(model_class, monkeypatch):
+    # Test that the numpy projector agrees with the astra projector up to the discretization
+    pytest.importorskip("astra")
+    monkeypatch.setattr(cuqipy_cil.config, "PROJECTION_BACKEND", "astra")
+    monkeypatch.setattr(cuqipy_cil.config, "PROJECTION_BACKEND_DEVICE", "cpu")
+    reference = model_class(im_size=(64, 64), det_count=96)
+
+    monkeypatch.setattr(cuqipy_cil.config, "PROJECTION_BACKEND", "numpy")
+    model = model_class(im_size=(64, 64), det_count=96)
+
+    # Two off-centre disks, so flips and shifts of the image would be detected
+    yy, xx = np.mgrid[:64, :64]
+    x = (((xx - 40)**2 + (yy - 20)**2 < 100) + 0.5*((xx - 20)**2 + (yy - 45)**2 < 50)).ravel()
+
+    y = model.forward(x)
+    y_ref = reference.forward(x)
+    assert y.shape == y_ref.shape
+    assert np.linalg.norm(y - y_ref)/np.linalg.norm(y_ref) < 0.05
+
+@pytest.mark.parametrize("model_class", MODELS)
+def test_numpy_backend_adjoint(model_class, monkeypatch):
+    # Test that <A x, y> = <x, A^T y>
+    monkeypatch.setattr(cuqipy_cil.config, "PROJECTION_BACKEND", "numpy")
+    model = model_class(im_size=(32, 32), det_count=48)
+
+    rng = np.random.default_rng(0)
+    x = rng.random(model.domain_dim)
+    y = rng.random(model.range_dim)
+
+    lhs = np.dot(model.forward(x), y)
+    rhs = np.dot(x, model.adjoint(y))
+    assert np.isclose(lhs, rhs, rtol=1e-4)
+
+def test_numpy_backend_without_numba():
+    # Test that the NumPy and numba kernels give the same projections
+    model = cuqipy_cil.model.FanBeam2DModel(im_size=(32, 32), det_count=48)
+    operator = cuqipy_cil.projector.ProjectionOperator(model.image_geometry, model.acquisition_geometry, use_numba=False)
+    if cuqipy_cil.projector._load_numba_kernels() is None:
+        pytest.skip("numba not installed")
+    compiled = cuqipy_cil.projector.ProjectionOperator(model.image_geometry, model.acquisition_geometry, use_numba=True)
+
+    rng = np.random.default_rng(0)
+    image = rng.random((32, 32)).astype(np.float32)
+    sinogram = rng.random(model.range_dim).astype(np.float32)
+
+    assert np.allclose(operator.project(image), compiled.project(image), rtol=1e-4, atol=1e-4)
+    assert np.allclose(operator.backproject(sinogram), compiled.backproject(sinogram), rtol=1e-4, atol=1e-4)
+
+def test_numpy_backend_fbp(monkeypatch):
+    # Test that FBP with the numpy backend (filtered back projection without CIL's recon tools) reconstructs the phantom
+    import cuqi
+    monkeypatch.setattr(cuqipy_cil.config, "PROJECTION_BACKEND", "numpy")
+    for size in (64, 128):
+        model = cuqipy_cil.model.ParallelBeam2DModel(im_size=(size, size), det_count=3*size//2, angles=np.linspace(0, np.pi, 180, endpoint=False))
+        x = cuqi.data.shepp_logan(size=size).ravel()
+        x_fbp = model.fbp(model.forward(x))
+
+        assert x_fbp.shape == (model.domain_dim,)
+        assert np.linalg.norm(x_fbp - x) < 0.5*np.linalg.norm(x)
@@ -0,0 +1,92 @@
+import cuqipy_cil
+import cuqi
+import numpy as np
+
+def test_gram_cg_solves_normal_equations():
+    model = cuqipy_cil.model.ParallelBeam2DModel(im_size=(16, 16), det_count=24, angles=np.linspace(0, np.pi, 20))
+    A = model.get_matrix().toarray()
+    b = np.random.default_rng(0).standard_normal(model.range_dim)
+
+    x, it = cuqipy_cil.solver.GramCG(model, b, maxit=500, tol=1e-8, shift=1.0).solve()
+
+    x_ref = np.linalg.solve(A.T@A + np.eye(model.domain_dim), A.T@b)
+    assert it > 0
+    assert np.allclose(x, x_ref, rtol=1e-3, atol=1e-3)
+
+def test_gram_cg_warm_start():
+    model = cuqipy_cil.model.ParallelBeam2DModel(im_size=(16, 16), det_count=24, angles=np.linspace(0, np.pi, 20))
+    b = model.forward(np.ones(model.domain_dim))
+
+    x, it = cuqipy_cil.solver.GramCG(model, b, maxit=500, tol=1e-6, shift=1e-2).solve()
+    x2, it2 = cuqipy_cil.solver.GramCG(model, b, x0=x, maxit=500, tol=1e-6, shift=1e-2).solve()
+
+    assert it2 < it
+
+def test_linear_rto_uses_normal_equations():
+    TP = cuqipy_cil.testproblem.ParallelBeam2D()
+
+    sampler = cuqipy_cil.sampler.LinearRTO(TP.posterior, maxit=20)
+    sampler.sample(5)
+    samples = sampler.get_samples()
+
+    assert sampler._normal_terms is not None
+    assert samples.shape == (TP.model.domain_dim, 5)
+
+def test_testproblem_MAP_uses_gram_cg():
+    TP = cuqipy_cil.testproblem.ParallelBeam2D()
+    if TP.model.domain_dim <= cuqi.config.MAX_DIM_INV:
+        cuqi.config.MAX_DIM_INV, max_dim = TP.model.domain_dim - 1, cuqi.config.MAX_DIM_INV
+    else:
+        max_dim = cuqi.config.MAX_DIM_INV
+
+    try:
+        x_MAP = TP.MAP()
+    finally:
+        cuqi.config.MAX_DIM_INV = max_dim
+
+    assert x_MAP.info["solver"] == "GramCG"
+    assert x_MAP.shape == (TP.model.domain_dim,)
+
+def test_ramp_filter_preconditioner_reduces_iterations():
+    model = cuqipy_cil.model.ParallelBeam2DModel(im_size=(64, 64), det_count=64, angles=np.linspace(0, np.pi, 90))
+    b = model.forward(np.random.default_rng(0).standard_normal(model.domain_dim))
+    M = cuqipy_cil.preconditioner.RampFilterPreconditioner(model, shift=1e-1)
+
+    x, it = cuqipy_cil.solver.GramCG(model, b, maxit=500, tol=1e-6, shift=1e-1).solve()
+    x_pcg, it_pcg = cuqipy_cil.solver.GramCG(model, b, maxit=500, tol=1e-6, shift=1e-1, preconditioner=M).solve()
+
+    assert it_pcg < it
+    assert np.allclose(x_pcg, x, rtol=1e-3, atol=1e-3)
+
+def test_ramp_filter_preconditioner_inverts_gram():
+    # Test that the preconditioner inverts A^T A in the mid-band of frequencies
+    model = cuqipy_cil.model.ParallelBeam2DModel(im_size=(64, 64), det_count=96, angles=np.linspace(0, np.pi, 180, endpoint=False))
+    M = cuqipy_cil.preconditioner.RampFilterPreconditioner(model)
+
+    def mid_band(x):
+        X = np.fft.fft2(x.reshape(64, 64))
+        nu = np.hypot(np.fft.fftfreq(64)[:, np.newaxis], np.fft.fftfreq(64)[np.newaxis, :])/0.5
+        X[(nu < 0.15) | (nu > 0.4)] = 0
+        return np.fft.ifft2(X).real.ravel()
+
+    x = mid_band(np.random.default_rng(0).standard_normal(model.domain_dim))
+    z = mid_band(M.apply(model.gram(x)))
+    assert np.linalg.norm(z - x) < 0.15*np.linalg.norm(x)
+
+def test_sirt_preconditioner_unit_step():
+    model = cuqipy_cil.model.FanBeam2DModel(im_size=(32, 32), det_count=48)
+    b = model.forward(np.random.default_rng(0).random(model.domain_dim))
+    M = cuqipy_cil.preconditioner.SIRTPreconditioner(model)
+
+    # Preconditioned Landweber (SIRT) iterations decrease the residual with unit step
+    x = np.zeros(model.domain_dim)
+    residuals = []
+    for _ in range(20):
+        r = b - model.forward(x)
+        residuals.append(np.linalg.norm(r))
+        x += M(model.adjoint(r))
+    assert np.all(np.diff(residuals) < 0)
+
+    x, it = cuqipy_cil.solver.GramCG(model, b, maxit=500, tol=1e-6, shift=1e-1).solve()
+    x_pcg, it_pcg = cuqipy_cil.solver.GramCG(model, b, maxit=500, tol=1e-6, shift=1e-1, preconditioner=M).solve()
+    assert np.allclose(x_pcg, x, rtol=1e-3, atol=1e-3)
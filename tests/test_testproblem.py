@@ -91,3 +91,94 @@ def test_testproblem_from_readme():
     y_data.plot(); plt.title("Data")
     samples.plot_mean(); plt.title("Posterior mean")
     samples.plot_std(); plt.title("Posterior standard deviation")
+
+def test_testproblem_fbp_initial_point():
+    # The MAP and samplers start from the FBP reconstruction, which is close to the exact solution.
+    TP = cuqipy_cil.testproblem.ParallelBeam2D()
+    x0 = TP._fbp_initial_point()
+
+    assert x0.shape == (TP.model.domain_dim,)
+    assert np.linalg.norm(x0 - TP.exactSolution) < np.linalg.norm(TP.exactSolution)
+
+def test_testproblem_lazy_fbp_initial_point(monkeypatch):
+    # Test that the FBP is only computed if the sampler uses it, and that samplers fall back to their default without it
+    TP = cuqipy_cil.testproblem.ParallelBeam2D()
+
+    def no_reconstruction():
+        raise ImportError("no analytic reconstruction")
+    monkeypatch.setattr(TP, "_fbp_initial_point", no_reconstruction)
+
+    # Gaussian prior: LinearRTO starts from the sampler default
+    assert TP.sample_posterior(10).samples.shape == (TP.model.domain_dim, 10)
+
+    # Legacy samplers never ask for the initial point
+    monkeypatch.setattr(TP, "_fbp_initial_point", lambda: pytest.fail("FBP computed for a legacy sampler"))
+    assert TP.sample_posterior(10, legacy=True).samples.shape == (TP.model.domain_dim, 10)
+
+def test_testproblem_spec():
+    # Test that the test problem can be recreated from a pickled spec using shared memory.
+    import pickle
+    TP = cuqipy_cil.testproblem.ParallelBeam2D()
+
+    with TP.spec() as spec:
+        data = pickle.dumps(spec)
+        TP2 = pickle.loads(data).build()
+
+        assert np.allclose(TP2.data, TP.data)
+        assert np.allclose(TP2.exactSolution, TP.exactSolution)
+        assert np.allclose(TP2.exactData, TP.exactData)
+        del TP2
+
+def test_testproblem_float32_precision(monkeypatch):
+    # Test that float32 precision keeps arrays in float32 and quantify the accuracy against float64.
+    np.random.seed(0)
+    TP64 = cuqipy_cil.testproblem.ParallelBeam2D()
+    x_MAP64, _ = cuqipy_cil.solver.GramCG(TP64.model, TP64.data, maxit=50, tol=1e-6, shift=1e-1).solve()
+
+    monkeypatch.setattr(cuqipy_cil.config, "PRECISION", "float32")
+    TP32 = cuqipy_cil.testproblem.ParallelBeam2D(data=TP64.data)
+    x_MAP32, _ = cuqipy_cil.solver.GramCG(TP32.model, TP32.data, maxit=50, tol=1e-6, shift=1e-1).solve()
+
+    assert TP32.exactSolution.dtype == np.float32
+    assert TP32.data.dtype == np.float32
+    assert TP32.prior.mean.dtype == np.float32
+    assert x_MAP32.dtype == np.float32
+
+    # float32 only affects the solution on the order of its machine precision
+    assert np.linalg.norm(x_MAP32 - x_MAP64) <= 1e-3*np.linalg.norm(x_MAP64)
+    assert np.allclose(TP32.exactSolution, TP64.exactSolution)
+
+def test_testproblem_cache_dir(tmp_path):
+    # Test that generated arrays are stored and reloaded from the cache directory.
+    TP = cuqipy_cil.testproblem.ParallelBeam2D(seed=1, cache_dir=tmp_path)
+    TP2 = cuqipy_cil.testproblem.ParallelBeam2D(seed=1, cache_dir=tmp_path)
+    TP3 = cuqipy_cil.testproblem.ParallelBeam2D(seed=2, cache_dir=tmp_path)
+
+    assert len(list(tmp_path.iterdir())) == 2
+    assert np.array_equal(TP2.data, TP.data)
+    assert np.array_equal(TP2.exactData, TP.exactData)
+    assert np.array_equal(TP2.exactSolution, TP.exactSolution)
+    assert not np.array_equal(TP3.data, TP.data)
+
+@pytest.mark.parametrize("noise_type", ["poisson", "logpoisson"])
+def test_testproblem_poisson(noise_type):
+    # Test that the analytic Poisson gradient matches finite differences and sampling runs.
+    TP = cuqipy_cil.testproblem.ParallelBeam2D(phantom=0.05*cuqi.data.shepp_logan(size=45), noise_type=noise_type, photon_count=1e3, seed=0)
+    x = np.asarray(TP.exactSolution).ravel()
+    direction = np.random.default_rng(0).standard_normal(TP.model.domain_dim)
+
+    eps = 1e-2 # Large enough that the float32 projections do not dominate the finite difference
+    fd = (TP.likelihood.logd(x + eps*direction) - TP.likelihood.logd(x - eps*direction))/(2*eps)
+    assert np.isclose(TP.likelihood.gradient(x) @ direction, fd, rtol=1e-2)
+    assert np.all(np.isfinite(TP.data))
+
+    samples = TP.sample_posterior(20)
+    assert samples.shape == (TP.model.domain_dim, 20)
+
+def test_testproblem_poisson_logpdf():
+    # Test that the log density of counts matches scipy.
+    import scipy.stats
+    z = np.random.default_rng(0).random(10)
+    y = cuqipy_cil.distribution.TransmissionPoisson(z, photon_count=100)
+    counts = y.sample()
+    assert np.isclose(y.logd(counts), np.sum(scipy.stats.poisson.logpmf(counts, 100*np.exp(-z))))